@@ -0,0 +1,43 @@
+# Times the correlation report (matrix, rolling pair correlations, cointegration
+# scan) on a synthetic close panel, without the result cache.
+# Run from the repo root: python -m benchmarks.bench_correlation
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from src.backend.correlation import correlation_report
+
+
+def make_closes(n_symbols, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    # A shared market factor so correlations are not all near zero
+    market = rng.normal(0.0003, 0.01, (n_days, 1))
+    returns = market * rng.uniform(0.5, 1.5, n_symbols) + rng.normal(0, 0.015, (n_days, n_symbols))
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=dates,
+                        columns=[f"SYM{i:03d}" for i in range(n_symbols)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--days", type=int, default=253)
+    parser.add_argument("--rolling-window", type=int, default=60)
+    parser.add_argument("--top-pairs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    closes = make_closes(args.symbols, args.days)
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        report = correlation_report(closes, args.days - 1, args.rolling_window, args.top_pairs)
+        timings.append(time.perf_counter() - started)
+
+    print(f"{args.symbols} symbols x {report['observations']} returns, "
+          f"{len(report['cointegration']['candidates'])} cointegration candidates: "
+          f"best {min(timings) * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
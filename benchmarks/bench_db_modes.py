@@ -0,0 +1,84 @@
+# Order throughput for the database modes supported by database.build_engine.
+# Each order does what /portfolio/buy does in the DB: update the balance, upsert
+# the holding, open a tax lot, record the transaction and commit.
+# Run from the repo root: python -m benchmarks.bench_db_modes [--server-url postgresql://...]
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from src.backend import models
+from src.backend.database import Base, build_engine
+
+
+def place_orders(Session, user_id, count, symbol):
+    db = Session()
+    try:
+        for _ in range(count):
+            user = db.get(models.User, user_id)
+            holding = db.query(models.Holding).filter(
+                models.Holding.user_id == user_id, models.Holding.symbol == symbol
+            ).first()
+            if holding:
+                holding.avg_price = (holding.avg_price * holding.quantity + 100.0) / (holding.quantity + 1)
+                holding.quantity += 1
+            else:
+                db.add(models.Holding(user_id=user_id, symbol=symbol, quantity=1, avg_price=100.0))
+            db.add(models.TaxLot(user_id=user_id, symbol=symbol, quantity=1, price=100.0, opened_at=datetime.utcnow()))
+            db.add(models.Transaction(user_id=user_id, symbol=symbol, trade_type="BUY", quantity=1,
+                                      price=100.0, amount=100.0, timestamp=datetime.utcnow()))
+            user.balance -= 100.0
+            db.commit()
+    finally:
+        db.close()
+
+
+def run_mode(name, engine, threads, orders):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    users = [models.User(email=f"bench{i}@x.com", password_hash="x", balance=1e9) for i in range(threads)]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.id for user in users]
+    db.close()
+
+    workers = [
+        threading.Thread(target=place_orders, args=(Session, user_id, orders, f"SYM{i}"))
+        for i, user_id in enumerate(user_ids)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    total = threads * orders
+    print(f"{name:<28} {total} orders on {threads} threads: {total / elapsed:8.0f} orders/s")
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--orders", type=int, default=250, help="Orders per thread")
+    parser.add_argument("--server-url", help="Optional server database URL to include in the comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f"sqlite:///{os.path.join(tmp, 'default.db')}"
+        tuned_url = f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+        run_mode("sqlite (default journaling)", build_engine(default_url, tune_sqlite=False), args.threads, args.orders)
+        run_mode("sqlite (WAL, tuned)", build_engine(tuned_url), args.threads, args.orders)
+
+    if args.server_url:
+        run_mode("server (pooled)", build_engine(args.server_url), args.threads, args.orders)
+
+
+if __name__ == "__main__":
+    main()
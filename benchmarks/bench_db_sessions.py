@@ -0,0 +1,127 @@
+# Sync vs async session throughput for DB-only requests while other requests
+# are stuck waiting on a slow upstream (e.g. a quote lookup).
+#
+# The sync run mimics FastAPI's threadpool: every request, slow or not, holds a
+# worker thread. The async run awaits the upstream and the DB on the event loop.
+# Run from the repo root: python -m benchmarks.bench_db_sessions
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.backend import models
+from src.backend.database import Base, build_engine, build_async_engine
+
+
+def seed(engine, transactions):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    user = models.User(email="bench@x.com", password_hash="x", balance=100000.0)
+    db.add(user)
+    db.commit()
+    db.add_all([
+        models.Transaction(user_id=user.id, symbol="AAPL", trade_type="BUY", quantity=1,
+                           price=100.0, amount=100.0, timestamp=datetime.utcnow())
+        for _ in range(transactions)
+    ])
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def transactions_query(user_id):
+    return (
+        select(models.Transaction).where(models.Transaction.user_id == user_id)
+        .order_by(models.Transaction.timestamp.desc()).limit(50)
+    )
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def report(name, latencies, elapsed):
+    print(f"{name:<6} {len(latencies) / elapsed:8.0f} DB req/s   "
+          f"p50 {percentile(latencies, 50) * 1000:7.1f} ms   p99 {percentile(latencies, 99) * 1000:7.1f} ms")
+
+
+def run_sync(engine, user_id, args):
+    Session = sessionmaker(bind=engine)
+
+    def db_request(submitted):
+        with Session() as db:
+            db.execute(transactions_query(user_id)).scalars().all()
+            db.scalar(select(func.count()).select_from(models.Transaction))
+        return time.perf_counter() - submitted
+
+    def slow_request(submitted):
+        time.sleep(args.upstream_delay)
+        return db_request(submitted)
+
+    # Latency is measured from submission, so time spent waiting for a free thread counts
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        started = time.perf_counter()
+        slow = [pool.submit(slow_request, time.perf_counter()) for _ in range(args.slow)]
+        fast = [pool.submit(db_request, time.perf_counter()) for _ in range(args.requests)]
+        latencies = [f.result() for f in fast]
+        elapsed = time.perf_counter() - started
+        for f in slow:
+            f.result()
+    report("sync", latencies, elapsed)
+
+
+async def run_async(async_engine, user_id, args):
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    # Cap concurrent DB work at the same number of workers the sync run gets
+    limit = asyncio.Semaphore(args.threads)
+
+    async def db_request():
+        submitted = time.perf_counter()
+        async with limit:
+            async with Session() as db:
+                (await db.execute(transactions_query(user_id))).scalars().all()
+                await db.scalar(select(func.count()).select_from(models.Transaction))
+        return time.perf_counter() - submitted
+
+    async def slow_request():
+        await asyncio.sleep(args.upstream_delay)
+        return await db_request()
+
+    started = time.perf_counter()
+    slow = [asyncio.create_task(slow_request()) for _ in range(args.slow)]
+    latencies = await asyncio.gather(*(db_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*slow)
+    report("async", latencies, elapsed)
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=40, help="Worker threads (Starlette's default pool is 40)")
+    parser.add_argument("--slow", type=int, default=40, help="Concurrent requests waiting on upstream pricing")
+    parser.add_argument("--upstream-delay", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=500, help="DB-only requests")
+    parser.add_argument("--transactions", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = build_engine(f"sqlite:///{path}")
+        user_id = seed(engine, args.transactions)
+        print(f"{args.slow} requests blocked on a {args.upstream_delay}s upstream, {args.requests} DB-only requests")
+        run_sync(engine, user_id, args)
+        asyncio.run(run_async(build_async_engine(f"sqlite+aiosqlite:///{path}"), user_id, args))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
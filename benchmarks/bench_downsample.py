@@ -0,0 +1,51 @@
+# Times the history downsampling kernels on long synthetic series and compares
+# building the history payload with and without max_points.
+# Run from the repo root: python -m benchmarks.bench_downsample
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from src.backend.analytics import lttb_downsample_indices, minmax_downsample_indices
+from src.backend.main import build_history
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--rows", type=int, default=252 * 30)
+    parser.add_argument("--max-points", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    y = 100 + np.cumsum(rng.normal(0, 1, args.points))
+    x = np.arange(args.points)
+    for name, func, func_args in [
+        ("minmax", minmax_downsample_indices, (y, args.max_points)),
+        ("lttb", lttb_downsample_indices, (x, y, args.max_points)),
+    ]:
+        elapsed, _ = best_of(args.repeat, func, *func_args)
+        print(f"{name:>6}: {args.points} -> {args.max_points} points in {elapsed * 1000:.1f} ms")
+
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=args.rows)
+    close = 100 + np.cumsum(rng.normal(0, 1, args.rows))
+    hist = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(args.rows, 1000.0)}, index=dates)
+    for max_points in (None, args.max_points):
+        elapsed, payload = best_of(args.repeat, build_history, "BENCH", "max", hist, 1.0, max_points)
+        size = len(json.dumps(payload))
+        print(f"history max_points={max_points}: {len(payload['data'])} rows, {size / 1024:.0f} KiB, {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Times the end-of-day pipeline's feature, fit and store stages on synthetic cached
+# bars (no upstream sync), in-process and across a process pool.
+# Run from the repo root: python -m benchmarks.bench_eod --symbols 100 --processes 1 4
+import argparse
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'eod.db')}"
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+import numpy as np
+import pandas as pd
+from src.backend import models
+from src.backend.database import engine, init_db
+from src.backend.eod import format_report, run_pipeline
+
+
+def make_bars(n_symbols, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days).date
+    symbols = [f"SYM{i:03d}" for i in range(n_symbols)]
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, size=(n_days, n_symbols)), axis=0))
+    volumes = rng.uniform(1e5, 1e6, size=(n_days, n_symbols))
+    rows = [
+        {"symbol": symbol, "date": day, "open": closes[d, s], "high": closes[d, s] * 1.01,
+         "low": closes[d, s] * 0.99, "close": closes[d, s], "volume": volumes[d, s]}
+        for s, symbol in enumerate(symbols) for d, day in enumerate(dates)
+    ]
+    with engine.begin() as conn:
+        conn.execute(models.PriceBar.__table__.insert(), rows)
+    return symbols
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--days", type=int, default=70)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    init_db()
+    symbols = make_bars(args.symbols, args.days)
+    for processes in args.processes:
+        print(f"processes={processes}: " + format_report(run_pipeline(symbols, processes=processes, sync=False)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Times compute_equity_curve on synthetic data: years of daily closes for
+# hundreds of symbols and a long transaction log.
+# Run from the repo root: python -m benchmarks.bench_equity_curve
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from src.backend.analytics import compute_equity_curve
+
+
+def make_data(n_symbols, n_days, n_trades, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    symbols = [f"SYM{i:03d}" for i in range(n_symbols)]
+    returns = rng.normal(0.0003, 0.02, size=(n_days, n_symbols))
+    closes = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=dates, columns=symbols)
+
+    day_idx = np.sort(rng.integers(0, n_days, n_trades))
+    sym_idx = rng.integers(0, n_symbols, n_trades)
+    quantity = rng.integers(1, 50, n_trades).astype(float)
+    price = closes.to_numpy()[day_idx, sym_idx]
+    transactions = pd.DataFrame({
+        "timestamp": dates[day_idx] + pd.Timedelta(hours=15),
+        "symbol": np.array(symbols)[sym_idx],
+        "trade_type": "BUY",
+        "quantity": quantity,
+        "price": price,
+        "amount": quantity * price
+    })
+    return transactions, closes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--days", type=int, default=252 * 5)
+    parser.add_argument("--trades", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    transactions, closes = make_data(args.symbols, args.days, args.trades)
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        compute_equity_curve(transactions, closes, 100000.0)
+        timings.append(time.perf_counter() - started)
+
+    print(f"{args.symbols} symbols x {args.days} days, {args.trades} trades: "
+          f"best {min(timings) * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Live-priced routes and sync routes served together by the real app while
+# upstream pricing is slow. Pricers call /portfolio/pnl, which fetches a live
+# price for every holding, and readers hit the cached history route, which runs
+# on the threadpool. Both pricing paths are measured:
+#
+#   threadpool - a yfinance quote run on a threadpool thread (the old path)
+#   async      - market_data.get_live_price awaited on the event loop
+#
+# With threadpool pricing, slow quotes hold the threads sync routes need.
+# Run from the repo root: python -m benchmarks.bench_live_pricing
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# The app reads its settings at import time, so point it at a scratch database
+# and switch off background jobs and rate limits before importing it
+SCRATCH_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'bench.db')}"
+os.environ.setdefault("CACHE_SQLITE_PATH", os.path.join(SCRATCH_DIR, "cache.db"))
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Enough upstream slots for every pricer, so the gates do not turn requests away
+os.environ.setdefault("UPSTREAM_MAX_IN_FLIGHT", "256")
+os.environ.setdefault("UPSTREAM_ASYNC_MAX_IN_FLIGHT", "256")
+
+import httpx
+import numpy as np
+import yfinance as yf
+from fastapi.concurrency import run_in_threadpool
+from benchmarks.fake_market import FakeTicker, offline_market
+from src.backend import portfolio
+from src.backend.database import async_engine
+from src.backend.main import app
+from src.backend.market_data import build_quote, ticker_info
+from src.backend.ratelimit import upstream_gate
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG"]
+PASSWORD = "bench-password"
+
+
+def threadpool_price(symbol):
+    with upstream_gate.slot():
+        return round(build_quote(symbol, ticker_info(yf.Ticker(symbol)))["current_price"], 2)
+
+
+async def threadpool_quote_price(symbol: str):
+    try:
+        return await run_in_threadpool(threadpool_price, symbol)
+    except Exception:
+        return None
+
+
+PRICING = {"threadpool": threadpool_quote_price, "async": portfolio.fetch_quote_price}
+
+
+# Users holding every symbol, so each pnl request prices all of them
+async def seed_users(client, users):
+    headers = []
+    for i in range(users):
+        email = f"pricing{i}@example.com"
+        await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+        for symbol in SYMBOLS:
+            await client.post("/portfolio/buy", json={"ticker": symbol, "quantity": 10}, headers=headers[-1])
+    return headers
+
+
+# Send requests back to back until the deadline; returns (latencies, errors)
+async def worker(send, deadline):
+    latencies, errors = [], 0
+    i = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await send(i)
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code >= 400
+        i += 1
+    return latencies, errors
+
+
+def report(name, results, duration):
+    latencies = np.array([value for values, _ in results for value in values]) * 1000
+    errors = sum(errors for _, errors in results)
+    if not len(latencies):
+        print(f"  {name:<8} no requests completed")
+        return
+    print(f"  {name:<8}{len(latencies) / duration:9.1f} req/s   p50 {np.percentile(latencies, 50):8.1f} ms   "
+          f"p99 {np.percentile(latencies, 99):8.1f} ms   errors {errors}")
+
+
+async def run(mode, client, headers, args):
+    portfolio.fetch_quote_price = PRICING[mode]
+
+    def price(n):
+        async def send(i):
+            return await client.get("/portfolio/pnl", headers=headers[(n + i) % len(headers)])
+        return send
+
+    def read(n):
+        async def send(i):
+            return await client.get(f"/api/stock/{SYMBOLS[(n + i) % len(SYMBOLS)]}/history?period=1mo")
+        return send
+
+    deadline = time.perf_counter() + args.duration
+    pricers = [asyncio.create_task(worker(price(n), deadline)) for n in range(args.pricers)]
+    readers = [asyncio.create_task(worker(read(n), deadline)) for n in range(args.readers)]
+    priced, reads = await asyncio.gather(asyncio.gather(*pricers), asyncio.gather(*readers))
+    print(mode)
+    report("pnl", priced, args.duration)
+    report("history", reads, args.duration)
+
+
+async def main(args):
+    original = portfolio.fetch_quote_price
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            headers = await seed_users(client, args.users)
+            # History comes from the cache after the first call per symbol
+            for symbol in SYMBOLS:
+                await client.get(f"/api/stock/{symbol}/history?period=1mo")
+            FakeTicker.latency = args.latency_ms / 1000
+            print(f"{args.pricers} pnl callers, {args.readers} history readers, "
+                  f"{args.latency_ms:.0f} ms upstream pricing, {args.duration:.0f}s per run")
+            for mode in args.modes:
+                await run(mode, client, headers, args)
+    portfolio.fetch_quote_price = original
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pricers", type=int, default=20, help="Concurrent pnl requests, one live price per holding")
+    parser.add_argument("--readers", type=int, default=10, help="Concurrent history requests")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="simulated upstream round trip")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--modes", nargs="+", choices=sorted(PRICING), default=["threadpool", "async"])
+    args = parser.parse_args()
+
+    # Seeding runs without latency; the runs get --latency-ms
+    with offline_market():
+        asyncio.run(main(args))
@@ -0,0 +1,39 @@
+# Login verifications per second on the bcrypt pool for increasing worker counts.
+# Run from the repo root: python -m benchmarks.bench_login [--rounds 12] [--logins 64]
+import argparse
+import asyncio
+import os
+import time
+from passlib.context import CryptContext
+from src.backend.hashing import HashingPool
+
+
+async def burst(pool, context, password_hash, logins):
+    await asyncio.gather(*(pool.run(context.verify, "password", password_hash) for _ in range(logins)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    password_hash = context.hash("password")
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores // 2 or 1, cores, cores * 2})
+
+    print(f"bcrypt cost {args.rounds}, {args.logins} concurrent logins, {cores} cores")
+    for workers in worker_counts:
+        pool = HashingPool(workers, max_queue=args.logins)
+        started = time.perf_counter()
+        asyncio.run(burst(pool, context, password_hash, args.logins))
+        elapsed = time.perf_counter() - started
+        stats = pool.stats()
+        print(f"{workers:3d} workers: {args.logins / elapsed:7.1f} logins/s   "
+              f"avg wait {stats['avg_wait_ms']:7.1f} ms   avg run {stats['avg_run_ms']:6.1f} ms")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
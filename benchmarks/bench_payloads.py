@@ -0,0 +1,79 @@
+# Bytes on the wire and latency for the history endpoint: plain JSON, gzip and
+# ETag revalidation, plus the encoder cost of the default JSONResponse against
+# ORJSONResponse on the same payload. yfinance is replaced with synthetic bars.
+# Run from the repo root: python -m benchmarks.bench_payloads [--rows 7560]
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+from src.backend import config
+from src.backend.main import app, build_history
+
+
+def synthetic_history(rows):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=rows)
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, rows))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(rows, 1000.0)}, index=dates)
+
+
+def percentiles(timings):
+    ms = np.array(timings) * 1000
+    return f"p50 {np.percentile(ms, 50):7.1f} ms   p99 {np.percentile(ms, 99):7.1f} ms"
+
+
+def time_calls(requests, func):
+    timings = []
+    result = None
+    for _ in range(requests):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=252 * 30)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    hist = synthetic_history(args.rows)
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.info = {"currency": "USD"}
+
+        def history(self, period=None):
+            return hist
+
+    yf.Ticker = FakeTicker
+    config.RATE_LIMIT_ENABLED = False
+
+    payload = build_history("BENCH", "max", hist, 1.0)
+    for name, render in [
+        ("JSONResponse", lambda: JSONResponse(jsonable_encoder(payload)).body),
+        ("ORJSONResponse", lambda: ORJSONResponse(payload).body),
+    ]:
+        timings, body = time_calls(args.requests, render)
+        print(f"encode {name:<15} {len(body) / 1024:7.0f} KiB   {percentiles(timings)}")
+
+    url = "/api/stock/BENCH/history?period=max"
+    with TestClient(app) as client:
+        etag = client.get(url).headers["etag"]
+        for name, headers in [
+            ("identity", {"Accept-Encoding": "identity"}),
+            ("gzip", {"Accept-Encoding": "gzip"}),
+            ("If-None-Match", {"Accept-Encoding": "gzip", "If-None-Match": etag}),
+        ]:
+            timings, response = time_calls(args.requests, lambda: client.get(url, headers=headers))
+            sent = int(response.headers.get("content-length", 0))
+            print(f"GET {name:<17} {response.status_code}  {sent / 1024:7.0f} KiB   {percentiles(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Times one screen over a universe of synthetic symbols: the panel load from
+# cached price bars plus the vectorized indicator pass, as the endpoint runs it.
+# Run from the repo root: python -m benchmarks.bench_screener
+import argparse
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'screener.db')}"
+
+import numpy as np
+import pandas as pd
+from src.backend import models
+from src.backend.database import SessionLocal, engine, init_db
+from src.backend.market_data import load_panels
+from src.backend.screener import LOOKBACK_DAYS, screen_panel
+
+
+def make_bars(n_symbols, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days).date
+    symbols = [f"SYM{i:03d}" for i in range(n_symbols)]
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, size=(n_days, n_symbols)), axis=0))
+    volumes = rng.uniform(1e5, 1e6, size=(n_days, n_symbols))
+    rows = [
+        {"symbol": symbol, "date": day, "open": closes[d, s], "high": closes[d, s], "low": closes[d, s],
+         "close": closes[d, s], "volume": volumes[d, s]}
+        for s, symbol in enumerate(symbols) for d, day in enumerate(dates)
+    ]
+    with engine.begin() as conn:
+        conn.execute(models.PriceBar.__table__.insert(), rows)
+    return symbols
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    symbols = make_bars(args.symbols, args.days)
+    start = (pd.Timestamp.today() - pd.Timedelta(days=LOOKBACK_DAYS)).date()
+
+    timings = {"load": [], "screen": []}
+    for _ in range(args.repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            panels = load_panels(db, symbols, ("close", "volume"), start=start)
+            loaded = time.perf_counter()
+            matches, _ = screen_panel(panels["close"], panels["volume"], rsi_below=50, sma_cross="above",
+                                      cross_within=5)
+            timings["load"].append(loaded - started)
+            timings["screen"].append(time.perf_counter() - loaded)
+        finally:
+            db.close()
+
+    print(f"{args.symbols} symbols, {len(panels['close'])} bars each, {len(matches)} matches")
+    for name, samples in timings.items():
+        print(f"{name:<8} best {min(samples) * 1000:.1f} ms, median {sorted(samples)[len(samples) // 2] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
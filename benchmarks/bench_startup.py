@@ -0,0 +1,75 @@
+# Worker startup cost: time to import the app in a fresh interpreter, and time
+# from launching uvicorn to its first successful response, per worker count.
+# Also shows the import cost now deferred to first use (pandas, yfinance, sklearn).
+# Run from the repo root: python -m benchmarks.bench_startup [--workers 1 4] [--repeat 5]
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import requests
+
+IMPORT_APP = "import src.backend.main"
+IMPORT_DEFERRED = "import pandas, yfinance, sklearn.ensemble, vaderSentiment.vaderSentiment"
+
+
+def fresh_import_seconds(statement):
+    code = f"import time; started = time.perf_counter(); {statement}; print(time.perf_counter() - started)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(workers):
+    port = free_port()
+    scratch_dir = tempfile.mkdtemp()
+    env = dict(os.environ, SCHEDULER_ENABLED="false",
+               DATABASE_URL=f"sqlite:///{os.path.join(scratch_dir, 'startup.db')}",
+               CACHE_SQLITE_PATH=os.path.join(scratch_dir, "cache.db"))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.backend.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except requests.ConnectionError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summary(timings):
+    timings = sorted(timings)
+    return f"best {timings[0] * 1000:7.0f} ms   median {timings[len(timings) // 2] * 1000:7.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"import app            {summary([fresh_import_seconds(IMPORT_APP) for _ in range(args.repeat)])}")
+    print(f"deferred imports      {summary([fresh_import_seconds(IMPORT_DEFERRED) for _ in range(args.repeat)])}")
+    for workers in args.workers:
+        timings = [time_to_first_request(workers) for _ in range(args.repeat)]
+        print(f"first request, {workers} wkr {summary(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# Offline stand-ins for the upstream services: yfinance (Ticker and download),
+# Yahoo's chart API (live trade prices), the exchange-rate API and NewsAPI. Prices are synthetic but deterministic per
+# symbol, so runs are repeatable and need no network. Bars recorded from the real
+# API can be replayed instead:
+#
+#     python -m benchmarks.fake_market record AAPL MSFT --out benchmarks/replay
+#
+#     with offline_market(latency=0.05, replay_dir="benchmarks/replay"):
+#         ...  # every upstream call sleeps 50 ms, like a real round trip
+import argparse
+import asyncio
+import os
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+import httpx
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend import market_data, utils
+
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504,
+               "5y": 1260, "10y": 2520, "ytd": 200, "max": 7560}
+CURRENCIES = {".L": "GBP", ".DE": "EUR", ".PA": "EUR", ".T": "JPY"}
+USD_RATES = {"USD": 1.0, "GBP": 1.27, "EUR": 1.08, "JPY": 0.0067}
+HEADLINES = [
+    "{symbol} beats quarterly earnings expectations",
+    "Analysts upgrade {symbol} on strong guidance",
+    "{symbol} shares slip as sector cools",
+    "Regulators open inquiry into {symbol}",
+    "{symbol} announces share buyback",
+]
+
+
+def symbol_currency(symbol: str):
+    for suffix, currency in CURRENCIES.items():
+        if symbol.upper().endswith(suffix):
+            return currency
+    return "USD"
+
+
+# The same symbol always yields the same random walk ending today; shorter
+# periods are tails of the full series, so quotes and histories agree
+@lru_cache(maxsize=1024)
+def full_history(symbol: str, end: pd.Timestamp):
+    days = PERIOD_DAYS["max"]
+    dates = pd.bdate_range(end=end, periods=days, tz="America/New_York")
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    close = rng.uniform(20, 200) * np.exp(rng.normal(0.0003, 0.018, days).cumsum() - 0.0003 * days)
+    spread = close * rng.uniform(0.002, 0.02, days)
+    return pd.DataFrame({
+        "Open": close - spread / 2,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, days).astype(float)
+    }, index=dates)
+
+
+# Recorded bars by symbol, loaded from <replay_dir>/<SYMBOL>.csv
+REPLAY = {}
+
+
+def load_replay(directory: str):
+    REPLAY.clear()
+    for name in os.listdir(directory):
+        if name.endswith(".csv"):
+            frame = pd.read_csv(os.path.join(directory, name), index_col=0)
+            # Move the recording onto business days ending today so cached bars never look stale
+            frame.index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=len(frame), tz="America/New_York")
+            REPLAY[name[:-4].upper()] = frame
+
+
+def synthetic_bars(symbol: str, days: int):
+    symbol = symbol.upper()
+    if symbol in REPLAY:
+        return REPLAY[symbol].iloc[-days:].copy()
+    return full_history(symbol, pd.Timestamp.today().normalize()).iloc[-days:].copy()
+
+
+# Download real bars once so later runs can replay them offline
+def record_market(symbols, directory: str, period: str = "max"):
+    os.makedirs(directory, exist_ok=True)
+    for symbol in symbols:
+        hist = yf.Ticker(symbol).history(period=period)[["Open", "High", "Low", "Close", "Volume"]]
+        hist.to_csv(os.path.join(directory, f"{symbol.upper()}.csv"))
+        print(f"{symbol}: {len(hist)} bars")
+
+
+class FakeTicker:
+    latency = 0.0
+
+    def __init__(self, symbol):
+        self.symbol = symbol.upper()
+
+    @property
+    def info(self):
+        time.sleep(self.latency)
+        bars = synthetic_bars(self.symbol, 2)
+        return {
+            "currentPrice": float(bars["Close"].iloc[-1]),
+            "previousClose": float(bars["Close"].iloc[0]),
+            "currency": symbol_currency(self.symbol),
+            "longName": f"{self.symbol} Holdings"
+        }
+
+    def history(self, period=None, start=None, **kwargs):
+        time.sleep(self.latency)
+        if start is not None:
+            days = max(len(pd.bdate_range(start=pd.Timestamp(start), end=pd.Timestamp.today())), 1)
+        else:
+            days = PERIOD_DAYS.get(period or "1mo", 21)
+        return synthetic_bars(self.symbol, days)
+
+
+def fake_download(tickers, period="5d", **kwargs):
+    time.sleep(FakeTicker.latency)
+    symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+    frames = {symbol: synthetic_bars(symbol, PERIOD_DAYS.get(period, 5)) for symbol in symbols}
+    return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+# Answers the exchange-rate and NewsAPI URLs that utils builds
+class FakeRequests:
+    def get(self, url, timeout=None, **kwargs):
+        time.sleep(FakeTicker.latency)
+        if "exchangerate-api.com" in url:
+            parts = url.rstrip("/").split("/pair/")[1].split("/")
+            rate = USD_RATES.get(parts[0], 1.0) / USD_RATES.get(parts[1], 1.0)
+            payload = {"conversion_rate": rate}
+            if len(parts) == 3:
+                payload["conversion_result"] = float(parts[2]) * rate
+            return FakeResponse(payload)
+        if "newsapi.org" in url:
+            symbol = url.split("q=")[1].split("&")[0]
+            return FakeResponse({"articles": [{"title": h.format(symbol=symbol)} for h in HEADLINES]})
+        raise RuntimeError(f"Unexpected upstream call in offline mode: {url}")
+
+
+# Answers the Yahoo chart URL that market_data.get_live_price builds, waiting on
+# the event loop like a real round trip
+async def fake_chart(request):
+    await asyncio.sleep(FakeTicker.latency)
+    symbol = request.url.path.rsplit("/", 1)[-1].upper()
+    meta = {"regularMarketPrice": float(synthetic_bars(symbol, 1)["Close"].iloc[-1]), "currency": symbol_currency(symbol)}
+    return httpx.Response(200, json={"chart": {"result": [{"meta": meta}], "error": None}})
+
+
+def install_offline_market(latency: float = 0.0, replay_dir: str | None = None):
+    if replay_dir:
+        load_replay(replay_dir)
+    yf.Ticker, yf.download, utils.requests = FakeTicker, fake_download, FakeRequests()
+    market_data.upstream_transport = httpx.MockTransport(fake_chart)
+    FakeTicker.latency = latency
+
+
+# Swap the upstream clients in place, restoring the real ones on exit
+@contextmanager
+def offline_market(latency: float = 0.0, replay_dir: str | None = None):
+    saved = (yf.Ticker, yf.download, utils.requests, market_data.upstream_transport, FakeTicker.latency)
+    install_offline_market(latency, replay_dir)
+    try:
+        yield
+    finally:
+        yf.Ticker, yf.download, utils.requests, market_data.upstream_transport, FakeTicker.latency = saved
+        REPLAY.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    record = subcommands.add_parser("record", help="save real daily bars for offline replay")
+    record.add_argument("symbols", nargs="+")
+    record.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "replay"))
+    record.add_argument("--period", default="max")
+    args = parser.parse_args()
+    record_market(args.symbols, args.out, args.period)
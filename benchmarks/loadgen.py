@@ -0,0 +1,210 @@
+# Load generator: simulated dashboard users against the API.
+#
+# Each user logs in once, then loops over the dashboard flows (portfolio page,
+# stock detail, trading, transaction history) with random think time between
+# them. By default an offline API server (benchmarks/offline_server.py) is
+# started on a scratch database; --base-url targets a server you run yourself.
+#
+#     python -m benchmarks.loadgen --users 50 --duration 60
+#     python -m benchmarks.loadgen --users 200 --think 0.5 3 --server-workers 4 --replay-dir benchmarks/replay
+#     python -m benchmarks.loadgen --base-url http://localhost:8000 --users 20
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from threading import Lock, Thread
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "META", "VOD.L", "SAP.DE"]
+PASSWORD = "loadgen-password"
+
+# Relative frequency of each flow once a user is logged in
+FLOW_WEIGHTS = {"portfolio": 4, "stock_detail": 4, "trade": 2, "transactions": 2}
+
+
+class FlowError(Exception):
+    pass
+
+
+class Results:
+    def __init__(self):
+        self.flows = defaultdict(list)  # flow -> [(seconds, ok)]
+        self.requests = 0
+        self.lock = Lock()
+
+    def record(self, flow, seconds, ok, requests_made):
+        with self.lock:
+            self.flows[flow].append((seconds, ok))
+            self.requests += requests_made
+
+
+class SimulatedUser:
+    def __init__(self, base_url, email, think, results, rng):
+        self.base_url = base_url
+        self.email = email
+        self.think = think
+        self.results = results
+        self.rng = rng
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        self.headers = {}
+        self.requests_made = 0
+
+    def call(self, method, path, **kwargs):
+        self.requests_made += 1
+        response = self.session.request(method, f"{self.base_url}{path}", headers=self.headers, timeout=60, **kwargs)
+        if response.status_code >= 400:
+            raise FlowError(f"{method} {path} -> {response.status_code}")
+        return response
+
+    def run_flow(self, name, func):
+        self.requests_made = 0
+        started = time.perf_counter()
+        try:
+            func()
+            ok = True
+        except Exception:
+            ok = False
+        self.results.record(name, time.perf_counter() - started, ok, self.requests_made)
+
+    def login(self):
+        token = self.call("POST", "/auth/login", json={"email": self.email, "password": PASSWORD}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def portfolio(self):
+        self.call("GET", "/portfolio/")
+
+    # The dashboard loads the whole stock page in one call
+    def stock_detail(self):
+        symbol = self.rng.choice(SYMBOLS)
+        self.call("GET", f"/api/stock/{symbol}/detail?timeout=20")
+
+    # Buy from the detail page, sometimes selling part of it straight back
+    def trade(self):
+        symbol = self.rng.choice(SYMBOLS)
+        self.call("POST", "/portfolio/buy", json={"ticker": symbol, "quantity": 2})
+        if self.rng.random() < 0.5:
+            self.call("POST", "/portfolio/sell", json={"ticker": symbol, "quantity": 1})
+        self.call("GET", "/portfolio/")
+
+    def transactions(self):
+        self.call("GET", "/portfolio/transactions?limit=50")
+
+    def run(self, deadline):
+        self.run_flow("login", self.login)
+        if not self.headers:
+            return
+        flows = list(FLOW_WEIGHTS)
+        weights = list(FLOW_WEIGHTS.values())
+        while time.monotonic() < deadline:
+            time.sleep(self.rng.uniform(*self.think))
+            if time.monotonic() >= deadline:
+                break
+            name = self.rng.choices(flows, weights)[0]
+            self.run_flow(name, getattr(self, name))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Scratch database, no rate limits or background jobs, cheap bcrypt
+def start_offline_server(workers, latency_ms, replay_dir):
+    port = free_port()
+    env = dict(os.environ)
+    scratch_dir = tempfile.mkdtemp()
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch_dir, 'loadgen.db')}"
+    env.setdefault("CACHE_SQLITE_PATH", os.path.join(scratch_dir, "cache.db"))
+    env.setdefault("SCHEDULER_ENABLED", "false")
+    env.setdefault("RATE_LIMIT_ENABLED", "false")
+    env.setdefault("BCRYPT_ROUNDS", "4")
+    env["OFFLINE_LATENCY_MS"] = str(latency_ms)
+    env["OFFLINE_REPLAY_DIR"] = replay_dir or ""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.offline_server:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            requests.get(base_url, timeout=1)
+            return server, base_url
+        except requests.ConnectionError:
+            if server.poll() is not None:
+                raise RuntimeError("Offline server exited during startup")
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Offline server did not start")
+
+
+def report(results, elapsed):
+    print(f"\n{'flow':<14}{'count':>7}{'errors':>8}{'err %':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'flows/s':>9}")
+    for flow in ["login", *FLOW_WEIGHTS]:
+        samples = results.flows.get(flow)
+        if not samples:
+            continue
+        ms = np.array([seconds for seconds, _ in samples]) * 1000
+        errors = sum(1 for _, ok in samples if not ok)
+        print(f"{flow:<14}{len(samples):>7}{errors:>8}{errors / len(samples) * 100:>7.1f}"
+              f"{np.percentile(ms, 50):>9.1f}{np.percentile(ms, 90):>9.1f}{np.percentile(ms, 99):>9.1f}"
+              f"{len(samples) / elapsed:>9.1f}")
+    print(f"\n{results.requests} requests in {elapsed:.1f}s = {results.requests / elapsed:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after ramp-up starts")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which users start")
+    parser.add_argument("--think", type=float, nargs=2, default=(1.0, 3.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--base-url", help="target an already running server instead of starting one")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated upstream round trip")
+    parser.add_argument("--replay-dir", help="recorded bars from `python -m benchmarks.fake_market record`")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_offline_server(args.server_workers, args.latency_ms, args.replay_dir)
+
+    try:
+        run_id = int(time.time())
+        emails = [f"load{run_id}-{i}@example.com" for i in range(args.users)]
+        for email in emails:
+            requests.post(f"{base_url}/auth/register", json={"email": email, "password": PASSWORD}, timeout=30)
+
+        results = Results()
+        started = time.monotonic()
+        deadline = started + args.duration
+        threads = []
+        for i, email in enumerate(emails):
+            user = SimulatedUser(base_url, email, args.think, results, random.Random(args.seed + i))
+            thread = Thread(target=user.run, args=(deadline,), daemon=True)
+            threads.append(thread)
+            thread.start()
+            time.sleep(args.ramp / max(args.users, 1))
+        for thread in threads:
+            thread.join()
+
+        print(f"{args.users} users, think {args.think[0]}-{args.think[1]}s, {args.duration}s against {base_url}")
+        report(results, time.monotonic() - started)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# The API with upstream market data, FX and news served by benchmarks/fake_market.py,
+# for load tests and manual runs without network access:
+#
+#     uvicorn benchmarks.offline_server:app --workers 4
+#
+# OFFLINE_LATENCY_MS adds a simulated upstream round trip; OFFLINE_REPLAY_DIR
+# replays recorded bars instead of synthetic ones.
+import os
+from benchmarks.fake_market import install_offline_market
+from src.backend.main import app
+
+install_offline_market(
+    latency=float(os.getenv("OFFLINE_LATENCY_MS", "0")) / 1000,
+    replay_dir=os.getenv("OFFLINE_REPLAY_DIR") or None
+)
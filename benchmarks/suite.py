@@ -0,0 +1,186 @@
+# Offline benchmark of every API route against the fake market in
+# benchmarks/fake_market.py, on a throwaway SQLite database.
+#
+#     python -m benchmarks.suite                      # run and print a report
+#     python -m benchmarks.suite --save               # also store it as the baseline
+#     python -m benchmarks.suite --compare            # exit 1 if a route regressed
+#     python -m benchmarks.suite --only quote history --requests 200
+#
+# A route regresses when its p50 or p99 exceeds the baseline by more than
+# --threshold (default 25%). Baselines are machine specific and not committed.
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The app reads its settings at import time, so point it at a scratch database
+# and switch off background jobs and rate limits before importing it
+SCRATCH_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'bench.db')}"
+os.environ.setdefault("CACHE_SQLITE_PATH", os.path.join(SCRATCH_DIR, "cache.db"))
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import numpy as np
+from fastapi.testclient import TestClient
+from benchmarks.fake_market import offline_market
+from src.backend.main import app
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "VOD.L", "SAP.DE"]
+PASSWORD = "bench-password"
+
+
+# name -> (method, path, needs_auth, json body); {symbol} rotates through SYMBOLS
+ROUTES = {
+    "quote": ("GET", "/api/stock/{symbol}", False, None),
+    "history": ("GET", "/api/stock/{symbol}/history?period=1y", False, None),
+    "history_max": ("GET", "/api/stock/{symbol}/history?period=max&max_points=500", False, None),
+    "predict": ("GET", "/api/stock/{symbol}/predict?windowSize=5", False, None),
+    "sentiment": ("GET", "/api/stock/{symbol}/sentiment", False, None),
+    "detail": ("GET", "/api/stock/{symbol}/detail", False, None),
+    "login": ("POST", "/auth/login", False, "login"),
+    "portfolio": ("GET", "/portfolio/", True, None),
+    "portfolio_refresh": ("GET", "/portfolio/?refresh=true", True, None),
+    "buy": ("POST", "/portfolio/buy", True, {"ticker": "{symbol}", "quantity": 1}),
+    "sell": ("POST", "/portfolio/sell", True, {"ticker": "{symbol}", "quantity": 1}),
+    "transactions": ("GET", "/portfolio/transactions?limit=100", True, None),
+    "lots": ("GET", "/portfolio/lots", True, None),
+    "pnl": ("GET", "/portfolio/pnl", True, None),
+    "equity_curve": ("GET", "/portfolio/equity-curve", True, None),
+    "risk": ("GET", "/portfolio/risk", True, None),
+    "leaderboard": ("GET", "/leaderboard/?limit=50", True, None),
+}
+
+
+def fill(value, symbol):
+    if isinstance(value, str):
+        return value.format(symbol=symbol)
+    if isinstance(value, dict):
+        return {key: fill(item, symbol) for key, item in value.items()}
+    return value
+
+
+# Users with a few positions, so portfolio routes have real work to do
+def seed_users(client, users):
+    tokens = []
+    for i in range(users):
+        email = f"bench{i}@example.com"
+        client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        token = client.post("/auth/login", json={"email": email, "password": PASSWORD}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for symbol in SYMBOLS:
+            client.post("/portfolio/buy", json={"ticker": symbol, "quantity": 50}, headers=headers)
+        tokens.append((email, headers))
+    return tokens
+
+
+def run_route(client, name, users, requests, concurrency):
+    method, path, needs_auth, body = ROUTES[name]
+
+    def call(i):
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        email, headers = users[i % len(users)]
+        json_body = {"email": email, "password": PASSWORD} if body == "login" else fill(body, symbol)
+        started = time.perf_counter()
+        response = client.request(method, fill(path, symbol), json=json_body,
+                                  headers=headers if needs_auth else None)
+        return time.perf_counter() - started, response.status_code < 400
+
+    # Warm caches and code paths before measuring
+    for i in range(min(5, requests)):
+        call(i)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - started
+
+    ms = np.array([elapsed for elapsed, _ in results]) * 1000
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_rps": round(requests / wall, 1)
+    }
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for name, stats in results.items():
+        before = baseline.get("routes", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if before[metric] > 0 and stats[metric] > before[metric] * (1 + threshold):
+                found.append(f"{name} {metric}: {before[metric]:.1f} -> {stats[metric]:.1f} ms "
+                             f"(+{(stats[metric] / before[metric] - 1) * 100:.0f}%)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated upstream round trip")
+    parser.add_argument("--only", nargs="+", choices=sorted(ROUTES), default=sorted(ROUTES))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="fail if a route regressed against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    with offline_market(latency=args.latency_ms / 1000), TestClient(app) as client:
+        users = seed_users(client, args.users)
+        print(f"{'route':<18}{'req':>6}{'err':>5}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>9}")
+        for name in args.only:
+            stats = run_route(client, name, users, args.requests, args.concurrency)
+            results[name] = stats
+            print(f"{name:<18}{stats['requests']:>6}{stats['errors']:>5}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}{stats['throughput_rps']:>9.1f}")
+
+    failed = False
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save first")
+            failed = True
+        else:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            settings = {key: getattr(args, key) for key in baseline.get("settings", {})}
+            if settings != baseline.get("settings", {}):
+                print(f"Warning: baseline was recorded with {baseline['settings']}, this run used {settings}")
+            found = regressions(results, baseline, args.threshold)
+            for line in found:
+                print(f"REGRESSION {line}")
+            if not found:
+                print(f"No regressions beyond {args.threshold:.0%}")
+            failed = bool(found)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "settings": {key: getattr(args, key) for key in ("requests", "concurrency", "users", "latency_ms")},
+                "routes": results
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
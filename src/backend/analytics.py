@@ -0,0 +1,245 @@
+from __future__ import annotations
+from statistics import NormalDist
+from threading import Lock
+from typing import TYPE_CHECKING
+from cachetools import LRUCache
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TRADING_DAYS = 252
+
+# Return covariance keyed by (symbols, lookback, last bar date), shared by every
+# user holding the same symbol set on the same trading day
+_covariance_cache = LRUCache(maxsize=256)
+_covariance_lock = Lock()
+
+
+# Daily portfolio value from a transaction log and a dates x symbols close panel.
+# `transactions` needs timestamp, symbol, trade_type, quantity, price and amount columns.
+def compute_equity_curve(transactions: pd.DataFrame, closes: pd.DataFrame, current_balance: float):
+    import pandas as pd
+
+    tx = transactions.copy()
+    tx["date"] = pd.to_datetime(tx["timestamp"]).dt.normalize()
+    sign = np.where(tx["trade_type"] == "BUY", 1.0, -1.0)
+    tx["signed_quantity"] = sign * tx["quantity"]
+    tx["cash_flow"] = -sign * tx["amount"]
+
+    # Calendar runs from the first trade through the latest trade or cached bar
+    start = tx["date"].min()
+    calendar = closes.index[closes.index >= start].union(pd.DatetimeIndex(tx["date"].unique()))
+
+    # Positions: net shares traded per day, accumulated over time
+    positions = tx.pivot_table(
+        index="date", columns="symbol", values="signed_quantity", aggfunc="sum"
+    ).reindex(calendar, fill_value=0.0).cumsum()
+
+    # Prices: cached closes carried forward, falling back to the last traded price
+    trade_prices = tx.groupby(["date", "symbol"])["price"].last().unstack()
+    prices = closes.reindex(index=calendar, columns=positions.columns).ffill()
+    prices = prices.fillna(trade_prices.reindex(index=calendar, columns=positions.columns).ffill())
+
+    holdings_value = (positions.to_numpy() * np.nan_to_num(prices.to_numpy())).sum(axis=1)
+
+    # Cash: work back from the current balance to the balance before the first trade
+    daily_flows = tx.groupby("date")["cash_flow"].sum().reindex(calendar, fill_value=0.0)
+    cash = (current_balance - daily_flows.sum()) + daily_flows.cumsum().to_numpy()
+
+    return pd.DataFrame({
+        "cash": cash,
+        "holdings_value": holdings_value,
+        "total_value": cash + holdings_value
+    }, index=calendar)
+
+
+# Aligned daily returns and their covariance for a dates x symbols close panel
+def return_covariance(closes: pd.DataFrame, lookback_days: int = TRADING_DAYS):
+    aligned = closes.dropna().iloc[-(lookback_days + 1):]
+    if len(aligned) < 3:
+        raise ValueError("Not enough overlapping history")
+
+    key = (tuple(aligned.columns), lookback_days, aligned.index[-1])
+    with _covariance_lock:
+        cached = _covariance_cache.get(key)
+    if cached is not None:
+        return cached
+
+    prices = aligned.to_numpy()
+    returns = prices[1:] / prices[:-1] - 1.0
+    cov = np.cov(returns, rowvar=False, ddof=1).reshape(len(aligned.columns), len(aligned.columns))
+
+    with _covariance_lock:
+        _covariance_cache[key] = (returns, cov)
+    return returns, cov
+
+
+# Volatility, beta, VaR and correlations for position weights over a return matrix.
+# `benchmark` is the column index of the benchmark in `returns`/`cov`.
+def portfolio_risk(returns: np.ndarray, cov: np.ndarray, weights: np.ndarray, benchmark: int,
+                   portfolio_value: float, confidence: float = 0.95):
+    daily_vol = float(np.sqrt(weights @ cov @ weights))
+    beta = float((cov[:, benchmark] @ weights) / cov[benchmark, benchmark]) if cov[benchmark, benchmark] > 0 else 0.0
+
+    portfolio_returns = returns @ weights
+    historical_var = -np.percentile(portfolio_returns, (1 - confidence) * 100) * portfolio_value
+    parametric_var = (NormalDist().inv_cdf(confidence) * daily_vol - portfolio_returns.mean()) * portfolio_value
+
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = np.nan_to_num(cov / np.outer(std, std))
+
+    return {
+        "daily_volatility": daily_vol,
+        "annual_volatility": daily_vol * np.sqrt(TRADING_DAYS),
+        "beta": beta,
+        "historical_var": float(max(historical_var, 0.0)),
+        "parametric_var": float(max(parametric_var, 0.0)),
+        "correlation": correlation
+    }
+
+
+# Engle-Granger 5% critical value for two series with a constant (MacKinnon)
+EG_CRITICAL_5PCT = -3.34
+
+
+def correlation_matrix(returns: np.ndarray):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.corrcoef(returns, rowvar=False).reshape(returns.shape[1], returns.shape[1])
+
+
+# Upper-triangle (i, j) pairs with the largest absolute correlation, strongest first
+def top_correlated_pairs(corr: np.ndarray, k: int):
+    i, j = np.triu_indices(len(corr), 1)
+    strength = np.nan_to_num(np.abs(corr[i, j]), nan=-1.0)
+    order = np.argsort(-strength, kind="stable")[:k]
+    return i[order], j[order]
+
+
+# Rolling correlation of return columns i[k] and j[k] for every pair at once, from
+# windowed sums of cumulative sums. Row r covers returns r .. r + window - 1.
+def rolling_pair_correlation(returns: np.ndarray, i: np.ndarray, j: np.ndarray, window: int):
+    x, y = returns[:, i], returns[:, j]
+
+    def window_sum(a):
+        c = np.cumsum(np.vstack([np.zeros((1, a.shape[1])), a]), axis=0)
+        return c[window:] - c[:-window]
+
+    sx, sy = window_sum(x), window_sum(y)
+    cov = window_sum(x * y) - sx * sy / window
+    var_x = window_sum(x * x) - sx * sx / window
+    var_y = window_sum(y * y) - sy * sy / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cov / np.sqrt(var_x * var_y)
+
+
+# Engle-Granger scan over every ordered pair of log price columns: regress y on x,
+# then a Dickey-Fuller regression (no lags, no constant) on the residuals. All pairs
+# come out of a few N x N matrix products. Entry [y, x] holds the DF t-statistic,
+# hedge ratio and residual mean-reversion coefficient for y regressed on x.
+def cointegration_scan(log_prices: np.ndarray):
+    demeaned = log_prices - log_prices.mean(axis=0)
+    lagged = demeaned[:-1]
+    changes = np.diff(log_prices, axis=0)
+    n = len(changes)
+
+    cov = demeaned.T @ demeaned
+    level_change = lagged.T @ changes
+    level_level = lagged.T @ lagged
+    change_change = changes.T @ changes
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = cov / np.diag(cov)[None, :]
+
+        # Residual e = y - beta * x expanded into sums over the column products
+        def residual_sum(products, cross):
+            d = np.diag(products)
+            return d[:, None] - beta * cross + beta * beta * d[None, :]
+
+        s_ed = residual_sum(level_change, level_change + level_change.T)
+        s_ee = residual_sum(level_level, 2 * level_level)
+        s_dd = residual_sum(change_change, 2 * change_change)
+
+        gamma = s_ed / s_ee
+        residual_var = (s_dd - gamma * s_ed) / (n - 1)
+        t_stat = gamma / np.sqrt(residual_var / s_ee)
+
+    np.fill_diagonal(t_stat, np.nan)
+    return t_stat, beta, gamma
+
+
+# Unordered pairs whose more stationary direction beats the critical value, most negative first
+def cointegration_candidates(log_prices: np.ndarray, k: int, critical: float = EG_CRITICAL_5PCT):
+    t_stat, beta, gamma = cointegration_scan(log_prices)
+    i, j = np.triu_indices(len(t_stat), 1)
+    forward, backward = t_stat[i, j], t_stat[j, i]
+    flip = np.nan_to_num(backward, nan=np.inf) < np.nan_to_num(forward, nan=np.inf)
+    y, x = np.where(flip, j, i), np.where(flip, i, j)
+    stat = t_stat[y, x]
+
+    keep = np.flatnonzero(stat < critical)
+    keep = keep[np.argsort(stat[keep], kind="stable")][:k]
+    y, x = y[keep], x[keep]
+    return y, x, t_stat[y, x], beta[y, x], gamma[y, x]
+
+
+# Row indices that keep each bucket's min and max plus the first and last point.
+# Fully vectorized: reduceat finds each bucket's extremes, then the first row matching them.
+def minmax_downsample_indices(y: np.ndarray, max_points: int):
+    n = len(y)
+    if max_points >= n or n < 3:
+        return np.arange(n)
+
+    n_buckets = max((max_points - 2) // 2, 1)
+    edges = np.unique(np.linspace(1, n - 1, n_buckets + 1).astype(int))
+    counts = np.diff(edges)
+    bucket = np.repeat(np.arange(len(counts)), counts)
+    interior = y[1:n - 1]
+
+    def first_match(extremes):
+        hits = np.flatnonzero(interior == np.repeat(extremes, counts))
+        _, first = np.unique(bucket[hits], return_index=True)
+        return hits[first] + 1
+
+    mins = first_match(np.fmin.reduceat(interior, edges[:-1] - 1))
+    maxs = first_match(np.fmax.reduceat(interior, edges[:-1] - 1))
+    return np.unique(np.concatenate(([0], mins, maxs, [n - 1])))
+
+
+# Largest-Triangle-Three-Buckets: picks the point per bucket that forms the largest
+# triangle with the previous pick and the next bucket's average. Bucket averages are
+# vectorized; the per-bucket choice is inherently sequential.
+def lttb_downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int):
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    n_buckets = max_points - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(int)
+    counts = np.diff(edges)
+
+    # Average of the following bucket for every bucket; the last one looks at the final point
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = "minmax"):
+    if method == "lttb":
+        return lttb_downsample_indices(x, y, max_points)
+    return minmax_downsample_indices(y, max_points)
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models
 from passlib.context import CryptContext
 from pydantic import BaseModel
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .database import get_db
+from .database import get_async_db
+from .hashing import hash_pool, HashPoolSaturated
+from . import config
+from .user_cache import CachedUser, user_cache
 
 # secret key used for testing purposes
 # TODO: Put in environment variable
@@ -24,7 +28,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost are flagged by verify_and_update and rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.BCRYPT_ROUNDS)
 
 
 class UserLogin(BaseModel):
@@ -36,6 +41,15 @@ class UserLogin(BaseModel):
 def get_password_hash(password: str):
     return pwd_context.hash(password)
 
+
+# Run a bcrypt call on the dedicated hashing pool, shedding load when it is full
+async def run_hashing(func, *args):
+    try:
+        return await hash_pool.run(func, *args)
+    except HashPoolSaturated:
+        raise HTTPException(status_code=503, detail="Authentication is busy, try again shortly",
+                            headers={"Retry-After": "1"})
+
 @router.get("/test")
 def test():
     return {"message": "Auth router working!"}
@@ -43,22 +57,33 @@ def test():
 
 # New user registration endpoint
 @router.post("/register")
-def register_user(user:UserLogin, db: Session = Depends(get_db)):
-    hashed_pw = get_password_hash(user.password)
+async def register_user(user:UserLogin, db: AsyncSession = Depends(get_async_db)):
+    # bcrypt is CPU-bound, keep it off the event loop and the shared threadpool
+    hashed_pw = await run_hashing(get_password_hash, user.password)
     db_user = models.User(email=user.email, password_hash=hashed_pw, balance=100000.0)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return {"message": "User registered", "user_id": db_user.id}
 
 
 # Login endpoint
 @router.post("/login")
-def login_user(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not pwd_context.verify(user.password, db_user.password_hash):
+async def login_user(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(models.User).where(models.User.email == user.email))
+    db_user = result.scalars().first()
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    verified, new_hash = await run_hashing(pwd_context.verify_and_update, user.password, db_user.password_hash)
+    if not verified:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Password was hashed with an old cost setting; store the upgraded hash
+    if new_hash:
+        db_user.password_hash = new_hash
+        await db.commit()
+
     access_token = create_access_token(data={"sub": str(db_user.id)})
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -66,8 +91,8 @@ def login_user(user: UserLogin, db: Session = Depends(get_db)):
 
 security = HTTPBearer()
 
-# Retrieve user data from database based off user information
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+
+def decode_user_id(credentials: HTTPAuthorizationCredentials):
     token = credentials.credentials  # Extract the actual token
     try:
         payload = jwt.decode(token, SECRET_KEY, [ALGORITHM])
@@ -76,10 +101,32 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return int(user_id)
 
-    db_user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+
+# Retrieve the signed-in user, served from the user cache when possible. The copy is
+# read-only: trades change the balance with conditional UPDATEs and then invalidate it.
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
+    user_id = decode_user_id(credentials)
+
+    cached, generation = user_cache.lookup(user_id)
+    if cached is not None:
+        return cached
+
+    db_user = await db.get(models.User, user_id)
     if db_user is None:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return db_user
+    cached = CachedUser.from_model(db_user)
+    user_cache.store(user_id, cached, generation)
+    return cached
+
+
+@router.get("/cache/stats")
+def user_cache_stats(user=Depends(get_current_user)):
+    return user_cache.stats()
+
 
+@router.get("/hashing/stats")
+def hashing_stats():
+    return hash_pool.stats()
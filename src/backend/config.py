@@ -0,0 +1,133 @@
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# Settings come from the environment (or a local .env file) with dev-friendly defaults
+load_dotenv()
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Import pandas, yfinance and scikit-learn in the background right after startup
+# rather than on the first request that needs them
+WARM_IMPORTS = env_bool("WARM_IMPORTS", True)
+
+# Background jobs
+SCHEDULER_ENABLED = env_bool("SCHEDULER_ENABLED", True)
+LEADERBOARD_REFRESH_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", "300"))
+# Lock files that keep host-wide jobs (pre-warm, end-of-day batch) to one worker per host
+JOB_LOCK_DIR = os.getenv("JOB_LOCK_DIR", tempfile.gettempdir())
+# Pre-warm the market data cache for watched and held symbols, most wanted first:
+# every PREWARM_INTERVAL_SECONDS (keep it under CACHE_TTL_HISTORY) while the market
+# is open and once each weekday at PREWARM_DAILY_AT before the open
+PREWARM_ENABLED = env_bool("PREWARM_ENABLED", True)
+PREWARM_INTERVAL_SECONDS = int(os.getenv("PREWARM_INTERVAL_SECONDS", "240"))
+PREWARM_DAILY_AT = os.getenv("PREWARM_DAILY_AT", "09:00")
+PREWARM_TIMEZONE = os.getenv("PREWARM_TIMEZONE", "America/New_York")
+PREWARM_MAX_SYMBOLS = int(os.getenv("PREWARM_MAX_SYMBOLS", "200"))
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+
+# End-of-day batch: after the close, sync bars for watched and held symbols,
+# retrain on a process pool and store next-day predictions for /predict to serve.
+# Off by default: it starts EOD_PROCESSES worker processes, so enable it on one
+# host (or run python -m src.backend.eod from cron)
+EOD_ENABLED = env_bool("EOD_ENABLED", False)
+EOD_RUN_AT = os.getenv("EOD_RUN_AT", "17:00")
+EOD_TIMEZONE = os.getenv("EOD_TIMEZONE", "America/New_York")
+MARKET_OPEN = os.getenv("MARKET_OPEN", "09:30")  # In EOD_TIMEZONE
+MARKET_CLOSE = os.getenv("MARKET_CLOSE", "16:00")  # In EOD_TIMEZONE
+EOD_WINDOW_SIZES = [int(w) for w in os.getenv("EOD_WINDOW_SIZES", "3,5").split(",")]
+EOD_PROCESSES = int(os.getenv("EOD_PROCESSES", str(os.cpu_count() or 1)))
+EOD_SYNC_CONCURRENCY = int(os.getenv("EOD_SYNC_CONCURRENCY", "4"))
+
+# Symbols per user watchlist
+WATCHLIST_MAX_SYMBOLS = int(os.getenv("WATCHLIST_MAX_SYMBOLS", "50"))
+
+# Database
+# Create missing tables and columns when a worker starts; turn off if schema setup runs as a separate step
+INIT_DB_ON_STARTUP = env_bool("INIT_DB_ON_STARTUP", True)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./trading.db")
+# Connection pool for server databases (PostgreSQL, MySQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # Negative = KiB, so 64 MiB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Async driver URL; derived from DATABASE_URL when unset (sqlite -> aiosqlite, postgresql -> asyncpg)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Authenticated-user cache (per process); trades invalidate entries explicitly
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Password hashing: bcrypt cost and the dedicated hashing pool. Changing the cost
+# rehashes each password transparently on the user's next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+
+# Rate limiting: token buckets per client IP and per user. Each request costs
+# tokens by endpoint class; buckets refill continuously up to their capacity.
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_IP_CAPACITY = float(os.getenv("RATE_LIMIT_IP_CAPACITY", "120"))
+RATE_LIMIT_IP_REFILL_PER_SECOND = float(os.getenv("RATE_LIMIT_IP_REFILL_PER_SECOND", "2"))
+RATE_LIMIT_USER_CAPACITY = float(os.getenv("RATE_LIMIT_USER_CAPACITY", "60"))
+RATE_LIMIT_USER_REFILL_PER_SECOND = float(os.getenv("RATE_LIMIT_USER_REFILL_PER_SECOND", "1"))
+# Peers allowed to name the real client in X-Forwarded-For: the dashboard, which
+# calls the API from the Streamlit server, and any reverse proxy on this host
+TRUSTED_PROXIES = {ip.strip() for ip in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if ip.strip()}
+RATE_LIMIT_COST_QUOTE = float(os.getenv("RATE_LIMIT_COST_QUOTE", "1"))
+RATE_LIMIT_COST_HISTORY = float(os.getenv("RATE_LIMIT_COST_HISTORY", "2"))
+RATE_LIMIT_COST_PREDICT = float(os.getenv("RATE_LIMIT_COST_PREDICT", "10"))
+RATE_LIMIT_COST_SENTIMENT = float(os.getenv("RATE_LIMIT_COST_SENTIMENT", "5"))
+# Correlation reports cost a base charge plus a share per requested symbol
+RATE_LIMIT_COST_CORRELATION = float(os.getenv("RATE_LIMIT_COST_CORRELATION", "2"))
+RATE_LIMIT_COST_CORRELATION_PER_SYMBOL = float(os.getenv("RATE_LIMIT_COST_CORRELATION_PER_SYMBOL", "0.1"))
+# Stale symbols synced from upstream by one correlation request; the rest use cached bars
+CORRELATION_MAX_SYNCS = int(os.getenv("CORRELATION_MAX_SYNCS", "10"))
+# Symbols whose bar sync failed or came back empty are not retried for this long
+SYNC_FAILURE_TTL_SECONDS = float(os.getenv("SYNC_FAILURE_TTL_SECONDS", "3600"))
+# Global cap on requests waiting on Yahoo / NewsAPI / FX at the same time
+UPSTREAM_MAX_IN_FLIGHT = int(os.getenv("UPSTREAM_MAX_IN_FLIGHT", "16"))
+UPSTREAM_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_ACQUIRE_TIMEOUT_SECONDS", "0.5"))
+# Separate cap for live trade pricing, which calls Yahoo from the event loop
+UPSTREAM_ASYNC_MAX_IN_FLIGHT = int(os.getenv("UPSTREAM_ASYNC_MAX_IN_FLIGHT", str(UPSTREAM_MAX_IN_FLIGHT)))
+
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+# Level 9 costs several times the CPU of 5 for a few percent smaller bodies
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "5"))
+
+# Per-stage request timing: Prometheus histograms on /metrics, optionally echoed
+# to clients in a Server-Timing header
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+SERVER_TIMING_ENABLED = env_bool("SERVER_TIMING_ENABLED", False)
+
+# Upstream response cache shared by all workers on the host ("sqlite"), kept per
+# process ("memory"), or off ("none"); TTLs are in seconds
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "./cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_TTL_QUOTE = float(os.getenv("CACHE_TTL_QUOTE", "15"))
+CACHE_TTL_HISTORY = float(os.getenv("CACHE_TTL_HISTORY", "300"))
+CACHE_TTL_FX = float(os.getenv("CACHE_TTL_FX", "3600"))
+CACHE_TTL_NEWS = float(os.getenv("CACHE_TTL_NEWS", "600"))
+# Keyed by the input history, so a hit is always the model the request would fit
+CACHE_TTL_PREDICTION = float(os.getenv("CACHE_TTL_PREDICTION", "3600"))
+# Keyed by the last bar date, so this only bounds how long rewritten bars can be missed
+CACHE_TTL_CORRELATION = float(os.getenv("CACHE_TTL_CORRELATION", "3600"))
+
+# On-demand request profiling: unset token = profiling middleware not installed
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
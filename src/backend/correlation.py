@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+import math
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+import numpy as np
+from .analytics import (
+    EG_CRITICAL_5PCT, cointegration_candidates, correlation_matrix, rolling_pair_correlation, top_correlated_pairs
+)
+from .auth import get_current_user
+from .database import get_db
+from .market_data import ensure_daily_bars, load_panel
+from .ratelimit import charge, upstream_gate
+from . import config
+from . import shared_cache
+
+router = APIRouter()
+
+MAX_SYMBOLS = 500
+# Symbols with fewer bars than this share of the window are left out rather than
+# shortening the aligned history for everyone else
+MIN_COVERAGE = 0.9
+
+
+def rounded(values, digits=4):
+    return [None if math.isnan(v) else v for v in np.round(values, digits).tolist()]
+
+
+# Correlation matrix, rolling correlations of the most correlated pairs and
+# cointegration candidates for a dates x symbols close panel
+def correlation_report(closes, lookback_days: int, rolling_window: int, top_pairs: int):
+    window = closes.iloc[-(lookback_days + 1):]
+    coverage = window.notna().mean()
+    insufficient = sorted(coverage.index[coverage < MIN_COVERAGE])
+    aligned = window.drop(columns=insufficient).dropna()
+    symbols = list(aligned.columns)
+    if len(symbols) < 2 or len(aligned) < 3:
+        raise ValueError("Not enough overlapping history")
+
+    prices = aligned.to_numpy()
+    returns = prices[1:] / prices[:-1] - 1.0
+    corr = correlation_matrix(returns)
+
+    pair_i, pair_j = top_correlated_pairs(corr, top_pairs)
+    rolling = {"window": rolling_window, "dates": [], "pairs": []}
+    if len(returns) >= rolling_window:
+        series = rolling_pair_correlation(returns, pair_i, pair_j, rolling_window)
+        rolling["dates"] = [d.date().isoformat() for d in aligned.index[rolling_window:]]
+        rolling["pairs"] = [
+            {"pair": [symbols[i], symbols[j]], "values": rounded(series[:, k])}
+            for k, (i, j) in enumerate(zip(pair_i, pair_j))
+        ]
+
+    y, x, stat, beta, gamma = cointegration_candidates(np.log(prices), top_pairs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half_life = -np.log(2) / np.log1p(gamma)
+
+    return {
+        "symbols": symbols,
+        "insufficient_history": insufficient,
+        "as_of": aligned.index[-1].date().isoformat(),
+        "observations": len(returns),
+        "correlation": [rounded(row) for row in corr],
+        "top_pairs": [
+            {"pair": [symbols[i], symbols[j]], "correlation": round(float(corr[i, j]), 4)}
+            for i, j in zip(pair_i, pair_j)
+        ],
+        "rolling": rolling,
+        "cointegration": {
+            "critical_value": EG_CRITICAL_5PCT,
+            "candidates": [
+                {
+                    "pair": [symbols[a], symbols[b]],  # first regressed on second
+                    "adf_stat": round(float(s), 3),
+                    "hedge_ratio": round(float(h), 4),
+                    "half_life_days": round(float(life), 1) if np.isfinite(life) and life > 0 else None
+                } for a, b, s, h, life in zip(y, x, stat, beta, half_life)
+            ]
+        }
+    }
+
+
+# Sync route, like portfolio risk: bars come from the local cache. Only a few stale
+# symbols are synced per request, each through the upstream gate; the rest are
+# reported as missing until a later request (or the end-of-day batch) has them.
+@router.get("/", response_class=ORJSONResponse)
+def correlation(
+    request: Request,
+    symbols: str = Query(..., description="Comma-separated, at least two"),
+    lookback_days: int = Query(252, ge=20, le=1260),
+    rolling_window: int = Query(60, ge=5, le=252),
+    top_pairs: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    universe = sorted({s.strip().upper() for s in symbols.split(",") if s.strip()})
+    if not 2 <= len(universe) <= MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Pass between 2 and {MAX_SYMBOLS} symbols")
+    charge(request, config.RATE_LIMIT_COST_CORRELATION + config.RATE_LIMIT_COST_CORRELATION_PER_SYMBOL * len(universe))
+
+    start = date.today() - timedelta(days=int(lookback_days * 1.5) + 10)
+    ensure_daily_bars(db, universe, start=start, max_syncs=config.CORRELATION_MAX_SYNCS, gate=upstream_gate)
+    closes = load_panel(db, universe, "close", start=start).dropna(axis=1, how="all")
+    missing = sorted(set(universe) - set(closes.columns))
+    if closes.empty:
+        raise HTTPException(status_code=404, detail="No price history for these symbols")
+
+    # Same symbol set, parameters and last bar -> same report, for every user and worker
+    key = shared_cache.cache_key(
+        "correlation", (tuple(closes.columns), lookback_days, rolling_window, top_pairs, closes.index[-1].date()), {}
+    )
+    try:
+        report = shared_cache.get_or_compute(
+            "correlation", key, config.CACHE_TTL_CORRELATION,
+            lambda: correlation_report(closes, lookback_days, rolling_window, top_pairs)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ORJSONResponse({**report, "missing": missing})
@@ -1,20 +1,168 @@
-from sqlalchemy import create_engine
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, func, inspect, insert, literal, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from . import config
 
-# Using SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./trading.db"
+# Database URL and pool sizing come from config (DATABASE_URL defaults to a local SQLite file)
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+# Per-connection SQLite tuning: WAL lets readers run alongside the single writer and
+# synchronous=NORMAL drops the fsync on every commit (still durable at checkpoints)
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={config.SQLITE_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# Same driver-independent URL with the async driver swapped in
+def to_async_url(url: str):
+    for sync_prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("mysql://", "mysql+aiomysql://"),
+        ("mysql+pymysql://", "mysql+aiomysql://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = config.ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+
+def _server_pool_options():
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": True  # Drop connections the server closed while idle
+    }
+
+
+def build_engine(url: str = SQLALCHEMY_DATABASE_URL, tune_sqlite: bool = True):
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        if tune_sqlite:
+            event.listen(engine, "connect", apply_sqlite_pragmas)
+        return engine
+
+    return create_engine(url, **_server_pool_options())
+
+
+def build_async_engine(url: str = ASYNC_DATABASE_URL, tune_sqlite: bool = True):
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url)
+        if tune_sqlite:
+            event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+        return engine
+
+    return create_async_engine(url, **_server_pool_options())
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Async sessions serve the API routes; the sync ones remain for background jobs
+# and CPU-bound endpoints that already run in the threadpool
+async_engine = build_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# create_all leaves existing tables alone, so columns added to a model since its table
+# was created (e.g. users.realized_pnl) are added here, filled with their scalar default
+def add_missing_columns(bind):
+    quote = bind.dialect.identifier_preparer.quote
+    tables = set(inspect(bind).get_table_names())
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(bind.dialect)}"
+                if column.default is not None and column.default.is_scalar:
+                    value = literal(column.default.arg).compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True})
+                    ddl += f" DEFAULT {value}"
+                connection.execute(text(ddl))
+
+
+# Holdings bought before the tax-lot ledger existed have no lots, so /lots and the
+# P&L views would not see them. Shares a holding has beyond its open lots become one
+# lot at the holding's average price, dated before its other lots so FIFO sells the
+# older shares first.
+def backfill_tax_lots(bind):
+    from .models import Holding, TaxLot, Transaction
+
+    covered = select(
+        TaxLot.user_id, TaxLot.symbol,
+        func.sum(TaxLot.quantity).label("quantity"), func.min(TaxLot.opened_at).label("opened_at")
+    ).group_by(TaxLot.user_id, TaxLot.symbol).subquery()
+    first_trade = select(
+        Transaction.user_id, Transaction.symbol, func.min(Transaction.timestamp).label("timestamp")
+    ).group_by(Transaction.user_id, Transaction.symbol).subquery()
+    uncovered = select(
+        Holding.user_id, Holding.symbol, Holding.avg_price,
+        (Holding.quantity - func.coalesce(covered.c.quantity, 0)).label("quantity"),
+        first_trade.c.timestamp, covered.c.opened_at
+    ).outerjoin(covered, (covered.c.user_id == Holding.user_id) & (covered.c.symbol == Holding.symbol)
+    ).outerjoin(first_trade, (first_trade.c.user_id == Holding.user_id) & (first_trade.c.symbol == Holding.symbol))
+
+    with bind.begin() as connection:
+        rows = [row for row in connection.execute(uncovered) if row.quantity > 1e-9]  # portfolio.LOT_EPSILON
+        if rows:
+            connection.execute(insert(TaxLot), [{
+                "user_id": row.user_id,
+                "symbol": row.symbol,
+                "quantity": row.quantity,
+                "price": row.avg_price,
+                "opened_at": backfilled_lot_date(row.timestamp, row.opened_at)
+            } for row in rows])
+
+
+# The first recorded trade if there is one; otherwise just before the oldest open lot
+def backfilled_lot_date(first_trade, first_lot):
+    if first_lot is not None:
+        first_lot = first_lot - timedelta(seconds=1)
+        if first_trade is None or first_lot < first_trade:
+            return first_lot
+    return first_trade or datetime.utcnow()
+
+
+# Create any missing tables and columns. Runs from the app's startup hook, or on its
+# own before starting workers: python -m src.backend.database
+def init_db(bind=None):
+    from . import models  # noqa: F401  registers the tables on Base.metadata
+    Base.metadata.create_all(bind=bind or engine)
+    add_missing_columns(bind or engine)
+    backfill_tax_lots(bind or engine)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+if __name__ == "__main__":
+    init_db()
+    print(f"Tables ready on {SQLALCHEMY_DATABASE_URL}")
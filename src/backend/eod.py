@@ -0,0 +1,183 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, time as time_of_day, timedelta
+from zoneinfo import ZoneInfo
+import argparse
+import json
+import multiprocessing
+import time
+from sqlalchemy.orm import Session
+from .database import SessionLocal, init_db
+from .market_data import load_panels, sync_daily_bars
+from .metrics import EOD_STAGE_SECONDS
+from .prediction import prediction_features, predict_from_features
+from .scheduler import host_lock
+from .watchlist import symbols_by_demand
+from . import config
+from . import models
+
+# Training history per symbol, matching the live /predict route's 3mo period
+HISTORY_MONTHS = 3
+
+
+# Most recent trading day whose close has passed. Weekends are skipped; a market
+# holiday just means stored predictions look stale and /predict computes live.
+def last_session_date(now: datetime | None = None):
+    now = now or datetime.now(ZoneInfo(config.EOD_TIMEZONE))
+    day = now.date()
+    if now.time() < time_of_day.fromisoformat(config.MARKET_CLOSE) or day.weekday() >= 5:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+# Weekday between MARKET_OPEN and MARKET_CLOSE; holidays count as open
+def market_is_open(now: datetime | None = None):
+    now = now or datetime.now(ZoneInfo(config.EOD_TIMEZONE))
+    opens, closes = time_of_day.fromisoformat(config.MARKET_OPEN), time_of_day.fromisoformat(config.MARKET_CLOSE)
+    return now.weekday() < 5 and opens <= now.time() < closes
+
+
+# Stored payload for /predict, or None when there is none from the latest session
+def stored_prediction(db: Session, symbol: str, window_size: int):
+    row = db.get(models.Prediction, (symbol.upper(), window_size))
+    if row is None or row.as_of < last_session_date():
+        return None
+    return json.loads(row.payload)
+
+
+@contextmanager
+def timed_stage(report: dict, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        report["stages"][name] = round(time.perf_counter() - started, 3)
+
+
+# Each sync thread uses its own session
+def sync_symbol(symbol: str, start: date):
+    db = SessionLocal()
+    try:
+        sync_daily_bars(db, symbol, start=start)
+        return None
+    except Exception as e:
+        db.rollback()
+        return str(e) or type(e).__name__
+    finally:
+        db.close()
+
+
+# Per-symbol OHLCV frames (yfinance column names, USD) from dates x symbols panels
+def bar_histories(panels: dict, symbols):
+    import pandas as pd
+
+    histories = {}
+    for symbol in symbols:
+        hist = pd.DataFrame({
+            "Open": panels["open"][symbol], "High": panels["high"][symbol], "Low": panels["low"][symbol],
+            "Close": panels["close"][symbol], "Volume": panels["volume"][symbol]
+        }).dropna()
+        if not hist.empty:
+            histories[symbol] = hist
+    return histories
+
+
+# Sync bars, build features, retrain and store next-day predictions for every
+# watched or held symbol (or the given ones). Returns a report with per-stage seconds.
+def run_pipeline(symbols=None, window_sizes=None, processes: int = config.EOD_PROCESSES, sync: bool = True):
+    import pandas as pd
+
+    window_sizes = window_sizes or config.EOD_WINDOW_SIZES
+    report = {"started_at": datetime.utcnow().isoformat(), "stages": {}, "failed": {}}
+    start = (pd.Timestamp.today().normalize() - pd.DateOffset(months=HISTORY_MONTHS)).date()
+
+    db = SessionLocal()
+    try:
+        with timed_stage(report, "symbols"):
+            if symbols is None:
+                symbols = [symbol for symbol, _ in symbols_by_demand(db)]
+            symbols = sorted({s.upper() for s in symbols})
+        report["symbols"] = len(symbols)
+
+        # Upstream bound, so a few threads; every symbol is refreshed, not just stale ones
+        if sync:
+            with timed_stage(report, "sync"):
+                with ThreadPoolExecutor(max_workers=config.EOD_SYNC_CONCURRENCY, thread_name_prefix="eod-sync") as pool:
+                    for symbol, error in zip(symbols, pool.map(lambda s: sync_symbol(s, start), symbols)):
+                        if error is not None:
+                            report["failed"][symbol] = f"sync: {error}"
+            db.expire_all()
+
+        with timed_stage(report, "features"):
+            panels = load_panels(db, symbols, ("open", "high", "low", "close", "volume"), start=start)
+            histories = bar_histories(panels, symbols)
+            # Bars are stored in USD, so the stored payloads are USD too
+            features = {symbol: prediction_features(hist, 1.0) for symbol, hist in histories.items()}
+            as_of = {symbol: hist.index[-1].date() for symbol, hist in histories.items()}
+            tasks = [(symbol, df, w) for symbol, df in features.items() for w in window_sizes]
+
+        # CPU bound: forests are fitted in worker processes. "spawn" because the
+        # server process has threads running, which fork does not copy safely.
+        with timed_stage(report, "fit"):
+            if processes > 1 and len(tasks) > 1:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+                    results = list(pool.map(predict_from_features, tasks, chunksize=max(len(tasks) // (processes * 4), 1)))
+            else:
+                results = [predict_from_features(task) for task in tasks]
+
+        with timed_stage(report, "store"):
+            stored = 0
+            for symbol, window_size, payload, error in results:
+                if payload is None:
+                    report["failed"][f"{symbol}/{window_size}"] = f"fit: {error}"
+                    continue
+                payload["as_of"] = as_of[symbol].isoformat()
+                db.merge(models.Prediction(
+                    symbol=symbol, window_size=window_size, as_of=as_of[symbol],
+                    payload=json.dumps(payload), created_at=datetime.utcnow()
+                ))
+                stored += 1
+            db.commit()
+        report["predictions"] = stored
+    finally:
+        db.close()
+
+    report["total_seconds"] = round(sum(report["stages"].values()), 3)
+    for name, seconds in report["stages"].items():
+        EOD_STAGE_SECONDS.labels(name).set(seconds)
+    return report
+
+
+def format_report(report: dict):
+    lines = [f"{report['symbols']} symbols, {report['predictions']} predictions stored, "
+             f"{len(report['failed'])} failures in {report['total_seconds']:.1f}s"]
+    lines += [f"  {name:<10}{seconds:>9.2f}s" for name, seconds in report["stages"].items()]
+    lines += [f"  failed {key}: {error}" for key, error in sorted(report["failed"].items())]
+    return "\n".join(lines)
+
+
+# Scheduled entry point; only the worker holding the host lock runs the batch
+def run_pipeline_job():
+    if not host_lock("eod"):
+        return
+    print(f"End-of-day pipeline: {format_report(run_pipeline())}")
+
+
+# python -m src.backend.eod [--symbols AAPL MSFT] [--processes 8] [--no-sync]
+def main():
+    parser = argparse.ArgumentParser(description="End-of-day bar sync, retraining and prediction batch")
+    parser.add_argument("--symbols", nargs="+", help="defaults to every watched or held symbol")
+    parser.add_argument("--window-sizes", type=int, nargs="+", default=config.EOD_WINDOW_SIZES)
+    parser.add_argument("--processes", type=int, default=config.EOD_PROCESSES)
+    parser.add_argument("--no-sync", action="store_true", help="use the bars already cached")
+    args = parser.parse_args()
+
+    init_db()
+    print(format_report(run_pipeline(args.symbols, args.window_sizes, args.processes, sync=not args.no_sync)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from . import config
+
+
+class HashPoolSaturated(Exception):
+    pass
+
+
+# Bounded thread pool reserved for bcrypt. bcrypt releases the GIL, so hashing
+# runs in parallel without occupying the threads that serve quotes and DB reads.
+class HashingPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # Caps running + waiting jobs; beyond that callers are turned away
+        self._slots = BoundedSemaphore(workers + max_queue)
+        self._lock = Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.running = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashPoolSaturated()
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        enqueued = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.total_wait += started - enqueued
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.total_run += time.perf_counter() - started
+
+        # The slot is held until the job itself finishes, not the awaiting request:
+        # a cancelled request leaves bcrypt running on its worker
+        def finished(_):
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            finished(None)
+            raise
+        future.add_done_callback(finished)
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": self.in_flight - self.running,
+                "running": self.running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_run_ms": round(self.total_run / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hash_pool = HashingPool(config.HASH_WORKERS, config.HASH_MAX_QUEUE)
@@ -0,0 +1,103 @@
+from datetime import datetime
+from threading import Lock
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from .auth import get_current_user
+from .database import get_db, SessionLocal
+from .market_data import fetch_latest_prices
+from .snapshots import apply_price_ticks
+from . import models
+
+router = APIRouter()
+
+# Latest ranked snapshot, replaced wholesale by each refresh
+_snapshot = {"computed_at": None, "entries": [], "ranks": {}}
+_snapshot_lock = Lock()
+
+
+# Other players see "l***@x.com" rather than the full address
+def mask_email(email: str):
+    local, _, domain = email.partition("@")
+    return f"{local[:1]}***@{domain}" if domain else f"{local[:1]}***"
+
+
+# Value every account in bulk: one holdings query, one price fetch for the distinct symbols
+def compute_leaderboard(db: Session):
+    import pandas as pd
+
+    users = pd.DataFrame(
+        db.query(models.User.id, models.User.email, models.User.balance).all(),
+        columns=["user_id", "email", "balance"]
+    )
+    holdings = pd.DataFrame(
+        db.query(models.Holding.user_id, models.Holding.symbol, models.Holding.quantity, models.Holding.avg_price).all(),
+        columns=["user_id", "symbol", "quantity", "avg_price"]
+    )
+
+    if holdings.empty:
+        users["holdings_value"] = 0.0
+    else:
+        prices = fetch_latest_prices(holdings["symbol"].unique())
+        # The same prices tick the portfolio snapshots of accounts holding them
+        apply_price_ticks(db, prices)
+        # Fall back to cost when a symbol could not be priced
+        price = holdings["symbol"].map(prices).fillna(holdings["avg_price"])
+        holdings["market_value"] = holdings["quantity"] * price
+        values = holdings.groupby("user_id")["market_value"].sum()
+        users["holdings_value"] = users["user_id"].map(values).fillna(0.0)
+
+    users["total_portfolio_value"] = users["balance"].fillna(0.0) + users["holdings_value"]
+    users = users.sort_values(["total_portfolio_value", "user_id"], ascending=[False, True]).reset_index(drop=True)
+    users["rank"] = users.index + 1
+
+    return [
+        {
+            "rank": int(row.rank),
+            "user_id": int(row.user_id),
+            "user": mask_email(row.email),
+            "cash_balance": round(row.balance, 2),
+            "holdings_value": round(row.holdings_value, 2),
+            "total_portfolio_value": round(row.total_portfolio_value, 2)
+        } for row in users.itertuples()
+    ]
+
+
+def refresh_leaderboard(db: Session):
+    entries = compute_leaderboard(db)
+    with _snapshot_lock:
+        _snapshot["computed_at"] = datetime.utcnow()
+        _snapshot["entries"] = entries
+        _snapshot["ranks"] = {entry["user_id"]: entry["rank"] for entry in entries}
+
+
+# Scheduled entry point; runs outside any request so it opens its own session
+def refresh_leaderboard_job():
+    db = SessionLocal()
+    try:
+        refresh_leaderboard(db)
+    finally:
+        db.close()
+
+
+@router.get("/")
+def show_leaderboard(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    # Serve the last snapshot; only compute inline before the first scheduled run
+    if _snapshot["computed_at"] is None:
+        refresh_leaderboard(db)
+
+    with _snapshot_lock:
+        entries = _snapshot["entries"]
+        computed_at = _snapshot["computed_at"]
+        your_rank = _snapshot["ranks"].get(user.id)
+
+    return {
+        "computed_at": computed_at.isoformat(),
+        "total": len(entries),
+        "your_rank": your_rank,
+        "entries": entries[offset:offset + limit]
+    }
@@ -1,20 +1,87 @@
-from fastapi import FastAPI, HTTPException, Query
-import yfinance as yf
-import pandas as pd
-from .utils import get_conversion_rate, convert_currency, add_technical_features, fetch_news_headlines, analyze_sentiment
-from sklearn.ensemble import RandomForestRegressor
-from .database import engine, Base
+from fastapi import FastAPI, HTTPException, Query, Depends, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from .utils import get_conversion_rate, fetch_news_headlines, analyze_sentiment
+from .market_data import build_quote, cached_history, cached_info
+from .analytics import downsample_indices
+from .metrics import stage
+from .prediction import fit_prediction, prediction_features
+from .database import get_db, init_db, SessionLocal
+from sqlalchemy.orm import Session
 from . import auth
 from . import portfolio
+from . import leaderboard
+from . import screener
+from . import correlation
+from . import watchlist
+from . import eod
+from . import metrics
+from . import profiling
+from . import config
+from . import shared_cache
+from .scheduler import host_lock, scheduler
+from .ratelimit import UpstreamBusy, rate_limit, upstream_unavailable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import math
-
-
-app = FastAPI()
-# Create tables
-Base.metadata.create_all(bind=engine)
-
+import threading
+
+# pandas, yfinance and scikit-learn are imported inside the handlers that use them,
+# so workers start accepting requests (and tests start) without paying for them up front
+
+
+def warm_imports():
+    import pandas  # noqa: F401
+    import yfinance  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.INIT_DB_ON_STARTUP:
+        init_db()
+    # Load the heavy libraries in the background once the worker is up
+    if config.WARM_IMPORTS:
+        threading.Thread(target=warm_imports, name="warm-imports", daemon=True).start()
+    # Background jobs run for the lifetime of the server process
+    if config.SCHEDULER_ENABLED:
+        scheduler.every(config.LEADERBOARD_REFRESH_SECONDS, leaderboard.refresh_leaderboard_job)
+        if config.PREWARM_ENABLED:
+            scheduler.every(config.PREWARM_INTERVAL_SECONDS, prewarm_during_market_hours)
+            scheduler.daily_at(config.PREWARM_DAILY_AT, prewarm_market_data, tz=config.PREWARM_TIMEZONE,
+                               name="prewarm_before_open", weekdays_only=True)
+        if config.EOD_ENABLED:
+            scheduler.daily_at(config.EOD_RUN_AT, eod.run_pipeline_job, tz=config.EOD_TIMEZONE, weekdays_only=True)
+        scheduler.start()
+    yield
+    scheduler.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+# Compress large bodies (long histories, transaction pages) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=config.GZIP_MINIMUM_SIZE, compresslevel=config.GZIP_COMPRESS_LEVEL)
+if config.METRICS_ENABLED:
+    app.middleware("http")(metrics.timing_middleware)
+    app.include_router(metrics.router)
+if config.PROFILE_TOKEN:
+    app.middleware("http")(profiling.profiling_middleware)
+    app.include_router(profiling.router, prefix="/admin", tags=["admin"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"])
+app.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
+app.include_router(screener.router, prefix="/screener", tags=["screener"])
+app.include_router(correlation.router, prefix="/correlation", tags=["correlation"])
+app.include_router(watchlist.router, prefix="/watchlist", tags=["watchlist"])
+
+# Any route whose upstream call found the gate full: a temporary condition, retry shortly
+@app.exception_handler(UpstreamBusy)
+async def upstream_busy(request: Request, exc: UpstreamBusy):
+    error = upstream_unavailable()
+    return ORJSONResponse({"detail": error.detail}, status_code=error.status_code, headers=error.headers)
+
 
 def clean_number(x):
     if x is None or (isinstance(x, float) and (math.isnan(x) or math.isinf(x))):
@@ -27,147 +94,308 @@ def main():
     # Root endpoint returns a welcome message
     return {"message": "Hello, welcome to the Trading Dashboard API"}
 
+
+# Shared upstream cache: backend, entry count and this worker's hits/misses
+@app.get("/api/cache/stats")
+def upstream_cache_stats(user=Depends(auth.get_current_user)):
+    return shared_cache.stats()
+
 # Get stock data for a given symbol
-@app.get("/api/stock/{symbol}")
+@app.get("/api/stock/{symbol}", dependencies=[Depends(rate_limit("quote"))])
 def stock_price(symbol: str, target_currency: str = Query("USD")):
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        return build_quote(symbol, cached_info(symbol), target_currency)
+    except UpstreamBusy:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"Error fetching data for {symbol}")
 
-        # Ensure the stock exists and has price data
-        if not info or 'currentPrice' not in info:
-            raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
 
+# Convert historical OHLCV data into the JSON-friendly history payload,
+# optionally downsampled on the close to at most max_points rows
+def build_history(symbol: str, period: str, hist, rate: float, max_points: int | None = None, method: str = "minmax"):
+    history_data = []
+    downsampling = None
+
+    # skip dividend-only rows
+    hist = hist.dropna(subset=['Open', 'Close'])
+
+    if max_points is not None and len(hist) > max_points:
+        keep = downsample_indices(hist.index.asi8, hist['Close'].to_numpy(), max_points, method)
+        downsampling = {"method": method, "original_points": len(hist)}
+        hist = hist.iloc[keep]
+
+    # Convert whole columns rather than row by row
+    prices = [[clean_number(x) for x in (hist[column].to_numpy() * rate).tolist()]
+              for column in ('Open', 'High', 'Low', 'Close')]
+    volumes = [int(v) for v in hist['Volume'].fillna(0).tolist()]
+
+    for date, open_, high, low, close, volume in zip(hist.index.strftime("%Y-%m-%d"), *prices, volumes):
+        history_data.append({
+            "date": date,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume
+        })
+
+    payload = {
+        "symbol": symbol.upper(),
+        "period": period,
+        "data": history_data
+    }
+    if downsampling:
+        payload["downsampling"] = downsampling
+    return payload
+
+
+# Chart period and prediction window when a request does not pick them. /predict,
+# /detail, the dashboard's stock page (which leaves both to the server) and the
+# pre-warm job all share them, so they return and warm the same cache entries.
+DEFAULT_CHART_PERIOD = "6mo"
+DEFAULT_WINDOW_SIZE = 5
+
+
+# Identity of a history frame in cache keys: a hit means the same bars
+def history_fingerprint(hist):
+    return hist.index[0], hist.index[-1], float(hist["Close"].iloc[-1]), len(hist)
+
+
+# Indicator features for a history, shared by every window size fitted on it
+def cached_features(symbol: str, hist, rate: float):
+    key = shared_cache.cache_key("features", (symbol.upper(), rate, *history_fingerprint(hist)), {})
+
+    def build_features():
+        with stage("features"):
+            return prediction_features(hist, rate)
+
+    return shared_cache.get_or_compute("features", key, config.CACHE_TTL_PREDICTION, build_features)
+
+
+# Fitted predictions keyed by the exact history they were trained on, so a hit
+# returns what the request would have computed
+def cached_prediction(symbol: str, hist, rate: float, windowSize: int):
+    key = shared_cache.cache_key("prediction", (symbol.upper(), windowSize, rate, *history_fingerprint(hist)), {})
+    return shared_cache.get_or_compute(
+        "prediction", key, config.CACHE_TTL_PREDICTION,
+        lambda: fit_prediction(symbol, cached_features(symbol, hist, rate), windowSize)
+    )
+
+
+def build_sentiment(symbol: str):
+    headlines = fetch_news_headlines(symbol)
+    score = analyze_sentiment(headlines)
+    return {
+        "symbol": symbol.upper(),
+        "sentiment_score": round(score, 3),
+        "status": (
+            "Positive" if score > 0.05 else
+            "Negative" if score < -0.05 else
+            "Neutral"
+        ),
+        "headlines": headlines
+    }
 
-        base_currency = info.get("currency", "USD")
-        current = convert_currency(info.get("currentPrice"),base_currency,target_currency)
-        previous = convert_currency(info.get("previousClose"),base_currency,target_currency)
-        # Return key stock details
-        return {
-            "symbol": symbol.upper(),
-            "current_price": current,
-            "previous_close": previous,
-            "day_change": round(current - previous, 2),
-            "day_change_percent": ((current - previous) / previous) * 100 if previous != 0 else 0,
-            "company_name": info.get("longName", "Unknown"),
-            "currency": target_currency
-        }
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"Error fetching data for {symbol}")
+
+# Validator for a history response: changes when a new bar arrives, the latest bar
+# updates intraday, or the requested shape or currency changes
+def history_etag(symbol: str, hist, rate: float, *params):
+    last = hist.iloc[-1]
+    key = f"{symbol.upper()}|{hist.index[-1].isoformat()}|{last['Close']}|{len(hist)}|{rate}|{params}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+
+# If-None-Match holds "*" or a comma-separated list of tags, compared weakly: proxies
+# that compress responses often hand the tag back with a W/ prefix
+def etag_matches(if_none_match: str | None, etag: str):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
 
 
 # Get OHLCV data for a stock over a given time period
-@app.get("/api/stock/{symbol}/history")
-def stock_history(symbol: str, period: str = Query('3mo'), target_currency: str = Query("USD")):
+@app.get("/api/stock/{symbol}/history", dependencies=[Depends(rate_limit("history"))], response_class=ORJSONResponse)
+def stock_history(
+    request: Request,
+    symbol: str,
+    period: str = Query('3mo'),
+    target_currency: str = Query("USD"),
+    max_points: int | None = Query(None, ge=10),  # Downsample long series for charting
+    downsample: str = Query("minmax", pattern="^(minmax|lttb)$")
+):
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        hist = ticker.history(period=period)
+        info = cached_info(symbol)
+        hist = cached_history(symbol, period)
 
         if hist.empty:
             raise HTTPException(status_code=404, detail=f"No historical data found for {symbol}")
 
-        # Convert historical OHLCV data into JSON-friendly format
-        history_data = []
         base_currency = info.get("currency", "USD")
         rate = get_conversion_rate(base_currency, target_currency)
 
-        for date, row in hist.iterrows():
-            # skip dividend-only rows
-            if pd.isna(row['Open']) or pd.isna(row['Close']):
-                continue
-
-            history_data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "open": clean_number(row['Open'] * rate),
-                "high": clean_number(row['High'] * rate),
-                "low": clean_number(row['Low'] * rate),
-                "close": clean_number(row['Close'] * rate),
-                "volume": int(row['Volume']) if not pd.isna(row['Volume']) else 0
-            })
-
-        return {
-            "symbol": symbol.upper(),
-            "period": period,
-            "data": history_data
+        # Repeat requests for unchanged data skip building and sending the payload
+        last_bar = hist.index[-1].tz_convert("UTC") if hist.index.tz is not None else hist.index[-1]
+        headers = {
+            "ETag": history_etag(symbol, hist, rate, period, target_currency, max_points, downsample),
+            "Last-Modified": last_bar.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+            "Cache-Control": "no-cache"
         }
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        return ORJSONResponse(build_history(symbol, period, hist, rate, max_points, downsample), headers=headers)
+    except UpstreamBusy:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching history for {symbol}")
 
 # Endpoint to provide next day's closing price prediction
-@app.get("/api/stock/{symbol}/predict")
-def predict_price(symbol: str, windowSize: int = Query(3), target_currency: str = Query("USD")):
-    ticker = yf.Ticker(symbol)
-    info = ticker.info
+@app.get("/api/stock/{symbol}/predict", dependencies=[Depends(rate_limit("predict"))])
+def predict_price(symbol: str, windowSize: int = Query(DEFAULT_WINDOW_SIZE), target_currency: str = Query("USD"), db: Session = Depends(get_db)):
+    # Served from the end-of-day batch when it covered the latest close (stored in USD)
+    if target_currency == "USD":
+        stored = eod.stored_prediction(db, symbol, windowSize)
+        if stored is not None:
+            return stored
+
+    info = cached_info(symbol)
 
-    hist = ticker.history(period='3mo')
+    hist = cached_history(symbol, '3mo')
 
     if hist.empty:
         raise HTTPException(status_code=404, detail=f"No historical data found for {symbol}")
 
-    history_data = []
     base_currency = info.get("currency", "USD")
     rate = get_conversion_rate(base_currency, target_currency)
+    return cached_prediction(symbol, hist, rate, windowSize)
 
-    for date, row in hist.iterrows():
-        history_data.append({
-            "date": date.strftime("%Y-%m-%d"),
-                "open": round(row['Open'] * rate, 2),
-                "high": round(row['High'] * rate, 2),
-                "low": round(row['Low'] * rate, 2),
-                "close": round(row['Close'] * rate, 2),
-                "volume": int(row['Volume'])
-        })
-
-    # Load data into DataFrame and enrich with technical indicators
-    df = pd.DataFrame(history_data)
-    df = add_technical_features(df)
-    df = df.dropna().reset_index(drop=True)  # Drop rows with NaNs caused by rolling indicators
+@app.get("/api/stock/{symbol}/sentiment", dependencies=[Depends(rate_limit("sentiment"))])
+def get_sentiment(symbol: str):
+    return build_sentiment(symbol)
 
-    # Select feature columns to train the model on
-    feature_cols = ["close", "SMA_5", "SMA_20", "RSI", "volume_ratio"]
-    x_values = []
-    y_values = []
 
-    # Construct input/output pairs using sliding window on technical features
-    for i in range(len(df) - windowSize):
-        window = df.iloc[i:i + windowSize][feature_cols].values.flatten()
-        target = df.iloc[i + windowSize]["close"]
-        x_values.append(window)
-        y_values.append(target)
+# Months of data behind each yfinance period, used to fetch one history that serves
+# both the chart and the 3-month prediction window
+PERIOD_MONTHS = {"1d": 0.05, "5d": 0.25, "1mo": 1, "3mo": 3, "6mo": 6, "1y": 12, "2y": 24, "5y": 60, "10y": 120}
+PREDICTION_MONTHS = 3
 
-    if len(x_values) == 0 or len(y_values) == 0:
-        raise HTTPException(status_code=400, detail="Not enough data for the given window size.")
 
-    # Train model using historical feature windows
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(x_values, y_values)
+# The last PREDICTION_MONTHS of a longer history, which the detail prediction is fitted on
+def prediction_window(hist):
+    import pandas as pd
+    return hist[hist.index > hist.index[-1] - pd.DateOffset(months=PREDICTION_MONTHS)]
 
-    # Predict next close based on most recent feature window
-    lastWindow = df.iloc[-windowSize:][feature_cols].values.flatten()
-    prediction = model.predict([lastWindow])
-    df[feature_cols] = df[feature_cols].round(2)
 
-    base_currency = info.get("currency", "USD")
+# Run one part of the detail page with its own timeout and status
+async def detail_section(func, *args, timeout: float):
+    try:
+        data = await asyncio.wait_for(run_in_threadpool(func, *args), timeout)
+        return {"status": "ok", "data": data}
+    except asyncio.TimeoutError:
+        return {"status": "timeout", "error": f"Timed out after {timeout}s"}
+    except HTTPException as e:
+        return {"status": "error", "error": e.detail}
+    except UpstreamBusy as e:
+        return {"status": "busy", "error": str(e)}
+    except Exception as e:
+        return {"status": "error", "error": str(e) or type(e).__name__}
+
+
+# Quote, history, prediction and sentiment in one response. ticker.info and the
+# history are fetched once and shared; each section reports its own status so a
+# slow or failing part does not hold back the rest.
+@app.get("/api/stock/{symbol}/detail", dependencies=[Depends(rate_limit("detail"))])
+async def stock_detail(
+    symbol: str,
+    period: str = Query(DEFAULT_CHART_PERIOD),
+    windowSize: int = Query(DEFAULT_WINDOW_SIZE),
+    target_currency: str = Query("USD"),
+    max_points: int | None = Query(None, ge=10),
+    timeout: float = Query(10.0, gt=0, le=60)
+):
+    import pandas as pd
+
+    # News does not depend on the ticker data, so start it straight away
+    sentiment = asyncio.create_task(detail_section(build_sentiment, symbol, timeout=timeout))
+
+    months = PERIOD_MONTHS.get(period)
+    fetch_period = "3mo" if months is not None and months < PREDICTION_MONTHS else period
+    info, hist = await asyncio.gather(
+        run_in_threadpool(cached_info, symbol),
+        run_in_threadpool(cached_history, symbol, fetch_period),
+        return_exceptions=True
+    )
+
+    for result in (info, hist):
+        if isinstance(result, UpstreamBusy):
+            raise result
+    if isinstance(info, Exception) or isinstance(hist, Exception) or hist.empty:
+        quote = history = prediction = {"status": "error", "error": f"No market data found for {symbol}"}
+        if not isinstance(info, Exception):
+            quote = await detail_section(build_quote, symbol, info, target_currency, timeout=timeout)
+    else:
+        rate = await run_in_threadpool(get_conversion_rate, info.get("currency", "USD"), target_currency)
+        last_bar = hist.index[-1]
+        chart_hist = hist if months is None or months >= PREDICTION_MONTHS else \
+            hist[hist.index > last_bar - pd.DateOffset(days=int(months * 31))]
+        model_hist = prediction_window(hist)
+
+        quote, history, prediction = await asyncio.gather(
+            detail_section(build_quote, symbol, info, target_currency, timeout=timeout),
+            detail_section(build_history, symbol, period, chart_hist, rate, max_points, timeout=timeout),
+            detail_section(cached_prediction, symbol, model_hist, rate, windowSize, timeout=timeout)
+        )
 
     return {
         "symbol": symbol.upper(),
-        "last_window": df.iloc[-windowSize:][feature_cols].to_dict(orient="records"),
-        "predicted_close_price": round(prediction[0], 2)
+        "quote": quote,
+        "history": history,
+        "prediction": prediction,
+        "sentiment": await sentiment
     }
 
-@app.get("/api/stock/{symbol}/sentiment")
-def get_sentiment(symbol: str):
-    headlines = fetch_news_headlines(symbol)
-    score = analyze_sentiment(headlines)
-    return {
-        "symbol": symbol.upper(),
-        "sentiment_score": round(score, 3),
-        "status": (
-            "Positive" if score > 0.05 else
-            "Negative" if score < -0.05 else
-            "Neutral"
-        ),
-        "headlines": headlines
-    }
 
+# Everything a default /detail view needs from upstream or the model: the quote,
+# the chart history, and the indicator features and prediction fitted on its last
+# three months
+def warm_symbol(symbol: str):
+    info = cached_info(symbol)
+    rate = get_conversion_rate(info.get("currency", "USD"), "USD")
+    hist = cached_history(symbol, DEFAULT_CHART_PERIOD)
+    if not hist.empty:
+        model_hist = prediction_window(hist)
+        cached_features(symbol, model_hist, rate)
+        cached_prediction(symbol, model_hist, rate, DEFAULT_WINDOW_SIZE)
+
+
+# Scheduled entry point: warm the most wanted symbols first, a few at a time. Only
+# the worker holding the host lock runs it, and its upstream calls take slots like
+# a user request's, so user requests are not starved.
+def prewarm_market_data():
+    if not host_lock("prewarm"):
+        return []
+    db = SessionLocal()
+    try:
+        symbols = [symbol for symbol, _ in watchlist.symbols_by_demand(db, config.PREWARM_MAX_SYMBOLS)]
+    finally:
+        db.close()
+
+    def warm(symbol):
+        try:
+            warm_symbol(symbol)
+        except UpstreamBusy:
+            print(f"Pre-warm skipped {symbol}: upstream busy")
+        except Exception as e:
+            print(f"Pre-warm error for {symbol}: {e}")
+
+    with ThreadPoolExecutor(max_workers=config.PREWARM_CONCURRENCY, thread_name_prefix="prewarm") as pool:
+        list(pool.map(warm, symbols))
+    return symbols
+
+
+# Interval runs only matter while prices move
+def prewarm_during_market_hours():
+    if eod.market_is_open():
+        prewarm_market_data()
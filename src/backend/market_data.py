@@ -0,0 +1,265 @@
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models
+from . import config
+from .metrics import stage
+from .ratelimit import UpstreamBusy, async_upstream_gate, upstream_gate
+from .shared_cache import cached
+from .utils import get_conversion_rate, convert_currency
+
+
+# Upstream calls go through these so they show up as request stages
+def ticker_info(ticker):
+    with stage("ticker.info"):
+        return ticker.info
+
+
+def ticker_history(ticker, **kwargs):
+    with stage("ticker.history"):
+        return ticker.history(**kwargs)
+
+
+# Cached upstream reads for the market data endpoints. Trades price off an
+# uncached live price (get_live_price).
+# yfinance answers unknown symbols and failures with a near-empty info dict or an
+# empty frame; caching those would hide the symbol until the entry expires
+def has_quote(info):
+    return bool(info) and "currentPrice" in info
+
+
+def has_rows(hist):
+    return not hist.empty
+
+
+@cached("info", config.CACHE_TTL_QUOTE, cache_if=has_quote)
+def _cached_info(symbol: str):
+    import yfinance as yf
+    with upstream_gate.slot():
+        return ticker_info(yf.Ticker(symbol))
+
+
+@cached("history", config.CACHE_TTL_HISTORY, cache_if=has_rows)
+def _cached_history(symbol: str, period: str):
+    import yfinance as yf
+    with upstream_gate.slot():
+        return ticker_history(yf.Ticker(symbol), period=period)
+
+
+# Symbols are case-insensitive upstream, so "aapl" and "AAPL" share cache entries
+def cached_info(symbol: str):
+    return _cached_info(symbol.upper())
+
+
+def cached_history(symbol: str, period: str):
+    return _cached_history(symbol.upper(), period)
+
+
+# Quote payload served by /api/stock/{symbol}, built from a ticker's info dict
+def build_quote(symbol: str, info: dict, target_currency: str = "USD"):
+    # Ensure the stock exists and has price data
+    if not info or 'currentPrice' not in info:
+        raise LookupError(f"Stock {symbol} not found")
+
+    base_currency = info.get("currency", "USD")
+    current = convert_currency(info.get("currentPrice"), base_currency, target_currency)
+    previous = convert_currency(info.get("previousClose"), base_currency, target_currency)
+    # Return key stock details
+    return {
+        "symbol": symbol.upper(),
+        "current_price": current,
+        "previous_close": previous,
+        "day_change": round(current - previous, 2),
+        "day_change_percent": ((current - previous) / previous) * 100 if previous != 0 else 0,
+        "company_name": info.get("longName", "Unknown"),
+        "currency": target_currency
+    }
+
+
+# Live price for trades, fetched on the event loop so a slow Yahoo answer holds a
+# coroutine rather than a threadpool thread. Tests and the offline benchmarks swap
+# the transport for a fake one.
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+upstream_transport = None
+
+
+async def get_live_price(symbol: str):
+    import httpx
+
+    async with async_upstream_gate.slot():
+        with stage("yahoo.chart"):
+            async with httpx.AsyncClient(transport=upstream_transport, timeout=10,
+                                         headers={"User-Agent": "Mozilla/5.0"}) as client:
+                response = await client.get(YAHOO_CHART_URL.format(symbol=symbol), params={"range": "1d", "interval": "1d"})
+    response.raise_for_status()
+    result = response.json()["chart"]["result"]
+    if not result or "regularMarketPrice" not in result[0]["meta"]:
+        raise LookupError(f"Stock {symbol} not found")
+
+    meta = result[0]["meta"]
+    price, currency = meta["regularMarketPrice"], meta.get("currency", "USD")
+    if currency != "USD":
+        # FX rates are cached for an hour, so this rarely leaves the process
+        price = await run_in_threadpool(convert_currency, price, currency, "USD")
+    return price
+
+
+# Cached bars older than this are refreshed before use (covers weekends and holidays)
+STALE_AFTER_DAYS = 4
+
+
+# Download daily bars for a symbol and store them in USD, replacing any overlapping rows
+def sync_daily_bars(db: Session, symbol: str, start: date | None = None, period: str = "1y"):
+    import pandas as pd
+    import yfinance as yf
+
+    symbol = symbol.upper()
+    ticker = yf.Ticker(symbol)
+    info = ticker_info(ticker)
+    hist = ticker_history(ticker, start=start) if start else ticker_history(ticker, period=period)
+    hist = hist.dropna(subset=["Open", "Close"])
+    if hist.empty:
+        return 0
+
+    rate = get_conversion_rate(info.get("currency", "USD"), "USD")
+    bars = pd.DataFrame({
+        "symbol": symbol,
+        "date": hist.index.date,
+        "open": hist["Open"].to_numpy() * rate,
+        "high": hist["High"].to_numpy() * rate,
+        "low": hist["Low"].to_numpy() * rate,
+        "close": hist["Close"].to_numpy() * rate,
+        "volume": hist["Volume"].fillna(0).to_numpy(dtype=float)
+    })
+
+    db.query(models.PriceBar).filter(
+        models.PriceBar.symbol == symbol,
+        models.PriceBar.date >= bars["date"].iloc[0]
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(models.PriceBar, bars.to_dict(orient="records"))
+
+    # Remember how far back we asked, so a shorter upstream history counts as covered
+    requested_start = start if start is not None else bars["date"].iloc[0]
+    record = db.get(models.BarSync, symbol)
+    if record is None:
+        db.add(models.BarSync(symbol=symbol, requested_start=requested_start, synced_at=datetime.utcnow()))
+    else:
+        record.requested_start = min(record.requested_start, requested_start)
+        record.synced_at = datetime.utcnow()
+    db.commit()
+    return len(bars)
+
+
+# Symbols whose cached bars do not reach back to `start` or have gone stale
+def stale_symbols(db: Session, symbols, start: date | None = None):
+    rows = db.query(
+        models.PriceBar.symbol, func.min(models.PriceBar.date), func.max(models.PriceBar.date)
+    ).filter(models.PriceBar.symbol.in_(symbols)).group_by(models.PriceBar.symbol).all()
+    coverage = {symbol: (first, last) for symbol, first, last in rows}
+    requested = dict(db.query(models.BarSync.symbol, models.BarSync.requested_start).filter(
+        models.BarSync.symbol.in_(symbols)
+    ).all())
+
+    slack = timedelta(days=STALE_AFTER_DAYS)
+    cutoff = date.today() - slack
+
+    stale = []
+    for symbol in symbols:
+        first, last = coverage.get(symbol, (None, None))
+        if first is None or last < cutoff:
+            stale.append(symbol)
+        # Bars start late: only stale if we never asked upstream for data that far back
+        elif start is not None and first > start + slack and requested.get(symbol, date.max) > start:
+            stale.append(symbol)
+    return stale
+
+
+# Symbols whose last sync failed or returned no bars, skipped until the entry expires
+_failed_syncs = TTLCache(maxsize=10000, ttl=config.SYNC_FAILURE_TTL_SECONDS)
+
+
+# Make sure every symbol has fresh cached bars, syncing only the ones that need it.
+# max_syncs caps the upstream downloads per call; with a gate, each sync holds an
+# upstream slot and syncing stops at the first one that cannot be had.
+def ensure_daily_bars(db: Session, symbols, start: date | None = None, max_syncs: int | None = None, gate=None):
+    pending = [symbol for symbol in stale_symbols(db, symbols, start) if symbol not in _failed_syncs]
+    for symbol in pending[:max_syncs]:
+        try:
+            with gate.slot() if gate is not None else nullcontext():
+                synced = sync_daily_bars(db, symbol, start=start)
+        except UpstreamBusy:
+            break
+        except Exception as e:
+            db.rollback()
+            print(f"Bar sync error for {symbol}: {e}")
+            synced = 0
+        if synced == 0:
+            _failed_syncs[symbol] = True
+
+
+# Load cached bars as dates x symbols panels, one per field (close, volume, ...), in one query
+def load_panels(db: Session, symbols, fields=("close",), start: date | None = None):
+    import pandas as pd
+
+    columns = [getattr(models.PriceBar, field) for field in fields]
+    query = db.query(models.PriceBar.date, models.PriceBar.symbol, *columns).filter(
+        models.PriceBar.symbol.in_(symbols)
+    )
+    if start is not None:
+        query = query.filter(models.PriceBar.date >= start)
+
+    rows = pd.DataFrame(query.all(), columns=["date", "symbol", *fields])
+    if rows.empty:
+        return {field: pd.DataFrame(columns=list(symbols), dtype=float) for field in fields}
+
+    rows["date"] = pd.to_datetime(rows["date"])
+    return {
+        field: rows.pivot(index="date", columns="symbol", values=field).sort_index().reindex(columns=list(symbols))
+        for field in fields
+    }
+
+
+def load_panel(db: Session, symbols, field: str = "close", start: date | None = None):
+    return load_panels(db, symbols, (field,), start)[field]
+
+
+# Listing currency per symbol; it never changes, so it is looked up once per process
+_currency_cache = {}
+
+
+def symbol_currency(symbol: str):
+    import yfinance as yf
+
+    if symbol not in _currency_cache:
+        try:
+            _currency_cache[symbol] = ticker_info(yf.Ticker(symbol)).get("currency", "USD")
+        except Exception:
+            return "USD"
+    return _currency_cache[symbol]
+
+
+# Latest USD price for many symbols using one batched download
+def fetch_latest_prices(symbols):
+    import pandas as pd
+    import yfinance as yf
+
+    symbols = sorted(set(symbols))
+    if not symbols:
+        return {}
+
+    with stage("yf.download"):
+        data = yf.download(symbols, period="5d", interval="1d", progress=False, auto_adjust=False, threads=True)
+    if data is None or data.empty:
+        return {}
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+    last = closes.ffill().iloc[-1].dropna()
+
+    # One FX lookup per distinct currency rather than per symbol
+    currencies = {symbol: symbol_currency(symbol) for symbol in last.index}
+    rates = {currency: get_conversion_rate(currency, "USD") for currency in set(currencies.values())}
+    return {symbol: round(float(price) * rates[currencies[symbol]], 2) for symbol, price in last.items()}
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import time
+from fastapi import APIRouter, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from . import config
+
+router = APIRouter()
+
+REQUEST_SECONDS = Histogram(
+    "api_request_seconds", "Request latency by route", ["route", "method"]
+)
+STAGE_SECONDS = Histogram(
+    "api_request_stage_seconds", "Time spent per request stage by route", ["route", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+EOD_STAGE_SECONDS = Gauge(
+    "eod_pipeline_stage_seconds", "Duration of each stage of the last end-of-day batch run", ["stage"]
+)
+
+# Seconds per stage for the request being handled. Threadpool work copies the
+# context, so stages timed on worker threads land in the same dict.
+_request_stages: ContextVar[dict | None] = ContextVar("request_stages", default=None)
+
+
+def record_stage(name: str, seconds: float):
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+# Time a block as part of the current request; a no-op outside a request
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def timed(name: str):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Every statement on any engine (sync, async, tests) counts towards the "db" stage
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_stage("db", time.perf_counter() - conn.info["query_started"].pop())
+
+
+# A failed statement never reaches after_cursor_execute; its start time is popped
+# here so the next query on the pooled connection is not timed from the wrong start
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        record_stage("db", time.perf_counter() - conn.info["query_started"].pop())
+
+
+def server_timing(stages: dict, total: float):
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+async def timing_middleware(request: Request, call_next):
+    stages = {}
+    token = _request_stages.set(stages)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _request_stages.reset(token)
+    total = time.perf_counter() - started
+
+    # Label by route template, not raw path, to keep the series count bounded
+    route = request.scope.get("route")
+    label = route.path if route is not None else "unmatched"
+    REQUEST_SECONDS.labels(label, request.method).observe(total)
+    for name, seconds in stages.items():
+        STAGE_SECONDS.labels(label, name).observe(seconds)
+
+    if config.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing(stages, total)
+    return response
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
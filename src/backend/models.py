@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -10,10 +10,12 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     balance = Column(Float, default=100000.0)
+    realized_pnl = Column(Float, default=0.0)  # Running total, updated on each sell
 
     # Relationships
     holdings = relationship("Holding", back_populates="user")
     transactions = relationship("Transaction", back_populates="user")
+    tax_lots = relationship("TaxLot", back_populates="user")
 
 
 class Holding(Base):
@@ -27,6 +29,9 @@ class Holding(Base):
 
     user = relationship("User", back_populates="holdings")
 
+    # symbol -> users index, used to find the accounts affected by a price tick
+    __table_args__ = (Index("ix_holdings_symbol_user", "symbol", "user_id"),)
+
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -41,3 +46,79 @@ class Transaction(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="transactions")
+
+
+class TaxLot(Base):
+    __tablename__ = "tax_lots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    symbol = Column(String, nullable=False)
+    quantity = Column(Float, nullable=False)  # Shares still open in this lot
+    price = Column(Float, nullable=False)
+    opened_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User", back_populates="tax_lots")
+
+    # Open lots are always looked up per user and symbol in FIFO order
+    __table_args__ = (Index("ix_tax_lots_user_symbol", "user_id", "symbol", "opened_at"),)
+
+
+class PriceBar(Base):
+    __tablename__ = "price_bars"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    # OHLC converted to USD when synced, matching the prices trades are booked at
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (UniqueConstraint("symbol", "date", name="uq_price_bars_symbol_date"),)
+
+
+# Earliest start each symbol's bars were requested from. A symbol whose first bar
+# comes after that (a recent listing) is covered, not stale.
+class BarSync(Base):
+    __tablename__ = "bar_syncs"
+
+    symbol = Column(String, primary_key=True)
+    requested_start = Column(Date, nullable=False)
+    synced_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PortfolioSnapshot(Base):
+    __tablename__ = "portfolio_snapshots"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    payload = Column(Text, nullable=False)  # JSON body served by GET /portfolio/
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class WatchlistItem(Base):
+    __tablename__ = "watchlist_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    symbol = Column(String, nullable=False)
+    added_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # One row per user and symbol; symbol -> users for ranking symbols by demand
+    __table_args__ = (
+        UniqueConstraint("user_id", "symbol", name="uq_watchlist_user_symbol"),
+        Index("ix_watchlist_symbol_user", "symbol", "user_id"),
+    )
+
+
+# Next-day prediction from the end-of-day batch, one row per symbol and window size
+class Prediction(Base):
+    __tablename__ = "predictions"
+
+    symbol = Column(String, primary_key=True)
+    window_size = Column(Integer, primary_key=True)
+    as_of = Column(Date, nullable=False)  # Last bar the model was trained on
+    payload = Column(Text, nullable=False)  # JSON body served by GET /api/stock/{symbol}/predict
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
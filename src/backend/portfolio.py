@@ -1,76 +1,115 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .auth import get_current_user
-from .database import get_db
+from .database import get_db, get_async_db
 from . import models
 from pydantic import BaseModel
 from fastapi import Query
-import requests
+from .analytics import compute_equity_curve, portfolio_risk, return_covariance
+from datetime import date, timedelta
+from .market_data import ensure_daily_bars, get_live_price, load_panel
+from .ratelimit import UpstreamBusy, upstream_unavailable
+from .snapshots import refresh_snapshot
+from .user_cache import user_cache
+import asyncio
+import json
+import numpy as np
 
 router = APIRouter()
 
+# Lots with less than this many shares left are treated as closed
+LOT_EPSILON = 1e-9
+
+# Market index used for portfolio beta
+BENCHMARK_SYMBOL = "SPY"
+
 # Pydantic model for request validation
 class StockQuantity(BaseModel):
     ticker: str
     quantity: float
 
-@router.get("/")
-def show_portfolio(db: Session = Depends(get_db), user = Depends(get_current_user)):
-    # Fetch all holdings for the authenticated user
-    holdings = db.query(models.Holding).filter(models.Holding.user_id == user.id).all()
+# Current market price for a symbol, or None if the symbol has no quote. The price
+# is fetched in-process rather than through our own HTTP API, so it is not charged
+# to the loopback client's rate limit, and on the event loop, so slow upstream
+# pricing does not tie up the threadpool that sync routes run on. Raises
+# UpstreamBusy when no upstream slot is free.
+async def fetch_quote_price(symbol: str):
+    try:
+        return round(await get_live_price(symbol), 2)
+    except UpstreamBusy:
+        raise
+    except Exception:
+        return None
+
+
+# Current prices for several symbols, fetched concurrently
+async def fetch_quote_prices(symbols):
+    symbols = sorted(set(symbols))
+    prices = await asyncio.gather(*(fetch_quote_price(symbol) for symbol in symbols))
+    return dict(zip(symbols, prices))
+
+
+# Consume open lots oldest-first and return the realised P&L of the sale.
+# Shares not covered by lots (holdings init_db has not backfilled yet)
+# are costed at the holding's average price.
+def close_lots_fifo(db: Session, user_id: int, symbol: str, quantity: float, price: float, fallback_cost: float):
+    lots = db.query(models.TaxLot).filter(
+        models.TaxLot.user_id == user_id,
+        models.TaxLot.symbol == symbol
+    ).order_by(models.TaxLot.opened_at, models.TaxLot.id).all()
+
+    remaining = quantity
+    realised = 0.0
+    for lot in lots:
+        if remaining <= LOT_EPSILON:
+            break
+        used = min(lot.quantity, remaining)
+        realised += (price - lot.price) * used
+        remaining -= used
+        lot.quantity -= used
+        if lot.quantity <= LOT_EPSILON:
+            db.delete(lot)
+
+    if remaining > LOT_EPSILON:
+        realised += (price - fallback_cost) * remaining
+
+    return realised
 
-    portfolio_holdings = []
-    total_market_value = 0.0
-    total_cost_basis = 0.0
 
-    for holding in holdings:
+@router.get("/")
+async def show_portfolio(
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    refresh: bool = Query(False)  # Reprice every holding live instead of serving the snapshot
+):
+    snapshot = await db.get(models.PortfolioSnapshot, user.id)
+
+    if snapshot is None or refresh:
         # Get current market price for each holding to calculate real-time value
+        result = await db.execute(select(models.Holding).where(models.Holding.user_id == user.id))
+        holdings = result.scalars().all()
         try:
-            resp = requests.get(f"http://localhost:8000/api/stock/{holding.symbol}")
-            if resp.status_code == 200:
-                current_price = round(resp.json()["current_price"], 2)
-            else:
-                # Fallback to average purchase price if live data unavailable
-                current_price = holding.avg_price
-        except:
-            current_price = holding.avg_price
-
-        # Calculate P&L metrics
-        market_value = round(current_price * holding.quantity, 2)
-        cost_basis = round(holding.avg_price * holding.quantity, 2)
-        unrealised_pnl = round(market_value - cost_basis, 2)
-
-        total_market_value += market_value
-        total_cost_basis += cost_basis
-
-        portfolio_holdings.append({
-            "symbol": holding.symbol,
-            "quantity": holding.quantity,
-            "avg_price": holding.avg_price,
-            "current_price": current_price,
-            "market_value": market_value,
-            "cost_basis": cost_basis,
-            "unrealised_pnl": unrealised_pnl,
-            "pnl_percentage": round((unrealised_pnl / cost_basis * 100), 2) if cost_basis > 0 else 0
-        })
+            live_prices = await fetch_quote_prices(h.symbol for h in holdings)
+        except UpstreamBusy:
+            raise upstream_unavailable()
+        # Only live prices are stored; unpriced symbols keep their last snapshot price
+        prices = {symbol: price for symbol, price in live_prices.items() if price is not None}
 
-    # Calculate portfolio-level metrics
-    total_unrealised_pnl = round(total_market_value - total_cost_basis, 2)
-    total_portfolio_value = round(user.balance + total_market_value, 2)
+        snapshot = await db.run_sync(lambda session: refresh_snapshot(session, user, prices))
+        await db.commit()
 
-    return {
-        "user": user.email,
-        "cash_balance": round(user.balance, 2),
-        "holdings_market_value": round(total_market_value, 2),
-        "total_portfolio_value": total_portfolio_value,
-        "total_unrealised_pnl": total_unrealised_pnl,
-        "pnl_percentage": round((total_unrealised_pnl / total_cost_basis * 100), 2) if total_cost_basis > 0 else 0,
-        "holdings": portfolio_holdings
-    }
+    # Trades and price ticks keep the snapshot current, so a read is a single row fetch
+    payload = json.loads(snapshot.payload)
+    payload["as_of"] = snapshot.updated_at.isoformat()
+    payload["snapshot_age_seconds"] = round((datetime.utcnow() - snapshot.updated_at).total_seconds(), 1)
+    return payload
 
 @router.post("/buy")
-def buy_stock(shares: StockQuantity, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def buy_stock(shares: StockQuantity, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     ticker = shares.ticker.upper()
     quantity = shares.quantity
 
@@ -78,22 +117,32 @@ def buy_stock(shares: StockQuantity, db: Session = Depends(get_db), user=Depends
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
 
     # Validate ticker exists and get current price
-    resp = requests.get(f"http://localhost:8000/api/stock/{ticker}")
-    if resp.status_code != 200:
+    try:
+        ticker_price = await fetch_quote_price(ticker)
+    except UpstreamBusy:
+        raise upstream_unavailable()
+    if ticker_price is None:
         raise HTTPException(status_code=404, detail="Invalid ticker")
 
-    ticker_price = round(resp.json()["current_price"], 2)
     total_price = round(ticker_price * quantity, 2)
 
-    # Check user has sufficient funds
-    if user.balance < total_price:
+    # Debit the cash in one conditional UPDATE, so concurrent buys cannot both spend
+    # the same balance. It also locks the user's row until commit, which keeps this
+    # account's other trades out of the holding and lot updates below.
+    debited = await db.execute(
+        update(models.User)
+        .where(models.User.id == user.id, models.User.balance >= total_price)
+        .values(balance=models.User.balance - total_price)
+    )
+    if debited.rowcount == 0:
         raise HTTPException(status_code=400, detail="Insufficient balance")
 
     # Check if user already holds this stock
-    holding = db.query(models.Holding).filter(
+    result = await db.execute(select(models.Holding).where(
         models.Holding.user_id == user.id,
         models.Holding.symbol == ticker
-    ).first()
+    ))
+    holding = result.scalars().first()
 
     if holding:
         # Update existing holding: recalculate average price using weighted average
@@ -112,8 +161,14 @@ def buy_stock(shares: StockQuantity, db: Session = Depends(get_db), user=Depends
         )
         db.add(holding)
 
-    # Deduct cost from user balance
-    user.balance -= total_price
+    # Open a new tax lot for this purchase
+    db.add(models.TaxLot(
+        user_id=user.id,
+        symbol=ticker,
+        quantity=quantity,
+        price=ticker_price,
+        opened_at=datetime.utcnow()
+    ))
 
     # Record transaction for audit trail
     transaction = models.Transaction(
@@ -127,20 +182,24 @@ def buy_stock(shares: StockQuantity, db: Session = Depends(get_db), user=Depends
     )
     db.add(transaction)
 
-    db.commit()
-    db.refresh(holding)
-    db.refresh(transaction)
+    await db.run_sync(lambda session: refresh_snapshot(session, user, {ticker: ticker_price}))
+    balance = await db.scalar(select(models.User.balance).where(models.User.id == user.id))
+    await db.commit()
+    # Balance changed, so cached copies of this user are now stale
+    user_cache.invalidate(user.id)
+    await db.refresh(holding)
+    await db.refresh(transaction)
 
     return {
         "message": f"Bought {quantity} shares of {ticker} at {ticker_price:.2f}",
         "user": user.email,
-        "balance": round(user.balance, 2),
+        "balance": round(balance, 2),
         "timestamp": transaction.timestamp.isoformat()
     }
 
 
 @router.post("/sell")
-def sell_stock(shares: StockQuantity, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def sell_stock(shares: StockQuantity, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     ticker = shares.ticker.upper()
     quantity = shares.quantity
 
@@ -148,78 +207,103 @@ def sell_stock(shares: StockQuantity, db: Session = Depends(get_db), user=Depend
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
 
     # Verify user owns this stock
-    holding = db.query(models.Holding).filter(
+    result = await db.execute(select(models.Holding).where(
         models.Holding.user_id == user.id,
         models.Holding.symbol == ticker
-    ).first()
+    ))
+    holding = result.scalars().first()
+    if holding is None:
+        raise HTTPException(status_code=400, detail="No holding of this stock exists")
 
-    if holding:
-        # Prevent short selling - can't sell more than owned
-        if quantity > holding.quantity:
-            raise HTTPException(status_code=400, detail="Cannot sell more shares than you currently hold")
-
-        # Get current market price
-        resp = requests.get(f"http://localhost:8000/api/stock/{ticker}")
-        if resp.status_code != 200:
-            raise HTTPException(status_code=404, detail="Invalid ticker")
-
-        ticker_price = round(resp.json()["current_price"], 2)
-        total_price = round(ticker_price * quantity, 2)
-
-        # Credit proceeds to user balance
-        user.balance += total_price
-
-        # Remove holding entirely if selling all shares, otherwise reduce quantity
-        if quantity == holding.quantity:
-            db.delete(holding)
-        else:
-            holding.quantity -= quantity
-            db.add(holding)
-
-        # Record transaction
-        transaction = models.Transaction(
-            user_id=user.id,
-            symbol=ticker,
-            trade_type="SELL",
-            quantity=quantity,
-            price=ticker_price,
-            amount=total_price,
-            timestamp=datetime.utcnow()
-        )
+    # Prevent short selling - can't sell more than owned
+    if quantity > holding.quantity:
+        raise HTTPException(status_code=400, detail="Cannot sell more shares than you currently hold")
+
+    # Get current market price
+    try:
+        ticker_price = await fetch_quote_price(ticker)
+    except UpstreamBusy:
+        raise upstream_unavailable()
+    if ticker_price is None:
+        raise HTTPException(status_code=404, detail="Invalid ticker")
 
-        db.add(transaction)
-        db.commit()
-        db.refresh(transaction)
+    total_price = round(ticker_price * quantity, 2)
 
-        return {
-            "message": f"Sold {quantity} shares of {ticker} at {ticker_price:.2f}",
-            "user": user.email,
-            "balance": user.balance,
-            "timestamp": transaction.timestamp.isoformat()
-        }
+    # Credit the proceeds first: the UPDATE locks the user's row until commit, so the
+    # holding re-read below cannot change under this sale
+    await db.execute(
+        update(models.User).where(models.User.id == user.id).values(balance=models.User.balance + total_price)
+    )
+    result = await db.execute(select(models.Holding).where(
+        models.Holding.user_id == user.id,
+        models.Holding.symbol == ticker
+    ).execution_options(populate_existing=True))
+    holding = result.scalars().first()
+    if holding is None or quantity > holding.quantity:
+        raise HTTPException(status_code=400, detail="Cannot sell more shares than you currently hold")
+
+    # Close lots FIFO and book the realised P&L
+    realised_pnl = await db.run_sync(
+        lambda session: close_lots_fifo(session, user.id, ticker, quantity, ticker_price, holding.avg_price)
+    )
+    await db.execute(
+        update(models.User).where(models.User.id == user.id)
+        .values(realized_pnl=func.coalesce(models.User.realized_pnl, 0.0) + realised_pnl)
+    )
 
+    # Remove holding entirely if selling all shares, otherwise reduce quantity
+    if quantity == holding.quantity:
+        await db.delete(holding)
     else:
-        raise HTTPException(status_code=400, detail="No holding of this stock exists")
+        holding.quantity -= quantity
+        db.add(holding)
 
+    # Record transaction
+    transaction = models.Transaction(
+        user_id=user.id,
+        symbol=ticker,
+        trade_type="SELL",
+        quantity=quantity,
+        price=ticker_price,
+        amount=total_price,
+        timestamp=datetime.utcnow()
+    )
 
-@router.get("/transactions")
-def show_transactions(
-    db: Session = Depends(get_db),
+    db.add(transaction)
+    await db.run_sync(lambda session: refresh_snapshot(session, user, {ticker: ticker_price}))
+    balance = await db.scalar(select(models.User.balance).where(models.User.id == user.id))
+    await db.commit()
+    user_cache.invalidate(user.id)
+    await db.refresh(transaction)
+
+    return {
+        "message": f"Sold {quantity} shares of {ticker} at {ticker_price:.2f}",
+        "user": user.email,
+        "balance": balance,
+        "realised_pnl": round(realised_pnl, 2),
+        "timestamp": transaction.timestamp.isoformat()
+    }
+
+
+@router.get("/transactions", response_class=ORJSONResponse)
+async def show_transactions(
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user),
     limit: int = Query(50, ge=1, le=100),  # Pagination: default 50, max 100 transactions
     offset: int = 0
 ):
     # Fetch transaction history with pagination
-    query = db.query(models.Transaction).filter(models.Transaction.user_id == user.id)
-    total = query.count()
-    transactions = (
-        query.order_by(models.Transaction.timestamp.desc())  # Most recent first
+    condition = models.Transaction.user_id == user.id
+    total = await db.scalar(select(func.count()).select_from(models.Transaction).where(condition))
+    result = await db.execute(
+        select(models.Transaction).where(condition)
+        .order_by(models.Transaction.timestamp.desc())  # Most recent first
         .offset(offset)
         .limit(limit)
-        .all()
     )
+    transactions = result.scalars().all()
 
-    return {
+    return ORJSONResponse({
         "total": total,
         "transactions": [
             {
@@ -231,4 +315,162 @@ def show_transactions(
                 "timestamp": t.timestamp.isoformat()
             } for t in transactions
         ]
-    }
\ No newline at end of file
+    })
+
+
+@router.get("/lots")
+async def show_lots(db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    # Open tax lots, oldest first within each symbol
+    result = await db.execute(select(models.TaxLot).where(models.TaxLot.user_id == user.id).order_by(
+        models.TaxLot.symbol, models.TaxLot.opened_at, models.TaxLot.id
+    ))
+    lots = result.scalars().all()
+
+    return {
+        "lots": [
+            {
+                "symbol": lot.symbol,
+                "quantity": lot.quantity,
+                "price": lot.price,
+                "cost_basis": round(lot.price * lot.quantity, 2),
+                "opened_at": lot.opened_at.isoformat()
+            } for lot in lots
+        ]
+    }
+
+
+@router.get("/pnl")
+async def show_pnl(db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    # Realised P&L is kept as a running total; unrealised P&L only needs the open lots
+    result = await db.execute(select(models.TaxLot).where(models.TaxLot.user_id == user.id))
+    lots = result.scalars().all()
+
+    by_symbol = {}
+    for lot in lots:
+        entry = by_symbol.setdefault(lot.symbol, {"quantity": 0.0, "cost_basis": 0.0})
+        entry["quantity"] += lot.quantity
+        entry["cost_basis"] += lot.price * lot.quantity
+
+    try:
+        live_prices = await fetch_quote_prices(by_symbol)
+    except UpstreamBusy:
+        raise upstream_unavailable()
+    positions = []
+    total_unrealised_pnl = 0.0
+    for symbol, entry in sorted(by_symbol.items()):
+        current_price = live_prices.get(symbol)
+        if current_price is None:
+            current_price = entry["cost_basis"] / entry["quantity"]
+        unrealised_pnl = current_price * entry["quantity"] - entry["cost_basis"]
+        total_unrealised_pnl += unrealised_pnl
+
+        positions.append({
+            "symbol": symbol,
+            "quantity": entry["quantity"],
+            "cost_basis": round(entry["cost_basis"], 2),
+            "current_price": current_price,
+            "unrealised_pnl": round(unrealised_pnl, 2)
+        })
+
+    return {
+        "realised_pnl": round(user.realized_pnl or 0.0, 2),
+        "unrealised_pnl": round(total_unrealised_pnl, 2),
+        "positions": positions
+    }
+
+
+# Sync route on purpose: bar syncs and the pandas work run in the threadpool, not on the event loop
+@router.get("/equity-curve")
+def equity_curve(db: Session = Depends(get_db), user=Depends(get_current_user)):
+    import pandas as pd
+
+    rows = db.query(
+        models.Transaction.timestamp,
+        models.Transaction.symbol,
+        models.Transaction.trade_type,
+        models.Transaction.quantity,
+        models.Transaction.price,
+        models.Transaction.amount
+    ).filter(models.Transaction.user_id == user.id).all()
+
+    if not rows:
+        return {"start": None, "end": None, "points": []}
+
+    transactions = pd.DataFrame(rows, columns=["timestamp", "symbol", "trade_type", "quantity", "price", "amount"])
+    symbols = sorted(transactions["symbol"].unique())
+    start = transactions["timestamp"].min().date()
+
+    # Value positions against locally cached closes, syncing only missing or stale symbols
+    ensure_daily_bars(db, symbols, start=start)
+    closes = load_panel(db, symbols, "close", start=start)
+    curve = compute_equity_curve(transactions, closes, user.balance)
+
+    return {
+        "start": curve.index[0].strftime("%Y-%m-%d"),
+        "end": curve.index[-1].strftime("%Y-%m-%d"),
+        "points": [
+            {
+                "date": day.strftime("%Y-%m-%d"),
+                "cash": round(cash, 2),
+                "holdings_value": round(holdings_value, 2),
+                "total_value": round(total_value, 2)
+            } for day, cash, holdings_value, total_value in zip(
+                curve.index, curve["cash"], curve["holdings_value"], curve["total_value"]
+            )
+        ]
+    }
+
+
+# Sync route, like the equity curve
+@router.get("/risk")
+def portfolio_risk_metrics(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    confidence: float = Query(0.95, gt=0.5, lt=1.0),
+    lookback_days: int = Query(252, ge=20, le=1260)
+):
+    holdings = db.query(models.Holding).filter(models.Holding.user_id == user.id).all()
+    quantities = {}
+    for holding in holdings:
+        quantities[holding.symbol] = quantities.get(holding.symbol, 0.0) + holding.quantity
+
+    if not quantities:
+        raise HTTPException(status_code=400, detail="No holdings to analyse")
+
+    # Benchmark goes last so it can be split off from the position columns
+    symbols = sorted(quantities)
+    universe = [s for s in symbols if s != BENCHMARK_SYMBOL] + [BENCHMARK_SYMBOL]
+    start = date.today() - timedelta(days=int(lookback_days * 1.5) + 10)
+    ensure_daily_bars(db, universe, start=start)
+    closes = load_panel(db, universe, "close", start=start)
+
+    missing = [s for s in universe if s not in closes.columns or closes[s].isna().all()]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No price history for {', '.join(missing)}")
+
+    try:
+        returns, cov = return_covariance(closes, lookback_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    last_close = closes.ffill().iloc[-1]
+    values = np.array([quantities.get(s, 0.0) * last_close[s] for s in universe])
+    portfolio_value = float(values.sum())
+    weights = values / portfolio_value
+
+    metrics = portfolio_risk(returns, cov, weights, len(universe) - 1, portfolio_value, confidence)
+    positions = [i for i, s in enumerate(universe) if s in quantities]
+    correlation = metrics["correlation"][np.ix_(positions, positions)]
+
+    return {
+        "symbols": [universe[i] for i in positions],
+        "benchmark": BENCHMARK_SYMBOL,
+        "portfolio_value": round(portfolio_value, 2),
+        "confidence": confidence,
+        "daily_volatility": round(metrics["daily_volatility"], 6),
+        "annual_volatility": round(metrics["annual_volatility"], 6),
+        "beta": round(metrics["beta"], 4),
+        "historical_var": round(metrics["historical_var"], 2),
+        "parametric_var": round(metrics["parametric_var"], 2),
+        "correlation": np.round(correlation, 4).tolist()
+    }
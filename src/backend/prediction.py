@@ -0,0 +1,75 @@
+from fastapi import HTTPException
+import numpy as np
+from .metrics import stage
+from .utils import add_technical_features
+
+# Kept free of the API app so batch worker processes can import it cheaply
+
+# Feature columns the model is trained on, per day in the sliding window
+FEATURE_COLS = ["close", "SMA_5", "SMA_20", "RSI", "volume_ratio"]
+
+
+# Daily bars (yfinance column names) converted at `rate`, enriched with technical
+# indicators; rows still inside the rolling indicator windows are dropped
+def prediction_features(hist, rate: float):
+    import pandas as pd
+
+    df = pd.DataFrame({
+        "date": hist.index.strftime("%Y-%m-%d"),
+        "open": np.round(hist["Open"].to_numpy(dtype=float) * rate, 2),
+        "high": np.round(hist["High"].to_numpy(dtype=float) * rate, 2),
+        "low": np.round(hist["Low"].to_numpy(dtype=float) * rate, 2),
+        "close": np.round(hist["Close"].to_numpy(dtype=float) * rate, 2),
+        "volume": hist["Volume"].to_numpy(dtype=float).astype(np.int64)
+    })
+    df = add_technical_features(df)
+    return df.dropna().reset_index(drop=True)
+
+
+# Input/output pairs: each window of `windowSize` days of features predicts the next close
+def training_windows(df, windowSize: int):
+    values = df[FEATURE_COLS].to_numpy()
+    if len(values) <= windowSize:
+        return np.empty((0, windowSize * len(FEATURE_COLS))), np.empty(0)
+    windows = np.lib.stride_tricks.sliding_window_view(values, windowSize, axis=0)
+    x_values = windows.transpose(0, 2, 1).reshape(len(windows), -1)[:-1]
+    y_values = values[windowSize:, 0]
+    return x_values, y_values
+
+
+# Train on the feature frame and predict the close after its last row
+def fit_prediction(symbol: str, df, windowSize: int):
+    from sklearn.ensemble import RandomForestRegressor
+
+    x_values, y_values = training_windows(df, windowSize)
+    if len(x_values) == 0 or len(y_values) == 0:
+        raise HTTPException(status_code=400, detail="Not enough data for the given window size.")
+
+    # Train model using historical feature windows
+    with stage("model.fit"):
+        model = RandomForestRegressor(n_estimators=100, random_state=42)
+        model.fit(x_values, y_values)
+
+    # Predict next close based on most recent feature window
+    lastWindow = df.iloc[-windowSize:][FEATURE_COLS].values.flatten()
+    prediction = model.predict([lastWindow])
+    last_window = df.iloc[-windowSize:][FEATURE_COLS].round(2)
+
+    return {
+        "symbol": symbol.upper(),
+        "last_window": last_window.to_dict(orient="records"),
+        "predicted_close_price": round(prediction[0], 2)
+    }
+
+
+# Process pool entry point for the end-of-day batch: (symbol, features, windowSize)
+# -> (symbol, windowSize, payload, error). Errors come back as text rather than
+# exceptions so one bad symbol cannot fail the batch.
+def predict_from_features(task):
+    symbol, df, windowSize = task
+    try:
+        return symbol, windowSize, fit_prediction(symbol, df, windowSize), None
+    except HTTPException as e:
+        return symbol, windowSize, None, e.detail
+    except Exception as e:
+        return symbol, windowSize, None, str(e) or type(e).__name__
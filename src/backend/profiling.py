@@ -0,0 +1,238 @@
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from itertools import count
+from threading import Event, Lock, Thread, get_ident
+import asyncio
+import hmac
+import os
+import sys
+import time
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from . import config
+
+PROFILE_HEADER = "X-Profile"
+
+# Frames where a thread sits idle (event loop select, pool workers waiting for
+# work); samples ending in one of these are dropped
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"), ("queue.py", "get"), ("thread.py", "_worker")
+}
+
+
+# Profiler of the request being served. Tasks and threadpool calls get a copy of
+# the request's context, so the value follows the request wherever it runs and
+# each piece of work can register itself with the profiler.
+_current_profiler = ContextVar("current_profiler", default=None)
+
+
+# Tasks created while a request is profiled (the endpoint task call_next spawns,
+# gathers inside handlers) register with its profiler
+def profiled_task_factory(previous):
+    def factory(loop, coro, **kwargs):
+        task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        profiler = context.get(_current_profiler) if context is not None else _current_profiler.get()
+        if profiler is not None:
+            profiler.add_task(task)
+        return task
+    factory.profiles_tasks = True
+    return factory
+
+
+_threadpool_run_sync = anyio.to_thread.run_sync
+
+
+# Every threadpool call (sync endpoints and dependencies, run_in_threadpool) goes
+# through anyio; calls made for a profiled request register their worker thread
+async def profiled_run_sync(func, *args, **kwargs):
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return await _threadpool_run_sync(func, *args, **kwargs)
+    return await _threadpool_run_sync(profiler.attached, func, *args, **kwargs)
+
+
+def track_request_work(loop):
+    if not getattr(loop.get_task_factory(), "profiles_tasks", False):
+        loop.set_task_factory(profiled_task_factory(loop.get_task_factory()))
+    anyio.to_thread.run_sync = profiled_run_sync
+
+
+# Samples the stacks of the threads working for one request at a fixed interval
+# until stopped. Stacks are stored in collapsed form ("outer;inner;leaf" -> count),
+# which flame graph tools read directly.
+class SamplingProfiler:
+    def __init__(self, interval: float, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._loop = None
+        self._loop_thread = None
+        # Registry of the request's work: its tasks on the event loop thread and the
+        # threadpool workers currently running a call for it
+        self._tasks = set()
+        self._threads = Counter()
+        self._registry_lock = Lock()
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = get_ident()
+        self.add_task(asyncio.current_task())
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def add_task(self, task):
+        with self._registry_lock:
+            self._tasks.add(task)
+        task.add_done_callback(self._remove_task)
+
+    def _remove_task(self, task):
+        with self._registry_lock:
+            self._tasks.discard(task)
+
+    # Runs func on a threadpool worker, with the worker counted as the request's
+    def attached(self, func, *args):
+        thread_id = get_ident()
+        with self._registry_lock:
+            self._threads[thread_id] += 1
+        try:
+            return func(*args)
+        finally:
+            with self._registry_lock:
+                self._threads[thread_id] -= 1
+                if not self._threads[thread_id]:
+                    del self._threads[thread_id]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if self._owns(thread_id):
+                    self._record(frame)
+            self.samples += 1
+
+    # Concurrent requests and background jobs share the loop thread and the pool
+    # workers; only the ones registered for this request are sampled
+    def _owns(self, thread_id):
+        if thread_id == self._loop_thread:
+            task = asyncio.current_task(self._loop)
+            with self._registry_lock:
+                return task in self._tasks
+        with self._registry_lock:
+            return thread_id in self._threads
+
+    def _record(self, frame):
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+
+    def top_functions(self, limit: int = 20):
+        leaves = Counter()
+        for stack, hits in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += hits
+        return [{"function": name, "samples": hits} for name, hits in leaves.most_common(limit)]
+
+
+# Last N request profiles, newest last
+class ProfileStore:
+    def __init__(self, size: int):
+        self._profiles = deque(maxlen=size)
+        self._ids = count(1)
+        self._lock = Lock()
+
+    def add(self, profile: dict):
+        with self._lock:
+            profile["id"] = next(self._ids)
+            self._profiles.append(profile)
+        return profile["id"]
+
+    def list(self):
+        with self._lock:
+            return [{key: value for key, value in p.items() if key not in ("stacks", "top")} for p in self._profiles]
+
+    def get(self, profile_id: int):
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+profile_store = ProfileStore(config.PROFILE_BUFFER_SIZE)
+
+
+def token_matches(value: str | None):
+    return bool(config.PROFILE_TOKEN) and value is not None and hmac.compare_digest(value, config.PROFILE_TOKEN)
+
+
+# Only installed when PROFILE_TOKEN is set. Requests carrying the token in the
+# X-Profile header run under the sampler; everything else passes straight through.
+async def profiling_middleware(request: Request, call_next):
+    if not token_matches(request.headers.get(PROFILE_HEADER)) or request.url.path.startswith("/admin/"):
+        return await call_next(request)
+
+    track_request_work(asyncio.get_running_loop())
+    profiler = SamplingProfiler(config.PROFILE_INTERVAL_MS / 1000)
+    token = _current_profiler.set(profiler)
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+        _current_profiler.reset(token)
+    duration = time.perf_counter() - started
+
+    profile_id = profile_store.add({
+        "method": request.method,
+        "path": request.url.path,
+        "query": request.url.query,
+        "status_code": response.status_code,
+        "started_at": started_at.isoformat(),
+        "duration_ms": round(duration * 1000, 1),
+        "interval_ms": config.PROFILE_INTERVAL_MS,
+        "samples": profiler.samples,
+        "top": profiler.top_functions(),
+        "stacks": dict(profiler.stacks)
+    })
+    response.headers["X-Profile-Id"] = str(profile_id)
+    return response
+
+
+def require_profile_token(request: Request):
+    if not token_matches(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+
+
+router = APIRouter(dependencies=[Depends(require_profile_token)])
+
+
+@router.get("/profiles")
+def list_profiles():
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: int, format: str = "json"):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted)")
+    if format == "collapsed":
+        # Feed to flamegraph.pl or speedscope
+        return PlainTextResponse("\n".join(f"{stack} {hits}" for stack, hits in profile["stacks"].items()))
+    return profile
@@ -0,0 +1,224 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from threading import BoundedSemaphore, Lock, local
+from cachetools import TTLCache
+from fastapi import HTTPException, Request
+from jose import JWTError, jwt
+from .auth import SECRET_KEY, ALGORITHM
+from . import config
+
+# Token cost of one request per endpoint class
+ENDPOINT_COSTS = {
+    "quote": config.RATE_LIMIT_COST_QUOTE,
+    "history": config.RATE_LIMIT_COST_HISTORY,
+    "predict": config.RATE_LIMIT_COST_PREDICT,
+    "sentiment": config.RATE_LIMIT_COST_SENTIMENT,
+}
+# The combined detail endpoint does the work of all four
+ENDPOINT_COSTS["detail"] = sum(ENDPOINT_COSTS.values())
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    # Seconds until `cost` tokens are available (0 if they are available now)
+    def wait_time(self, cost: float, now: float):
+        self._refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.refill_per_second
+
+    def take(self, cost: float):
+        self.tokens -= cost
+
+
+class RateLimiter:
+    def __init__(self, ip_capacity, ip_refill, user_capacity, user_refill, max_clients=100000):
+        self.ip_limits = (ip_capacity, ip_refill)
+        self.user_limits = (user_capacity, user_refill)
+        # Idle buckets would be full again anyway, so they can safely expire
+        idle_ttl = max(ip_capacity / max(ip_refill, 1e-9), user_capacity / max(user_refill, 1e-9))
+        self._buckets = TTLCache(maxsize=max_clients, ttl=min(idle_ttl, 86400))
+        self._lock = Lock()
+
+    def _bucket(self, key, limits):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(*limits)
+        self._buckets[key] = bucket  # Refresh the TTL on every use
+        return bucket
+
+    # Charge `cost` to every bucket or to none of them; returns seconds to wait if denied
+    def acquire(self, ip: str, user_id: int | None, cost: float):
+        with self._lock:
+            now = time.monotonic()
+            buckets = [self._bucket(("ip", ip), self.ip_limits)]
+            if user_id is not None:
+                buckets.append(self._bucket(("user", user_id), self.user_limits))
+
+            wait = max(bucket.wait_time(cost, now) for bucket in buckets)
+            if wait > 0:
+                return wait
+            for bucket in buckets:
+                bucket.take(cost)
+            return 0.0
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class UpstreamBusy(Exception):
+    def __init__(self):
+        super().__init__("Market data is busy, try again shortly")
+
+
+# Global cap on in-flight upstream work; callers that cannot get a slot quickly are rejected
+class UpstreamGate:
+    def __init__(self, max_in_flight: int, acquire_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.acquire_timeout = acquire_timeout
+        self._slots = BoundedSemaphore(max_in_flight)
+        self._lock = Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self._held = local()
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    # Hold a slot for a block of upstream work; raises UpstreamBusy if none frees up in
+    # time. Re-entrant per thread, so upstream calls nested in a held slot reuse it.
+    @contextmanager
+    def slot(self):
+        depth = getattr(self._held, "depth", 0)
+        if depth == 0 and not self.acquire():
+            raise UpstreamBusy()
+        self._held.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._held.depth = depth
+            if depth == 0:
+                self.release()
+
+
+# Cap on upstream calls made from the event loop (live trade pricing): waiting for a
+# slot parks the coroutine instead of a threadpool thread
+class AsyncUpstreamGate:
+    def __init__(self, max_in_flight: int, acquire_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.acquire_timeout = acquire_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        try:
+            if self._slots.locked():
+                await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+            else:
+                await self._slots.acquire()
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamBusy()
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+
+limiter = RateLimiter(
+    config.RATE_LIMIT_IP_CAPACITY, config.RATE_LIMIT_IP_REFILL_PER_SECOND,
+    config.RATE_LIMIT_USER_CAPACITY, config.RATE_LIMIT_USER_REFILL_PER_SECOND
+)
+upstream_gate = UpstreamGate(config.UPSTREAM_MAX_IN_FLIGHT, config.UPSTREAM_ACQUIRE_TIMEOUT_SECONDS)
+async_upstream_gate = AsyncUpstreamGate(config.UPSTREAM_ASYNC_MAX_IN_FLIGHT, config.UPSTREAM_ACQUIRE_TIMEOUT_SECONDS)
+
+
+def too_many_requests(retry_after: float, detail: str):
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+# For in-process upstream work that found the gate full: a temporary condition, not a bad request
+def upstream_unavailable():
+    return HTTPException(status_code=503, detail="Market data is busy, try again shortly",
+                         headers={"Retry-After": "1"})
+
+
+# Market data endpoints accept anonymous callers; a valid bearer token also charges the user
+def optional_user_id(request: Request):
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], SECRET_KEY, [ALGORITHM])
+        return int(payload["sub"])
+    except (JWTError, KeyError, ValueError):
+        return None
+
+
+# Address a request is charged to. A trusted proxy's own address stands for all of
+# its users, so behind one the nearest untrusted X-Forwarded-For hop is used.
+def client_ip(request: Request):
+    peer = request.client.host if request.client else "unknown"
+    if peer not in config.TRUSTED_PROXIES:
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in config.TRUSTED_PROXIES:
+            return hop
+    return peer
+
+
+# Charge a request's IP (and user, if authenticated) buckets, for routes whose cost
+# depends on the request. Costs above a bucket's capacity are capped so they stay payable.
+def charge(request: Request, cost: float):
+    if not config.RATE_LIMIT_ENABLED:
+        return
+    cost = min(cost, config.RATE_LIMIT_IP_CAPACITY, config.RATE_LIMIT_USER_CAPACITY)
+    wait = limiter.acquire(client_ip(request), optional_user_id(request), cost)
+    if wait > 0:
+        raise too_many_requests(wait, "Rate limit exceeded")
+
+
+# Dependency factory: charges the endpoint class cost. Upstream slots are taken
+# only around the upstream calls themselves, so cache hits, revalidations and
+# model fits never wait on (or count against) the gate.
+def rate_limit(endpoint_class: str):
+    cost = ENDPOINT_COSTS[endpoint_class]
+
+    def dependency(request: Request):
+        charge(request, cost)
+
+    return dependency
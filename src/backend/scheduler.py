@@ -0,0 +1,121 @@
+from datetime import datetime, time as time_of_day, timedelta
+from zoneinfo import ZoneInfo
+import fcntl
+import os
+import threading
+import time
+import traceback
+from . import config
+
+
+class Job:
+    def __init__(self, name, func, interval):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = time.monotonic()
+        self.last_duration = None
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            self.func()
+        except Exception:
+            print(f"Job {self.name} failed:\n{traceback.format_exc()}")
+        finally:
+            self.last_duration = time.perf_counter() - started
+
+    # Seconds from now until the next run
+    def delay(self):
+        return self.interval
+
+
+# Runs once a day at a wall-clock time in the given timezone, optionally skipping weekends
+class DailyJob(Job):
+    def __init__(self, name, func, at: time_of_day, tz: str, weekdays_only=False):
+        super().__init__(name, func, None)
+        self.at = at
+        self.tz = ZoneInfo(tz)
+        self.weekdays_only = weekdays_only
+        self.next_run = time.monotonic() + self.delay()
+
+    def delay(self, now: datetime | None = None):
+        now = now or datetime.now(self.tz)
+        run_at = datetime.combine(now.date(), self.at, tzinfo=self.tz)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        while self.weekdays_only and run_at.weekday() >= 5:
+            run_at += timedelta(days=1)
+        # Via timestamps: subtracting datetimes that share a tzinfo ignores DST changes
+        return run_at.timestamp() - now.timestamp()
+
+
+# Runs periodic and daily jobs one at a time on a single daemon thread
+class Scheduler:
+    def __init__(self):
+        self.jobs = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def every(self, seconds, func, name=None, run_immediately=True):
+        job = Job(name or func.__name__, func, seconds)
+        if not run_immediately:
+            job.next_run += seconds
+        self._add(job)
+        return job
+
+    # at: "HH:MM" in tz
+    def daily_at(self, at, func, tz="UTC", name=None, weekdays_only=False):
+        job = DailyJob(name or func.__name__, func, time_of_day.fromisoformat(at), tz, weekdays_only)
+        self._add(job)
+        return job
+
+    # Re-registering a job name (e.g. on app restart in tests) replaces the old job
+    def _add(self, job):
+        self.jobs = [existing for existing in self.jobs if existing.name != job.name] + [job]
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self.jobs:
+                if job.next_run <= now:
+                    job.run()
+                    job.next_run = time.monotonic() + job.delay()
+
+            next_run = min((job.next_run for job in self.jobs), default=now + 60)
+            self._stop.wait(max(next_run - time.monotonic(), 0.5))
+
+
+scheduler = Scheduler()
+
+# Open lock files by name; kept open so the lock lasts as long as the process
+_host_locks = {}
+
+
+# True if this process holds the host-wide lock `name`. The first worker to ask keeps
+# it until it exits, so a job that checks it runs in one worker per host; the OS
+# drops the lock if that worker dies and another one picks it up on its next run.
+def host_lock(name: str):
+    if name in _host_locks:
+        return True
+    handle = open(os.path.join(config.JOB_LOCK_DIR, f"{name}.lock"), "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _host_locks[name] = handle
+    return True
@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import distinct
+from sqlalchemy.orm import Session
+from .auth import get_current_user
+from .database import get_db
+from .market_data import load_panels
+from .utils import technical_indicators
+from . import models
+
+router = APIRouter()
+
+# Calendar days of cached bars loaded: enough for SMA_20 plus a crossing window
+LOOKBACK_DAYS = 90
+MAX_UNIVERSE = 1000
+SORT_COLUMNS = {"rsi": True, "volume_ratio": False, "change_percent": False, "symbol": True}  # column -> ascending
+
+
+# Latest indicator values for every symbol in a dates x symbols panel, filtered and
+# ranked. Gaps in the shared calendar are forward-filled so one missing bar does
+# not blank a symbol's rolling windows.
+def screen_panel(close, volume, rsi_below=None, rsi_above=None, sma_cross=None, cross_within=1,
+                 volume_ratio_above=None, sort_by="volume_ratio"):
+    import pandas as pd
+
+    close = close.ffill()
+    volume = volume.fillna(0.0)
+    indicators = technical_indicators(close, volume)
+    sma_5, sma_20 = indicators["SMA_5"], indicators["SMA_20"]
+
+    # Crossing: SMA_5 on the other side of SMA_20 than on the previous valid bar
+    valid = sma_5.notna() & sma_20.notna()
+    was_valid = valid.shift(1, fill_value=False)
+    above = sma_5 > sma_20
+    below = sma_5 < sma_20
+    crossed_above = (above & below.shift(1, fill_value=False) & was_valid).iloc[-cross_within:].any()
+    crossed_below = (below & above.shift(1, fill_value=False) & was_valid).iloc[-cross_within:].any()
+
+    latest = pd.DataFrame({
+        "close": close.iloc[-1],
+        "change_percent": (close.iloc[-1] / close.iloc[-2] - 1) * 100 if len(close) > 1 else float("nan"),
+        "rsi": indicators["RSI"].iloc[-1],
+        "sma_5": sma_5.iloc[-1],
+        "sma_20": sma_20.iloc[-1],
+        "volume_ratio": indicators["volume_ratio"].iloc[-1],
+        "crossed_above": crossed_above,
+        "crossed_below": crossed_below
+    })
+    latest.index.name = "symbol"
+
+    complete = latest[["close", "rsi", "sma_20", "volume_ratio"]].notna().all(axis=1)
+    insufficient = sorted(latest.index[~complete])
+    latest = latest[complete]
+
+    mask = pd.Series(True, index=latest.index)
+    if rsi_below is not None:
+        mask &= latest["rsi"] < rsi_below
+    if rsi_above is not None:
+        mask &= latest["rsi"] > rsi_above
+    if sma_cross == "above":
+        mask &= latest["crossed_above"]
+    elif sma_cross == "below":
+        mask &= latest["crossed_below"]
+    if volume_ratio_above is not None:
+        mask &= latest["volume_ratio"] > volume_ratio_above
+
+    matches = latest[mask].reset_index()
+    matches = matches.sort_values([sort_by, "symbol"], ascending=[SORT_COLUMNS[sort_by], True])
+    return matches, insufficient
+
+
+@router.get("/")
+def run_screener(
+    symbols: str | None = Query(None, description="Comma-separated; defaults to every symbol with cached bars"),
+    rsi_below: float | None = Query(None, ge=0, le=100),
+    rsi_above: float | None = Query(None, ge=0, le=100),
+    sma_cross: str | None = Query(None, pattern="^(above|below)$"),  # SMA_5 crossing SMA_20
+    cross_within: int = Query(1, ge=1, le=20),  # ...within the last N bars
+    volume_ratio_above: float | None = Query(None, ge=0),
+    sort_by: str = Query("volume_ratio", pattern="^(rsi|volume_ratio|change_percent|symbol)$"),
+    limit: int = Query(50, ge=1, le=MAX_UNIVERSE),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    start = date.today() - timedelta(days=LOOKBACK_DAYS)
+
+    # Screens run on locally cached bars only, never on live upstream calls
+    if symbols:
+        universe = sorted({s.strip().upper() for s in symbols.split(",") if s.strip()})
+    else:
+        universe = sorted(row[0] for row in db.query(distinct(models.PriceBar.symbol)).filter(
+            models.PriceBar.date >= start
+        ).all())
+    if len(universe) > MAX_UNIVERSE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_UNIVERSE} symbols per screen")
+
+    panels = load_panels(db, universe, ("close", "volume"), start=start)
+    close = panels["close"].dropna(axis=1, how="all")
+    missing = sorted(set(universe) - set(close.columns))
+    if close.empty:
+        return {"as_of": None, "universe": len(universe), "matched": 0, "results": [],
+                "missing": missing, "insufficient_history": []}
+
+    matches, insufficient = screen_panel(
+        close, panels["volume"][close.columns], rsi_below, rsi_above, sma_cross, cross_within,
+        volume_ratio_above, sort_by
+    )
+
+    return {
+        "as_of": close.index[-1].date().isoformat(),
+        "universe": len(universe),
+        "matched": len(matches),
+        "results": [
+            {
+                "symbol": row.symbol,
+                "close": round(float(row.close), 2),
+                "change_percent": round(float(row.change_percent), 2),
+                "rsi": round(float(row.rsi), 2),
+                "sma_5": round(float(row.sma_5), 2),
+                "sma_20": round(float(row.sma_20), 2),
+                "volume_ratio": round(float(row.volume_ratio), 2),
+                "crossed_above": bool(row.crossed_above),
+                "crossed_below": bool(row.crossed_below)
+            } for row in matches.head(limit).itertuples(index=False)
+        ],
+        "missing": missing,
+        "insufficient_history": insufficient
+    }
@@ -0,0 +1,168 @@
+from collections import Counter, OrderedDict
+from functools import wraps
+from threading import Lock, local
+import pickle
+import sqlite3
+import time
+from . import config
+
+MISSING = object()
+
+
+# Per-process store; values are pickled so callers never share (and mutate) a cached object
+class MemoryCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, payload), least recently used first
+        self._lock = Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def set(self, key: str, value, ttl: float):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+# One SQLite file shared by every worker process on the host. Expired rows are
+# purged every PURGE_EVERY writes, and past max_entries the rows closest to
+# expiry go first. Cache errors (e.g. a locked file) count as misses.
+class SQLiteCache:
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+
+    # One connection per thread, in autocommit mode
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=config.SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        try:
+            row = self._conn().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return MISSING
+        if row is None or row[1] <= time.time():
+            return MISSING
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value, ttl: float):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        try:
+            self._conn().execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                                 (key, payload, time.time() + ttl))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self.purge()
+        except sqlite3.Error:
+            pass
+
+    def purge(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at "
+            "LIMIT max(0, (SELECT COUNT(*) FROM cache) - ?))",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def build_cache(backend: str = config.CACHE_BACKEND):
+    if backend == "sqlite":
+        return SQLiteCache(config.CACHE_SQLITE_PATH, config.CACHE_MAX_ENTRIES)
+    if backend == "memory":
+        return MemoryCache(config.CACHE_MAX_ENTRIES)
+    return None
+
+
+cache = build_cache()
+# Hits and misses per namespace in this process
+_stats = Counter()
+
+
+def cache_key(namespace: str, args, kwargs):
+    return f"{namespace}:{args!r}:{sorted(kwargs.items())!r}"
+
+
+# Cached value for a prebuilt key, computing and storing it on a miss.
+# Exceptions are not cached, nor are values cache_if rejects.
+def get_or_compute(namespace: str, key: str, ttl: float, compute, cache_if=None):
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is not MISSING:
+        _stats[(namespace, "hits")] += 1
+        return value
+    _stats[(namespace, "misses")] += 1
+    value = compute()
+    if cache_if is None or cache_if(value):
+        cache.set(key, value, ttl)
+    return value
+
+
+# Cache a function's return value for ttl seconds, keyed by its arguments.
+# cache_if(value) -> False keeps empty or failed upstream answers out of the cache.
+def cached(namespace: str, ttl: float, cache_if=None):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_or_compute(
+                namespace, cache_key(namespace, args, kwargs), ttl, lambda: func(*args, **kwargs), cache_if
+            )
+        return wrapper
+    return decorator
+
+
+def clear():
+    if cache is not None:
+        cache.clear()
+    _stats.clear()
+
+
+def stats():
+    namespaces = sorted({namespace for namespace, _ in _stats})
+    return {
+        "backend": config.CACHE_BACKEND,
+        "size": cache.size() if cache is not None else 0,
+        "namespaces": {
+            namespace: {"hits": _stats[(namespace, "hits")], "misses": _stats[(namespace, "misses")]}
+            for namespace in namespaces
+        }
+    }
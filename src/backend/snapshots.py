@@ -0,0 +1,114 @@
+import json
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import models
+
+
+# Portfolio-level totals for a list of holding rows plus cash
+def summarise(email: str, cash_balance: float, holdings: list):
+    total_market_value = sum(h["market_value"] for h in holdings)
+    total_cost_basis = sum(h["cost_basis"] for h in holdings)
+    total_unrealised_pnl = round(total_market_value - total_cost_basis, 2)
+
+    return {
+        "user": email,
+        "cash_balance": round(cash_balance, 2),
+        "holdings_market_value": round(total_market_value, 2),
+        "total_portfolio_value": round(cash_balance + total_market_value, 2),
+        "total_unrealised_pnl": total_unrealised_pnl,
+        "pnl_percentage": round((total_unrealised_pnl / total_cost_basis * 100), 2) if total_cost_basis > 0 else 0,
+        "holdings": holdings
+    }
+
+
+def holding_row(symbol: str, quantity: float, avg_price: float, current_price: float):
+    market_value = round(current_price * quantity, 2)
+    cost_basis = round(avg_price * quantity, 2)
+    unrealised_pnl = round(market_value - cost_basis, 2)
+    return {
+        "symbol": symbol,
+        "quantity": quantity,
+        "avg_price": avg_price,
+        "current_price": current_price,
+        "market_value": market_value,
+        "cost_basis": cost_basis,
+        "unrealised_pnl": unrealised_pnl,
+        "pnl_percentage": round((unrealised_pnl / cost_basis * 100), 2) if cost_basis > 0 else 0
+    }
+
+
+# Rebuild a user's snapshot from their holdings. Prices passed in win; other
+# symbols keep the price from the previous snapshot, or fall back to cost.
+# The caller commits, so trades update the snapshot in the same transaction.
+# `user` may be a per-process cached copy, so the balance is read from the session.
+def refresh_snapshot(db: Session, user, prices: dict | None = None):
+    db.flush()
+    balance = db.get(models.User, user.id).balance
+    holdings = db.query(models.Holding).filter(models.Holding.user_id == user.id).all()
+    snapshot = db.get(models.PortfolioSnapshot, user.id)
+
+    known_prices = {}
+    if snapshot is not None:
+        known_prices = {h["symbol"]: h["current_price"] for h in json.loads(snapshot.payload)["holdings"]}
+    known_prices.update(prices or {})
+
+    rows = [
+        holding_row(h.symbol, h.quantity, h.avg_price, known_prices.get(h.symbol, h.avg_price))
+        for h in holdings
+    ]
+    payload = json.dumps(summarise(user.email, balance, rows))
+
+    if snapshot is None:
+        snapshot = models.PortfolioSnapshot(user_id=user.id, payload=payload, updated_at=datetime.utcnow())
+        db.add(snapshot)
+    else:
+        snapshot.payload = payload
+        snapshot.updated_at = datetime.utcnow()
+    return snapshot
+
+
+# Snapshot JSON with new prices applied to the ticked symbols' rows
+def tick_payload(payload: str, prices: dict):
+    payload = json.loads(payload)
+    rows = [
+        holding_row(h["symbol"], h["quantity"], h["avg_price"], prices[h["symbol"]])
+        if h["symbol"] in prices else h
+        for h in payload["holdings"]
+    ]
+    return json.dumps(summarise(payload["user"], payload["cash_balance"], rows))
+
+
+# Rounds of re-reading snapshots that a trade rewrote while a tick was being applied
+TICK_RETRIES = 3
+
+
+# Apply new prices only to snapshots of accounts holding one of the ticked symbols.
+# Each write is a compare-and-set on updated_at, so a snapshot a trade replaced after
+# it was read (new quantities and balance) is re-read and ticked again rather than
+# overwritten with the stale copy.
+def apply_price_ticks(db: Session, prices: dict):
+    if not prices:
+        return 0
+
+    Snapshot = models.PortfolioSnapshot
+    user_ids = select(models.Holding.user_id).where(models.Holding.symbol.in_(list(prices))).distinct()
+    rows = db.query(Snapshot.user_id, Snapshot.payload, Snapshot.updated_at).filter(Snapshot.user_id.in_(user_ids)).all()
+
+    ticked = 0
+    for _ in range(TICK_RETRIES):
+        now = datetime.utcnow()
+        lost = []
+        for user_id, payload, seen in rows:
+            written = db.query(Snapshot).filter(Snapshot.user_id == user_id, Snapshot.updated_at == seen).update(
+                {"payload": tick_payload(payload, prices), "updated_at": now}, synchronize_session=False
+            )
+            if written:
+                ticked += 1
+            else:
+                lost.append(user_id)
+        db.commit()
+        if not lost:
+            break
+        rows = db.query(Snapshot.user_id, Snapshot.payload, Snapshot.updated_at).filter(Snapshot.user_id.in_(lost)).all()
+    return ticked
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from threading import Lock
+from cachetools import TTLCache
+from . import config
+
+
+# Detached, read-only copy of the user row handed to read-only endpoints
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    email: str
+    balance: float
+    realized_pnl: float
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(id=user.id, email=user.email, balance=user.balance, realized_pnl=user.realized_pnl or 0.0)
+
+
+class UserCache:
+    def __init__(self, ttl: float, maxsize: int):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Bumped on every invalidation so a load that raced with a trade is not stored.
+        # Bounded like the entries: a generation only matters to loads started before
+        # it, and those have finished long before it expires.
+        self._generations = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Returns (user or None, generation to pass back to store())
+    def lookup(self, user_id: int):
+        with self._lock:
+            user = self._entries.get(user_id)
+            if user is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return user, self._generations.get(user_id, 0)
+
+    def store(self, user_id: int, user: CachedUser, generation: int):
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._entries[user_id] = user
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def get_or_load(self, user_id: int, loader):
+        user, generation = self.lookup(user_id)
+        if user is None:
+            user = loader(user_id)
+            if user is not None:
+                self.store(user_id, user, generation)
+        return user
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries)
+            }
+
+
+user_cache = UserCache(config.USER_CACHE_TTL_SECONDS, config.USER_CACHE_MAX_SIZE)
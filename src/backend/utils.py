@@ -1,91 +1,118 @@
 import requests
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from functools import lru_cache
+from . import config
+from .metrics import timed
+from .ratelimit import UpstreamBusy, upstream_gate
+from .shared_cache import cached
+
+# Pair rates are shared across workers through the cache; failures are not cached
+@cached("fx", config.CACHE_TTL_FX)
+def fetch_conversion_rate(from_currency, to_currency):
+    #TODO: Put into environment variable, key in variable for testing purposes
+    key = "9c963643d7d186655a968060"
+    url = f"https://v6.exchangerate-api.com/v6/{key}/pair/{from_currency}/{to_currency}"
+    with upstream_gate.slot():
+        response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    data = response.json()
+
+    if 'conversion_rate' not in data:
+        raise ValueError(f"Rate fetch failed: {data}")
+    return data['conversion_rate']
 
+@timed("fx")
 def get_conversion_rate(from_currency, to_currency):
     if from_currency == to_currency:
         return 1.0
     try:
-        #TODO: Put into environment variable, key in variable for testing purposes
-        key = "9c963643d7d186655a968060"
-        url = f"https://v6.exchangerate-api.com/v6/{key}/pair/{from_currency}/{to_currency}"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'conversion_rate' in data:
-            return data['conversion_rate']
-        else:
-            print(f"Rate fetch failed: {data}")
-            return 1.0
-
+        return fetch_conversion_rate(from_currency, to_currency)
+    except UpstreamBusy:
+        raise  # A full gate is not a failed lookup; 1.0 would be a wrong rate
     except Exception as e:
         print(f"Rate fetch error: {e}")
         return 1.0
 
+@timed("fx")
 def convert_currency(amount, from_currency, to_currency):
     if from_currency == to_currency:
         # no conversion needed
         return amount
     try:
-        # TODO: Put into environment variable, key in variable for testing purposes
-        key = "9c963643d7d186655a968060"
-        url = f"https://v6.exchangerate-api.com/v6/{key}/pair/{from_currency}/{to_currency}/{amount}"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()  # Raises exception for bad status codes
-        data = response.json()
-
-        # The exchangerate-host API returns the converted amount directly in 'result'
-        if 'conversion_result' in data:
-            return round(data['conversion_result'], 2)
-        else:
-            print(f"Currency conversion failed: {data}")
-            return amount
+        # Converted locally from the cached pair rate instead of one API call per amount
+        return round(amount * fetch_conversion_rate(from_currency, to_currency), 2)
 
+    except UpstreamBusy:
+        raise
     except Exception as e:
         print(f"Currency conversion error: {e}")
         # fallback to original value
         return amount
 
-def add_technical_features(df):
+# Indicators from closes and volumes. Works on a single Series or on a dates x symbols
+# DataFrame panel, where every column is computed in the same vectorized pass.
+def technical_indicators(close, volume):
+    indicators = {}
+
     # 1. SMA_5: 5-day Simple Moving Average - short-term trend signal
-    df["SMA_5"] = df['close'].rolling(5).mean()
+    indicators["SMA_5"] = close.rolling(5).mean()
 
     # 2. SMA_20: 20-day Simple Moving Average - long-term trend signal
-    df["SMA_20"] = df['close'].rolling(20).mean()
+    indicators["SMA_20"] = close.rolling(20).mean()
 
     # 3. Calculate daily price change
-    df["diff"] = df["close"].diff()
+    diff = indicators["diff"] = close.diff()
 
     # 4. Gain: only positive differences (else 0)
-    df["gain"] = df["diff"].where(df["diff"] > 0, 0)
+    indicators["gain"] = diff.where(diff > 0, 0)
 
     # 5. Loss: convert negative differences to positive values (else 0)
-    df["loss"] = -df["diff"].where(df["diff"] < 0, 0)
+    indicators["loss"] = -diff.where(diff < 0, 0)
 
     # 6. Calculate average gain and average loss over 14 days (RSI window)
-    df["avgGain"] = df["gain"].rolling(14).mean()
-    df["avgLoss"] = df["loss"].rolling(14).mean()
+    indicators["avgGain"] = indicators["gain"].rolling(14).mean()
+    indicators["avgLoss"] = indicators["loss"].rolling(14).mean()
 
     # 7. RSI: Relative Strength Index
     #    Measures momentum by comparing recent gains vs losses
     #    >70 = overbought, <30 = oversold
-    df["RSI"] = 100 - (100 / (1 + (df["avgGain"]/df["avgLoss"])))
+    indicators["RSI"] = 100 - (100 / (1 + (indicators["avgGain"] / indicators["avgLoss"])))
 
     # 8. Volume Ratio: compares current volume to 10-day average volume
     #    High ratio indicates high interest or unusual trading behavior
-    df["volume_ratio"] = df["volume"] / df["volume"].rolling(10).mean()
+    indicators["volume_ratio"] = volume / volume.rolling(10).mean()
 
+    return indicators
+
+
+def add_technical_features(df):
+    for name, values in technical_indicators(df["close"], df["volume"]).items():
+        df[name] = values
     return df
 
 
 # key for testing, TODO: Put in environment variables
 key = "53746e59369d4b3db63904264741f5a3"
-def fetch_news_headlines(symbol):
+# An empty list is what a NewsAPI error looks like, so it is not cached
+@cached("news", config.CACHE_TTL_NEWS, cache_if=bool)
+def news_headlines(symbol):
     url = f"https://newsapi.org/v2/everything?q={symbol}&apiKey={key}"
-    response = requests.get(url)
+    with upstream_gate.slot():
+        response = requests.get(url)
     return [article['title'] for article in response.json().get('articles', [])[:10]]
 
+
+@timed("news")
+def fetch_news_headlines(symbol):
+    return news_headlines(symbol.upper())
+
+# Built once on first use: constructing the analyzer reads the whole VADER lexicon
+@lru_cache(maxsize=None)
+def sentiment_analyzer():
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+@timed("sentiment")
 def analyze_sentiment(headlines):
-    analyzer = SentimentIntensityAnalyzer()
+    analyzer = sentiment_analyzer()
     scores = [analyzer.polarity_scores(headline)['compound'] for headline in headlines]
     return sum(scores) / len(scores) if scores else 0
\ No newline at end of file
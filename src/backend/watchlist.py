@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import delete, desc, func, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .auth import get_current_user
+from .database import get_async_db
+from .market_data import cached_info
+from .ratelimit import UpstreamBusy, upstream_unavailable
+from . import config
+from . import models
+
+router = APIRouter()
+
+
+class WatchlistSymbol(BaseModel):
+    symbol: str
+
+
+# Symbols watched or held by anyone, most wanted first: each user counts once per
+# symbol whether they watch it, hold it, or both
+def symbols_by_demand(db: Session, limit: int | None = None):
+    wanted = union(
+        select(models.WatchlistItem.symbol, models.WatchlistItem.user_id),
+        select(models.Holding.symbol, models.Holding.user_id).where(models.Holding.quantity > 0)
+    ).subquery()
+    users = func.count().label("users")
+    return db.execute(
+        select(wanted.c.symbol, users).group_by(wanted.c.symbol).order_by(desc(users), wanted.c.symbol).limit(limit)
+    ).all()
+
+
+@router.get("/")
+async def show_watchlist(db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    result = await db.execute(select(models.WatchlistItem).where(models.WatchlistItem.user_id == user.id).order_by(
+        models.WatchlistItem.added_at, models.WatchlistItem.id
+    ))
+    return {
+        "symbols": [
+            {"symbol": item.symbol, "added_at": item.added_at.isoformat()} for item in result.scalars().all()
+        ]
+    }
+
+
+@router.post("/")
+async def add_to_watchlist(item: WatchlistSymbol, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    symbol = item.symbol.strip().upper()
+
+    existing = await db.scalar(select(models.WatchlistItem.id).where(
+        models.WatchlistItem.user_id == user.id, models.WatchlistItem.symbol == symbol
+    ))
+    if existing is not None:
+        return {"symbol": symbol, "added": False}
+
+    count = await db.scalar(select(func.count()).select_from(models.WatchlistItem).where(
+        models.WatchlistItem.user_id == user.id
+    ))
+    if count >= config.WATCHLIST_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Watchlists hold at most {config.WATCHLIST_MAX_SYMBOLS} symbols")
+
+    # Same check as a buy: the symbol must have a quote
+    try:
+        info = await run_in_threadpool(cached_info, symbol)
+    except UpstreamBusy:
+        raise upstream_unavailable()
+    except Exception:
+        info = None
+    if not info or "currentPrice" not in info:
+        raise HTTPException(status_code=404, detail="Invalid ticker")
+
+    db.add(models.WatchlistItem(user_id=user.id, symbol=symbol))
+    await db.commit()
+    return {"symbol": symbol, "added": True}
+
+
+@router.delete("/{symbol}")
+async def remove_from_watchlist(symbol: str, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    result = await db.execute(delete(models.WatchlistItem).where(
+        models.WatchlistItem.user_id == user.id, models.WatchlistItem.symbol == symbol.upper()
+    ))
+    await db.commit()
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail=f"{symbol.upper()} is not on your watchlist")
+    return {"symbol": symbol.upper(), "removed": True}
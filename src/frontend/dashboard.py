@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import altair as alt
 import time
@@ -15,6 +16,16 @@ st.set_page_config(
 # API base URL
 API_BASE = "http://localhost:8000"
 
+# Seconds each kind of read-only response stays cached for a user session
+CACHE_TTLS = {
+    "portfolio": 15,
+    "transactions": 60,
+    # Quote, chart, prediction and sentiment in one response: a page view costs all
+    # four in rate-limit tokens, so it is refetched at most every 30 seconds
+    "detail": 30,
+    "watchlist": 300,
+}
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -84,27 +95,112 @@ def initialize_session_state():
         st.session_state.current_page = 'login'
     if 'selected_stock' not in st.session_state:
         st.session_state.selected_stock = None
+    if 'api_cache' not in st.session_state:
+        st.session_state.api_cache = {}
 
 
 initialize_session_state()
 
 
 # API helper functions
-def make_authenticated_request(endpoint, method="GET", data=None):
+
+# One pooled HTTP session per user session, so reruns reuse keep-alive connections
+def get_http_session():
+    if 'http_session' not in st.session_state:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        st.session_state.http_session = session
+    return st.session_state.http_session
+
+
+# Successful GET responses are reused until their TTL runs out
+def cached_response(endpoint):
+    entry = st.session_state.api_cache.get(endpoint)
+    if entry and entry[0] > time.time():
+        return entry[1]
+    return None
+
+
+def cache_response(endpoint, response, cache_kind):
+    if cache_kind and response is not None and response.status_code == 200:
+        st.session_state.api_cache[endpoint] = (time.time() + CACHE_TTLS[cache_kind], response)
+
+
+# An expired entry that carried an ETag is revalidated rather than refetched
+def revalidation_headers(endpoint):
+    entry = st.session_state.api_cache.get(endpoint)
+    etag = entry[1].headers.get("ETag") if entry else None
+    return {"If-None-Match": etag} if etag else {}
+
+
+# A 304 means the expired cached response is still current
+def resolve_not_modified(endpoint, response):
+    entry = st.session_state.api_cache.get(endpoint)
+    if response.status_code == 304 and entry:
+        return entry[1]
+    return response
+
+
+# Drop cached entries whose endpoint starts with any of the given prefixes
+def invalidate_cache(*prefixes):
+    for endpoint in list(st.session_state.api_cache):
+        if endpoint.startswith(prefixes):
+            del st.session_state.api_cache[endpoint]
+
+
+# Market data calls all leave from this server, so the API is told who they are for:
+# the visitor's address (trusted from the dashboard) and, once signed in, their token
+def market_data_headers():
+    headers = {}
+    if st.session_state.get("token"):
+        headers["Authorization"] = f"Bearer {st.session_state.token}"
+    ip_address = st.context.ip_address
+    if ip_address:
+        headers["X-Forwarded-For"] = ip_address
+    return headers
+
+
+# Market data GET, cached by endpoint
+def api_get(endpoint, cache_kind=None):
+    response = cached_response(endpoint) if cache_kind else None
+    if response is None:
+        headers = {**market_data_headers(), **(revalidation_headers(endpoint) if cache_kind else {})}
+        response = get_http_session().get(f"{API_BASE}{endpoint}", headers=headers)
+        response = resolve_not_modified(endpoint, response)
+        cache_response(endpoint, response, cache_kind)
+    return response
+
+
+# A trade changes the portfolio, the transaction list and possibly the quote shown
+def invalidate_after_trade(symbol):
+    invalidate_cache("/portfolio/")
+    st.session_state.api_cache.pop(stock_detail_endpoint(symbol), None)
+
+
+def make_authenticated_request(endpoint, method="GET", data=None, cache_kind=None):
     headers = {'Authorization': f'Bearer {st.session_state.token}'}
     url = f"{API_BASE}{endpoint}"
+    session = get_http_session()
 
     try:
         if method == "GET":
-            response = requests.get(url, headers=headers)
+            response = cached_response(endpoint) if cache_kind else None
+            if response is None:
+                response = session.get(url, headers=headers)
+                cache_response(endpoint, response, cache_kind)
         elif method == "POST":
-            response = requests.post(url, json=data, headers=headers)
+            response = session.post(url, json=data, headers=headers)
         elif method == "PUT":
-            response = requests.put(url, json=data, headers=headers)
+            response = session.put(url, json=data, headers=headers)
+        elif method == "DELETE":
+            response = session.delete(url, headers=headers)
 
         if response.status_code == 401:
             st.session_state.authenticated = False
             st.session_state.token = None
+            st.session_state.api_cache = {}
             st.rerun()
 
         return response
@@ -113,9 +209,31 @@ def make_authenticated_request(endpoint, method="GET", data=None):
         return None
 
 
+def watchlist_symbols():
+    response = make_authenticated_request("/watchlist/", cache_kind="watchlist")
+    if response and response.status_code == 200:
+        return [item["symbol"] for item in response.json()["symbols"]]
+    return []
+
+
+# Add or remove a symbol, then drop the cached list so the change shows immediately
+def set_watched(symbol, watched):
+    if watched:
+        response = make_authenticated_request("/watchlist/", method="POST", data={"symbol": symbol})
+    else:
+        response = make_authenticated_request(f"/watchlist/{symbol}", method="DELETE")
+    invalidate_cache("/watchlist/")
+    if response is None or response.status_code != 200:
+        error_msg = response.json().get('detail', 'Unknown error') if response is not None else 'Request failed'
+        st.error(f"Watchlist update failed: {error_msg}")
+        return False
+    return True
+
+
 def logout():
     st.session_state.authenticated = False
     st.session_state.token = None
+    st.session_state.api_cache = {}
     st.session_state.user_email = None
     st.session_state.current_page = 'login'
     st.rerun()
@@ -138,12 +256,14 @@ def login_page():
 
             if submit:
                 try:
-                    response = requests.post(f"{API_BASE}/auth/login",
+                    response = get_http_session().post(f"{API_BASE}/auth/login",
                                              json={"email": email, "password": password})
 
                     if response.status_code == 200:
                         data = response.json()
                         st.session_state.token = data['access_token']
+                        # Nothing cached for a previous account may leak into this one
+                        st.session_state.api_cache = {}
                         st.session_state.authenticated = True
                         st.session_state.user_email = email
                         st.session_state.current_page = 'dashboard'
@@ -174,7 +294,7 @@ def login_page():
                     st.error("Password must be at least 6 characters")
                 else:
                     try:
-                        response = requests.post(f"{API_BASE}/auth/register",
+                        response = get_http_session().post(f"{API_BASE}/auth/register",
                                                  json={"email": reg_email, "password": reg_password})
 
                         if response.status_code == 200:
@@ -200,7 +320,7 @@ def dashboard_page():
             logout()
 
     # Get portfolio data
-    portfolio_response = make_authenticated_request("/portfolio/")
+    portfolio_response = make_authenticated_request("/portfolio/", cache_kind="portfolio")
 
     if portfolio_response and portfolio_response.status_code == 200:
         portfolio_data = portfolio_response.json()
@@ -256,9 +376,26 @@ def dashboard_page():
         else:
             st.info("No holdings yet. Search for stocks to start trading!")
 
+    # Watchlist: one click back to symbols instead of retyping them
+    st.subheader("Your Watchlist")
+    watched = watchlist_symbols()
+    if watched:
+        for symbol in watched:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                if st.button(f"👁 {symbol}", key=f"watch_{symbol}"):
+                    st.session_state.selected_stock = symbol
+                    st.session_state.current_page = 'stock_detail'
+                    st.rerun()
+            with col2:
+                if st.button("Remove", key=f"unwatch_{symbol}") and set_watched(symbol, False):
+                    st.rerun()
+    else:
+        st.info("Add symbols below to keep them one click away.")
+
     # Quick stock search
     st.subheader("Search Stocks")
-    search_col1, search_col2 = st.columns([3, 1])
+    search_col1, search_col2, search_col3 = st.columns([3, 1, 1])
 
     with search_col1:
         stock_symbol = st.text_input("Enter stock symbol (e.g., AAPL, TSLA)", key="stock_search")
@@ -269,6 +406,10 @@ def dashboard_page():
             st.session_state.current_page = 'stock_detail'
             st.rerun()
 
+    with search_col3:
+        if st.button("☆ Watch") and stock_symbol and set_watched(stock_symbol.upper(), True):
+            st.rerun()
+
     # Navigation buttons
     col1, col2 = st.columns(2)
     with col1:
@@ -283,6 +424,217 @@ def dashboard_page():
 
 
 # Stock Detail Page
+
+# Seconds the API may spend on each section of the stock page before reporting it as timed out
+DETAIL_SECTION_TIMEOUT = 20
+
+
+# Quote, chart, prediction and sentiment in one call. The chart period and the
+# prediction window are left to the API, whose pre-warm job fills the cache for them.
+def stock_detail_endpoint(symbol):
+    return f"/api/stock/{symbol}/detail?timeout={DETAIL_SECTION_TIMEOUT}"
+
+
+def section_error(label, section):
+    return f"Could not load {label}: {section.get('error') or section['status']}"
+
+
+def render_quote(stock_data):
+    # Stock metrics
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        price_change = stock_data['current_price'] - stock_data['previous_close']
+        st.metric(
+            "Current Price",
+            f"${stock_data['current_price']:.2f}",
+            delta=f"{price_change:+.2f}"
+        )
+
+    with col2:
+        st.metric(
+            "Day Change",
+            f"{stock_data['day_change_percent']:.2f}%"
+        )
+
+    with col3:
+        st.metric(
+            "Previous Close",
+            f"${stock_data['previous_close']:.2f}"
+        )
+
+    with col4:
+        st.write(f"**Company:** {stock_data['company_name']}")
+
+
+def render_trade(symbol, stock_data):
+    # Trading section
+    st.subheader("Trade")
+    trade_col1, trade_col2 = st.columns(2)
+
+    with trade_col1:
+        st.markdown("#### Buy")
+        with st.form(f"buy_form_{symbol}"):
+            buy_quantity = st.number_input("Quantity", min_value=0.01, step=0.01, key=f"buy_qty_{symbol}")
+            buy_cost = buy_quantity * stock_data['current_price']
+            st.write(f"Total cost: ${buy_cost:.2f}")
+
+            if st.form_submit_button("Buy"):
+                buy_response = make_authenticated_request(
+                    "/portfolio/buy",
+                    method="POST",
+                    data={"ticker": symbol, "quantity": buy_quantity}
+                )
+
+                if buy_response and buy_response.status_code == 200:
+                    invalidate_after_trade(symbol)
+                    st.success(f"Successfully bought {buy_quantity} shares of {symbol}!")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    error_msg = buy_response.json().get('detail',
+                                                        'Unknown error') if buy_response else 'Request failed'
+                    st.error(f"Buy failed: {error_msg}")
+
+    with trade_col2:
+        st.markdown("#### Sell")
+        with st.form(f"sell_form_{symbol}"):
+            sell_quantity = st.number_input("Quantity", min_value=0.01, step=0.01, key=f"sell_qty_{symbol}")
+            sell_value = sell_quantity * stock_data['current_price']
+            st.write(f"Total value: ${sell_value:.2f}")
+
+            if st.form_submit_button("Sell"):
+                sell_response = make_authenticated_request(
+                    "/portfolio/sell",
+                    method="POST",
+                    data={"ticker": symbol, "quantity": sell_quantity}
+                )
+
+                if sell_response and sell_response.status_code == 200:
+                    invalidate_after_trade(symbol)
+                    st.success(f"Successfully sold {sell_quantity} shares of {symbol}!")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    error_msg = sell_response.json().get('detail',
+                                                         'Unknown error') if sell_response else 'Request failed'
+                    st.error(f"Sell failed: {error_msg}")
+
+
+def render_chart(symbol, history_data):
+    st.subheader("Price Chart & Analysis")
+
+    df = pd.DataFrame(history_data["data"])
+    df['date'] = pd.to_datetime(df['date'])
+
+    # Price chart
+    price_chart = alt.Chart(df).mark_line(
+        color='#667eea',
+        strokeWidth=2
+    ).encode(
+        x=alt.X("date:T", title="Date"),
+        y=alt.Y("close:Q", title="Price ($)", scale=alt.Scale(zero=False)),
+        tooltip=["date:T", "close:Q", "volume:Q"]
+    ).properties(
+        height=400,
+        title=f"{symbol} Price History"
+    )
+
+    st.altair_chart(price_chart, use_container_width=True)
+
+
+def render_prediction(pred_data, current_price):
+    predicted_price = pred_data['predicted_close_price']
+
+    st.subheader("AI Prediction")
+    prediction_change = ((predicted_price - current_price) / current_price) * 100
+    direction = "📈" if prediction_change > 0 else "📉"
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(
+            "Predicted Next Close",
+            f"${predicted_price:.2f}",
+            delta=f"{prediction_change:+.2f}%"
+        )
+    with col2:
+        st.write(f"{direction} Direction: {'Up' if prediction_change > 0 else 'Down'}")
+
+
+def render_sentiment(sentiment_data):
+    # Sentiment Analysis section
+    st.subheader("📰 News Sentiment Analysis")
+
+    # Sentiment overview
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        score = sentiment_data['sentiment_score']
+        status = sentiment_data['status']
+
+        # Color code based on sentiment
+        if status == "Positive":
+            sentiment_color = "🟢"
+            delta_color = "normal"
+        elif status == "Negative":
+            sentiment_color = "🔴"
+            delta_color = "inverse"
+        else:
+            sentiment_color = "🟡"
+            delta_color = "off"
+
+        st.metric(
+            "Sentiment Score",
+            f"{score:.3f}",
+            delta=f"{status}",
+            delta_color=delta_color
+        )
+
+    with col2:
+        st.write(f"**Status:** {sentiment_color} {status}")
+
+        # Add interpretation
+        if score > 0.1:
+            interpretation = "Very Positive"
+        elif score > 0.05:
+            interpretation = "Slightly Positive"
+        elif score < -0.1:
+            interpretation = "Very Negative"
+        elif score < -0.05:
+            interpretation = "Slightly Negative"
+        else:
+            interpretation = "Neutral"
+
+        st.write(f"**Interpretation:** {interpretation}")
+
+    with col3:
+        headlines_count = len(sentiment_data.get('headlines', []))
+        st.metric("News Articles", headlines_count)
+
+    # Headlines section
+    headlines = sentiment_data.get('headlines', [])
+    if headlines:
+        st.markdown("#### Recent Headlines")
+
+        # Create expandable sections for headlines
+        with st.expander(f"📰 View {len(headlines)} Recent Headlines", expanded=False):
+            for i, headline in enumerate(headlines[:10]):  # Show max 10 headlines
+                st.markdown(f"**{i + 1}.** {headline}")
+
+        # Sentiment trend indicator
+        if score > 0.05:
+            st.success("📈 Positive news sentiment may indicate bullish market sentiment")
+        elif score < -0.05:
+            st.warning("📉 Negative news sentiment may indicate bearish market sentiment")
+        else:
+            st.info("⚖️ Neutral news sentiment - mixed or balanced coverage")
+
+    else:
+        st.info("No recent headlines found for sentiment analysis")
+
+    st.markdown("---")  # Add separator before next section
+
+
 def stock_detail_page():
     if not st.session_state.selected_stock:
         st.error("No stock selected")
@@ -294,234 +646,59 @@ def stock_detail_page():
     symbol = st.session_state.selected_stock
 
     # Header
-    col1, col2, col3 = st.columns([2, 1, 1])
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     with col1:
         st.title(f"📊 {symbol} Analysis")
     with col2:
+        watched = symbol in watchlist_symbols()
+        if st.button("★ Unwatch" if watched else "☆ Watch") and set_watched(symbol, not watched):
+            st.rerun()
+    with col3:
         if st.button("🏠 Dashboard"):
             st.session_state.current_page = 'dashboard'
             st.rerun()
-    with col3:
+    with col4:
         if st.button("Logout"):
             logout()
 
-    # Get stock data
-    try:
-        response = requests.get(f"{API_BASE}/api/stock/{symbol}")
-        if response.status_code == 200:
-            stock_data = response.json()
-
-            # Stock metrics
-            col1, col2, col3, col4 = st.columns(4)
-
-            with col1:
-                price_change = stock_data['current_price'] - stock_data['previous_close']
-                st.metric(
-                    "Current Price",
-                    f"${stock_data['current_price']:.2f}",
-                    delta=f"{price_change:+.2f}"
-                )
-
-            with col2:
-                st.metric(
-                    "Day Change",
-                    f"{stock_data['day_change_percent']:.2f}%"
-                )
-
-            with col3:
-                st.metric(
-                    "Previous Close",
-                    f"${stock_data['previous_close']:.2f}"
-                )
+    with st.spinner(f"Loading {symbol}..."):
+        try:
+            response = api_get(stock_detail_endpoint(symbol), cache_kind="detail")
+        except requests.RequestException as e:
+            st.error(f"Error loading stock data: {e}")
+            return
+    if response.status_code != 200:
+        try:
+            error_msg = response.json().get('detail', response.reason)
+        except ValueError:
+            error_msg = response.reason
+        st.error(f"Error loading stock data: {error_msg}")
+        return
+    detail = response.json()
 
-            with col4:
-                st.write(f"**Company:** {stock_data['company_name']}")
-
-            # Trading section
-            st.subheader("Trade")
-            trade_col1, trade_col2 = st.columns(2)
-
-            with trade_col1:
-                st.markdown("#### Buy")
-                with st.form(f"buy_form_{symbol}"):
-                    buy_quantity = st.number_input("Quantity", min_value=0.01, step=0.01, key=f"buy_qty_{symbol}")
-                    buy_cost = buy_quantity * stock_data['current_price']
-                    st.write(f"Total cost: ${buy_cost:.2f}")
-
-                    if st.form_submit_button("Buy"):
-                        buy_response = make_authenticated_request(
-                            "/portfolio/buy",
-                            method="POST",
-                            data={"ticker": symbol, "quantity": buy_quantity}
-                        )
-
-                        if buy_response and buy_response.status_code == 200:
-                            st.success(f"Successfully bought {buy_quantity} shares of {symbol}!")
-                            time.sleep(1)
-                            st.rerun()
-                        else:
-                            error_msg = buy_response.json().get('detail',
-                                                                'Unknown error') if buy_response else 'Request failed'
-                            st.error(f"Buy failed: {error_msg}")
-
-            with trade_col2:
-                st.markdown("#### Sell")
-                with st.form(f"sell_form_{symbol}"):
-                    sell_quantity = st.number_input("Quantity", min_value=0.01, step=0.01, key=f"sell_qty_{symbol}")
-                    sell_value = sell_quantity * stock_data['current_price']
-                    st.write(f"Total value: ${sell_value:.2f}")
-
-                    if st.form_submit_button("Sell"):
-                        sell_response = make_authenticated_request(
-                            "/portfolio/sell",
-                            method="POST",
-                            data={"ticker": symbol, "quantity": sell_quantity}
-                        )
-
-                        if sell_response and sell_response.status_code == 200:
-                            st.success(f"Successfully sold {sell_quantity} shares of {symbol}!")
-                            time.sleep(1)
-                            st.rerun()
-                        else:
-                            error_msg = sell_response.json().get('detail',
-                                                                 'Unknown error') if sell_response else 'Request failed'
-                            st.error(f"Sell failed: {error_msg}")
-
-            # Chart section (reusing your existing chart code)
-            st.subheader("Price Chart & Analysis")
-
-            # Get historical data
-            hist_response = requests.get(f"{API_BASE}/api/stock/{symbol}/history?period=6mo")
-            if hist_response.status_code == 200:
-                df = pd.DataFrame(hist_response.json()["data"])
-                df['date'] = pd.to_datetime(df['date'])
-
-                # Price chart
-                price_chart = alt.Chart(df).mark_line(
-                    color='#667eea',
-                    strokeWidth=2
-                ).encode(
-                    x=alt.X("date:T", title="Date"),
-                    y=alt.Y("close:Q", title="Price ($)", scale=alt.Scale(zero=False)),
-                    tooltip=["date:T", "close:Q", "volume:Q"]
-                ).properties(
-                    height=400,
-                    title=f"{symbol} Price History"
-                )
+    # Each section carries its own status, so a slow or failing part only blanks itself
+    quote = detail["quote"]
+    if quote["status"] == "ok":
+        render_quote(quote["data"])
+        render_trade(symbol, quote["data"])
+    else:
+        st.error(section_error("stock data", quote))
 
-                st.altair_chart(price_chart, use_container_width=True)
-
-                # Prediction section
-                pred_response = requests.get(f"{API_BASE}/api/stock/{symbol}/predict?windowSize=5")
-                if pred_response.status_code == 200:
-                    pred_data = pred_response.json()
-                    predicted_price = pred_data['predicted_close_price']
-                    current_price = stock_data['current_price']
-
-                    st.subheader("AI Prediction")
-                    prediction_change = ((predicted_price - current_price) / current_price) * 100
-                    direction = "📈" if prediction_change > 0 else "📉"
-
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric(
-                            "Predicted Next Close",
-                            f"${predicted_price:.2f}",
-                            delta=f"{prediction_change:+.2f}%"
-                        )
-                    with col2:
-                        st.write(f"{direction} Direction: {'Up' if prediction_change > 0 else 'Down'}")
-
-                        # Add this section in your stock_detail_page() function, right after the AI Prediction section
-
-                        # Sentiment Analysis section
-                        st.subheader("📰 News Sentiment Analysis")
-
-                        try:
-                            sentiment_response = requests.get(f"{API_BASE}/api/stock/{symbol}/sentiment")
-                            if sentiment_response.status_code == 200:
-                                sentiment_data = sentiment_response.json()
-
-                                # Sentiment overview
-                                col1, col2, col3 = st.columns(3)
-
-                                with col1:
-                                    score = sentiment_data['sentiment_score']
-                                    status = sentiment_data['status']
-
-                                    # Color code based on sentiment
-                                    if status == "Positive":
-                                        sentiment_color = "🟢"
-                                        delta_color = "normal"
-                                    elif status == "Negative":
-                                        sentiment_color = "🔴"
-                                        delta_color = "inverse"
-                                    else:
-                                        sentiment_color = "🟡"
-                                        delta_color = "off"
-
-                                    st.metric(
-                                        "Sentiment Score",
-                                        f"{score:.3f}",
-                                        delta=f"{status}",
-                                        delta_color=delta_color
-                                    )
-
-                                with col2:
-                                    st.write(f"**Status:** {sentiment_color} {status}")
-
-                                    # Add interpretation
-                                    if score > 0.1:
-                                        interpretation = "Very Positive"
-                                    elif score > 0.05:
-                                        interpretation = "Slightly Positive"
-                                    elif score < -0.1:
-                                        interpretation = "Very Negative"
-                                    elif score < -0.05:
-                                        interpretation = "Slightly Negative"
-                                    else:
-                                        interpretation = "Neutral"
-
-                                    st.write(f"**Interpretation:** {interpretation}")
-
-                                with col3:
-                                    headlines_count = len(sentiment_data.get('headlines', []))
-                                    st.metric("News Articles", headlines_count)
-
-                                # Headlines section
-                                headlines = sentiment_data.get('headlines', [])
-                                if headlines:
-                                    st.markdown("#### Recent Headlines")
-
-                                    # Create expandable sections for headlines
-                                    with st.expander(f"📰 View {len(headlines)} Recent Headlines", expanded=False):
-                                        for i, headline in enumerate(headlines[:10]):  # Show max 10 headlines
-                                            st.markdown(f"**{i + 1}.** {headline}")
-
-                                    # Sentiment trend indicator
-                                    if score > 0.05:
-                                        st.success("📈 Positive news sentiment may indicate bullish market sentiment")
-                                    elif score < -0.05:
-                                        st.warning("📉 Negative news sentiment may indicate bearish market sentiment")
-                                    else:
-                                        st.info("⚖️ Neutral news sentiment - mixed or balanced coverage")
-
-                                else:
-                                    st.info("No recent headlines found for sentiment analysis")
-
-                            else:
-                                st.warning("Could not load sentiment data")
-
-                        except Exception as e:
-                            st.error(f"Error loading sentiment analysis: {e}")
-
-                        st.markdown("---")  # Add separator before next section
+    if detail["history"]["status"] == "ok":
+        render_chart(symbol, detail["history"]["data"])
+    else:
+        st.warning(section_error("price history", detail["history"]))
 
-        else:
-            st.error(f"Stock {symbol} not found")
+    # The prediction is shown relative to the current price
+    if detail["prediction"]["status"] != "ok":
+        st.warning(section_error("prediction", detail["prediction"]))
+    elif quote["status"] == "ok":
+        render_prediction(detail["prediction"]["data"], quote["data"]["current_price"])
 
-    except Exception as e:
-        st.error(f"Error loading stock data: {e}")
+    if detail["sentiment"]["status"] == "ok":
+        render_sentiment(detail["sentiment"]["data"])
+    else:
+        st.warning(section_error("sentiment data", detail["sentiment"]))
 
 
 # Transaction History Page
@@ -535,7 +712,7 @@ def transactions_page():
             st.rerun()
 
     # Get transactions
-    response = make_authenticated_request("/portfolio/transactions")
+    response = make_authenticated_request("/portfolio/transactions", cache_kind="transactions")
 
     if response and response.status_code == 200:
         transactions = response.json().get('transactions', [])
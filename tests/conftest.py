@@ -1,22 +1,36 @@
+import os
+import tempfile
+
+# Keep the upstream cache in-process so test runs never share or leave a cache file
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-from src.backend.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from src.backend.database import Base, get_db, get_async_db
 from src.backend.main import app
+from src.backend.user_cache import user_cache
+from src.backend.ratelimit import limiter
+from src.backend import market_data, shared_cache
 
-# Use in-memory SQLite with a shared connection
-SQLALCHEMY_TEST_URL = "sqlite:///:memory:"
+# Use a temporary SQLite file so the sync and async engines see the same data
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_TEST_URL = f"sqlite:///{TEST_DB_PATH}"
 engine = create_engine(
     SQLALCHEMY_TEST_URL,
     connect_args={
         "check_same_thread": False,
     },
-    poolclass=StaticPool,  # This ensures the same connection is reused
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: each TestClient request runs on its own event loop, so connections are not reused
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 # Create all tables at the start of the test session
 @pytest.fixture(scope="session", autouse=True)
@@ -43,7 +57,7 @@ def db_session():
         session.close()
 
 
-# Override get_db in FastAPI
+# Override get_db and get_async_db in FastAPI
 def override_get_db():
     session = TestingSessionLocal()
     try:
@@ -52,7 +66,13 @@ def override_get_db():
         session.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 
 # Test client for calling FastAPI endpoints
@@ -63,5 +83,11 @@ def client():
         for table in reversed(Base.metadata.sorted_tables):
             connection.execute(table.delete())
         connection.commit()
+    # Row ids are reused once tables are emptied, so cached users must go too
+    user_cache.clear()
+    limiter.reset()
+    # Tests mock the same symbols with different data
+    shared_cache.clear()
+    market_data._failed_syncs.clear()
 
-    return TestClient(app)
\ No newline at end of file
+    return TestClient(app)
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend.market_data import ensure_daily_bars
+
+
+def test_recent_listing_is_not_resynced_on_every_call(db_session, monkeypatch):
+    calls = []
+
+    class RecentListing:
+        info = {"currency": "USD"}
+
+        def __init__(self, symbol):
+            pass
+
+        # Upstream only has the last 20 business days, whatever start is asked for
+        def history(self, start=None, period=None):
+            calls.append(start)
+            dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=20)
+            close = np.linspace(10, 12, 20)
+            return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                                 "Volume": np.full(20, 1000.0)}, index=dates)
+
+    monkeypatch.setattr(yf, "Ticker", RecentListing)
+    start = date.today() - timedelta(days=365)
+    ensure_daily_bars(db_session, ["NEWCO"], start=start)
+    ensure_daily_bars(db_session, ["NEWCO"], start=start)
+    assert calls == [start]
+
+    # Asking further back than ever before does sync again
+    ensure_daily_bars(db_session, ["NEWCO"], start=start - timedelta(days=365))
+    assert len(calls) == 2
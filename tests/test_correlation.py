@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+import numpy as np
+from src.backend import analytics, correlation, market_data, models, shared_cache
+
+
+def test_cointegration_scan_matches_pairwise_regression():
+    rng = np.random.default_rng(0)
+    prices = np.cumsum(rng.normal(0, 0.01, (250, 4)), axis=0)
+    prices[:, 1] = 0.8 * prices[:, 0] + rng.normal(0, 0.002, 250)
+    t_stat, beta, _ = analytics.cointegration_scan(prices)
+
+    for y, x in [(1, 0), (2, 3)]:
+        design = np.column_stack([np.ones(250), prices[:, x]])
+        coef = np.linalg.lstsq(design, prices[:, y], rcond=None)[0]
+        residual = prices[:, y] - design @ coef
+        lagged, change = residual[:-1], np.diff(residual)
+        gamma = lagged @ change / (lagged @ lagged)
+        error = change - gamma * lagged
+        expected = gamma / np.sqrt(error @ error / (len(change) - 1) / (lagged @ lagged))
+        assert np.isclose(beta[y, x], coef[1])
+        assert np.isclose(t_stat[y, x], expected)
+
+    y, x, *_ = analytics.cointegration_candidates(prices, 5)
+    assert (y[0], x[0]) in [(0, 1), (1, 0)]
+
+
+def test_rolling_pair_correlation_matches_windows():
+    returns = np.random.default_rng(1).normal(0, 0.01, (100, 3))
+    rolling = analytics.rolling_pair_correlation(returns, np.array([0, 1]), np.array([2, 2]), 20)
+    assert rolling.shape == (81, 2)
+    assert np.isclose(rolling[-1, 0], np.corrcoef(returns[-20:, 0], returns[-20:, 2])[0, 1])
+
+
+def test_correlation_endpoint_is_cached(client, db_session, monkeypatch):
+    monkeypatch.setattr(correlation, "ensure_daily_bars", lambda db, symbols, **kwargs: None)
+    client.post("/auth/register", json={"email": "corr@x.com", "password": "pw"})
+    token = client.post("/auth/login", json={"email": "corr@x.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    rng = np.random.default_rng(2)
+    base = 100 * np.cumprod(1 + rng.normal(0, 0.01, 120))
+    series = {"AAA": base, "BBB": base * (1 + rng.normal(0, 0.001, 120)), "CCC": 50 * np.cumprod(1 + rng.normal(0, 0.02, 120))}
+    first = date.today() - timedelta(days=119)
+    for symbol, closes in series.items():
+        for offset, close in enumerate(closes):
+            db_session.add(models.PriceBar(symbol=symbol, date=first + timedelta(days=offset), open=close,
+                                           high=close, low=close, close=close, volume=1000))
+    db_session.commit()
+
+    url = "/correlation/?symbols=CCC,AAA,BBB,NOPE&lookback_days=100&rolling_window=20&top_pairs=2"
+    data = client.get(url, headers=headers).json()
+    assert data["symbols"] == ["AAA", "BBB", "CCC"]
+    assert data["missing"] == ["NOPE"]
+    assert data["observations"] == 100
+    assert data["top_pairs"][0]["pair"] == ["AAA", "BBB"]
+    assert len(data["rolling"]["dates"]) == len(data["rolling"]["pairs"][0]["values"]) == 81
+    assert sorted(data["cointegration"]["candidates"][0]["pair"]) == ["AAA", "BBB"]
+
+    assert client.get(url, headers=headers).json() == data
+    assert shared_cache.stats()["namespaces"]["correlation"] == {"hits": 1, "misses": 1}
+
+
+def test_failed_syncs_are_capped_and_not_retried(client, db_session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(market_data, "sync_daily_bars", lambda db, symbol, start=None: calls.append(symbol) or 0)
+    market_data.ensure_daily_bars(db_session, ["AAA", "BBB", "CCC"], max_syncs=2)
+    market_data.ensure_daily_bars(db_session, ["AAA", "BBB", "CCC"], max_syncs=2)
+    assert calls == ["AAA", "BBB", "CCC"]
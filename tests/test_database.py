@@ -0,0 +1,49 @@
+from sqlalchemy import text
+from src.backend.database import build_engine, init_db
+
+
+def test_sqlite_connections_are_tuned(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -65536
+    engine.dispose()
+
+
+def test_init_db_adds_columns_missing_from_existing_tables(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        # users as created before realized_pnl existed
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR UNIQUE, "
+                                "password_hash VARCHAR, balance FLOAT)"))
+        connection.execute(text("INSERT INTO users (email, password_hash, balance) VALUES ('old@x.com', 'h', 10)"))
+    init_db(engine)
+    init_db(engine)  # A second start finds nothing to add
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT realized_pnl FROM users")).scalar() == 0.0
+    engine.dispose()
+
+
+def test_init_db_opens_lots_for_holdings_bought_before_the_ledger(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'lots.db'}")
+    init_db(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, balance) VALUES (1, 'old@x.com', 'h', 10)"))
+        connection.execute(text("INSERT INTO holdings (user_id, symbol, quantity, avg_price) VALUES "
+                                "(1, 'AAPL', 10, 150), (1, 'MSFT', 8, 300)"))
+        connection.execute(text("INSERT INTO transactions (user_id, symbol, trade_type, quantity, price, amount, timestamp) "
+                                "VALUES (1, 'AAPL', 'BUY', 10, 150, 1500, '2024-01-02 00:00:00')"))
+        # MSFT was topped up after the ledger existed: only 3 of its 8 shares have a lot
+        connection.execute(text("INSERT INTO tax_lots (user_id, symbol, quantity, price, opened_at) "
+                                "VALUES (1, 'MSFT', 3, 320, '2024-06-01 00:00:00')"))
+    init_db(engine)
+    init_db(engine)  # Covered holdings are left alone on the next start
+    with engine.connect() as connection:
+        lots = connection.execute(text("SELECT symbol, quantity, price, opened_at FROM tax_lots "
+                                       "ORDER BY symbol, opened_at")).all()
+    assert [(symbol, quantity, price) for symbol, quantity, price, _ in lots] == [
+        ("AAPL", 10, 150), ("MSFT", 5, 300), ("MSFT", 3, 320)
+    ]
+    assert lots[0][3].startswith("2024-01-02")
+    engine.dispose()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend.analytics import lttb_downsample_indices, minmax_downsample_indices
+
+
+def test_minmax_keeps_endpoints_and_extremes():
+    y = np.sin(np.linspace(0, 20, 5000)) + np.random.default_rng(0).normal(0, 0.1, 5000)
+    idx = minmax_downsample_indices(y, 200)
+    assert len(idx) <= 200
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.argmax(y) in idx and np.argmin(y) in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_returns_exact_point_count():
+    y = np.random.default_rng(1).normal(0, 1, 3000).cumsum()
+    idx = lttb_downsample_indices(np.arange(3000), y, 150)
+    assert len(idx) == 150
+    assert idx[0] == 0 and idx[-1] == 2999
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_history_max_points(client, monkeypatch):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=2000)
+    close = 100 + np.cumsum(np.random.default_rng(2).normal(0, 1, 2000))
+
+    class MockTicker:
+        def __init__(self, symbol):
+            self.info = {"currency": "USD"}
+
+        def history(self, period=None):
+            return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                                 "Volume": np.full(2000, 1000.0)}, index=dates)
+
+    monkeypatch.setattr(yf, "Ticker", MockTicker)
+
+    data = client.get("/api/stock/MOCK/history?period=max&max_points=100").json()
+    assert len(data["data"]) <= 100
+    assert data["downsampling"] == {"method": "minmax", "original_points": 2000}
+    assert max(p["close"] for p in data["data"]) == round(close.max(), 2)
+
+    full = client.get("/api/stock/MOCK/history?period=max").json()
+    assert len(full["data"]) == 2000 and "downsampling" not in full
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend import eod, models
+
+
+def test_last_session_date_waits_for_the_close():
+    tz = ZoneInfo("America/New_York")
+    friday = datetime(2024, 6, 28, 15, 0, tzinfo=tz)
+    assert eod.last_session_date(friday).isoformat() == "2024-06-27"
+    assert eod.last_session_date(friday.replace(hour=17)).isoformat() == "2024-06-28"
+    assert eod.last_session_date(datetime(2024, 7, 1, 9, 0, tzinfo=tz)).isoformat() == "2024-06-28"
+
+
+def test_pipeline_stores_predictions_served_by_predict(client, db_session, monkeypatch):
+    user_id = client.post("/auth/register", json={"email": "eod@x.com", "password": "pw"}).json()["user_id"]
+    db_session.add(models.WatchlistItem(user_id=user_id, symbol="AAPL"))
+    session = eod.last_session_date()
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 63))
+    for offset, close in enumerate(closes):
+        db_session.add(models.PriceBar(symbol="AAPL", date=session - timedelta(days=62 - offset), open=close,
+                                       high=close + 1, low=close - 1, close=close, volume=1000 + offset))
+    db_session.commit()
+    monkeypatch.setattr(eod, "SessionLocal", lambda: db_session)
+
+    report = eod.run_pipeline(window_sizes=[5], processes=1, sync=False)
+    assert report["symbols"] == 1 and report["predictions"] == 1 and report["failed"] == {}
+    assert set(report["stages"]) == {"symbols", "features", "fit", "store"}
+
+    # Daytime calls read the stored prediction without touching the upstream API
+    def no_upstream(symbol):
+        raise AssertionError("upstream called")
+    monkeypatch.setattr(yf, "Ticker", no_upstream)
+    data = client.get("/api/stock/aapl/predict?windowSize=5").json()
+    assert data["symbol"] == "AAPL"
+    assert data["as_of"] == session.isoformat()
+    assert len(data["last_window"]) == 5
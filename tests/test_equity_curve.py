@@ -0,0 +1,29 @@
+from datetime import date, datetime, timedelta
+from src.backend import models, portfolio
+
+
+def test_equity_curve_values_positions_daily(client, db_session, monkeypatch):
+    user_id = client.post("/auth/register", json={"email": "curve@x.com", "password": "pw"}).json()["user_id"]
+    token = client.post("/auth/login", json={"email": "curve@x.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(portfolio, "ensure_daily_bars", lambda db, symbols, start=None: None)
+
+    first_day = date.today() - timedelta(days=2)
+    user = db_session.get(models.User, user_id)
+    user.balance = 99000.0
+    db_session.add(models.Transaction(
+        user_id=user_id, symbol="AAPL", trade_type="BUY", quantity=10, price=100.0, amount=1000.0,
+        timestamp=datetime.combine(first_day, datetime.min.time()) + timedelta(hours=15)
+    ))
+    for offset, close in enumerate([100.0, 110.0, 120.0]):
+        db_session.add(models.PriceBar(
+            symbol="AAPL", date=first_day + timedelta(days=offset),
+            open=close, high=close, low=close, close=close, volume=1000
+        ))
+    db_session.commit()
+
+    response = client.get("/portfolio/equity-curve", headers=headers)
+    assert response.status_code == 200
+    points = response.json()["points"]
+    assert [p["total_value"] for p in points] == [100000.0, 100100.0, 100200.0]
+    assert all(p["cash"] == 99000.0 for p in points)
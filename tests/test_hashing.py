@@ -0,0 +1,53 @@
+import asyncio
+import time
+from passlib.context import CryptContext
+from src.backend import config, models
+from src.backend.hashing import HashingPool, HashPoolSaturated
+
+
+def test_login_rehashes_password_when_cost_changes(client, db_session):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("pw")
+    db_session.add(models.User(email="rehash@x.com", password_hash=old_hash, balance=100000.0))
+    db_session.commit()
+
+    response = client.post("/auth/login", json={"email": "rehash@x.com", "password": "pw"})
+    assert response.status_code == 200
+
+    db_session.expire_all()
+    new_hash = db_session.query(models.User).filter(models.User.email == "rehash@x.com").one().password_hash
+    assert new_hash != old_hash
+    assert new_hash.startswith(f"$2b${config.BCRYPT_ROUNDS:02d}$")
+    assert client.post("/auth/login", json={"email": "rehash@x.com", "password": "pw"}).status_code == 200
+
+
+def test_full_pool_rejects_instead_of_queueing():
+    pool = HashingPool(workers=1, max_queue=0)
+
+    async def burst():
+        return await asyncio.gather(pool.run(time.sleep, 0.2), pool.run(time.sleep, 0.2), return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert results[0] is None
+    assert isinstance(results[1], HashPoolSaturated)
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+
+def test_cancelled_request_keeps_its_slot_until_bcrypt_finishes():
+    pool = HashingPool(workers=1, max_queue=0)
+
+    async def cancel_then_retry():
+        request = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        # The worker is still busy with the abandoned hash
+        assert pool.stats()["running"] == 1
+        retried = await asyncio.gather(pool.run(time.sleep, 0), return_exceptions=True)
+        assert isinstance(retried[0], HashPoolSaturated)
+        await asyncio.sleep(0.4)
+        return await pool.run(time.sleep, 0)
+
+    assert asyncio.run(cancel_then_retry()) is None
+    assert pool.stats()["completed"] == 2
+    pool.shutdown()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend import shared_cache
+
+
+def mock_history(monkeypatch, closes):
+    dates = pd.bdate_range(end="2024-06-28", periods=len(closes), tz="America/New_York")
+
+    class MockTicker:
+        def __init__(self, symbol):
+            self.info = {"currency": "USD"}
+
+        def history(self, period=None):
+            close = np.asarray(closes, dtype=float)
+            return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                                 "Volume": np.full(len(close), 1000.0)}, index=dates)
+
+    monkeypatch.setattr(yf, "Ticker", MockTicker)
+
+
+def test_history_revalidates_with_etag(client, monkeypatch):
+    closes = list(np.linspace(100, 200, 300))
+    mock_history(monkeypatch, closes)
+
+    first = client.get("/api/stock/MOCK/history?period=1y", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["last-modified"] == "Fri, 28 Jun 2024 04:00:00 GMT"
+    assert len(first.json()["data"]) == 300
+
+    etag = first.headers["etag"]
+    repeat = client.get("/api/stock/MOCK/history?period=1y", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    # Tag lists, weak tags and "*" revalidate too
+    for header in [f'"other", {etag}', f"W/{etag}", "*"]:
+        assert client.get("/api/stock/MOCK/history?period=1y", headers={"If-None-Match": header}).status_code == 304
+
+    # A different shape or an updated latest bar gets a new validator
+    other = client.get("/api/stock/MOCK/history?period=1y&max_points=50", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    # Once the cached history expires, the updated bar gets a new validator
+    shared_cache.clear()
+    closes[-1] = 201.0
+    updated = client.get("/api/stock/MOCK/history?period=1y", headers={"If-None-Match": etag})
+    assert updated.status_code == 200 and updated.headers["etag"] != etag
@@ -0,0 +1,32 @@
+from src.backend import leaderboard, models
+
+
+def test_leaderboard_ranks_all_accounts(client, db_session, monkeypatch):
+    tokens = {}
+    for email in ["lead1@x.com", "lead2@x.com"]:
+        user_id = client.post("/auth/register", json={"email": email, "password": "pw"}).json()["user_id"]
+        tokens[user_id] = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    first, second = sorted(tokens)
+    db_session.add(models.Holding(user_id=second, symbol="AAPL", quantity=10, avg_price=100))
+    db_session.add(models.Holding(user_id=second, symbol="MSFT", quantity=1, avg_price=300))
+    db_session.commit()
+
+    fetched = []
+    def fake_prices(symbols):
+        fetched.append(sorted(symbols))
+        return {"AAPL": 150.0}
+    monkeypatch.setattr(leaderboard, "fetch_latest_prices", fake_prices)
+
+    leaderboard.refresh_leaderboard(db_session)
+    response = client.get("/leaderboard/?limit=1", headers={"Authorization": f"Bearer {tokens[first]}"})
+    assert response.status_code == 200
+    data = response.json()
+
+    # Symbols are priced once in bulk; MSFT falls back to its cost
+    assert fetched == [["AAPL", "MSFT"]]
+    assert data["total"] == 2
+    assert data["your_rank"] == 2
+    assert data["entries"] == [{
+        "rank": 1, "user_id": second, "user": "l***@x.com", "cash_balance": 100000.0,
+        "holdings_value": 1800.0, "total_portfolio_value": 101800.0
+    }]
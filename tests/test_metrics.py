@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance as yf
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from src.backend import config
+from src.backend.database import build_engine
+
+
+class MockTicker:
+    def __init__(self, symbol):
+        self.info = {"currency": "USD"}
+
+    def history(self, period=None):
+        dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=63)
+        close = np.linspace(100, 130, 63)
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                             "Volume": np.full(63, 1000.0)}, index=dates)
+
+
+def test_server_timing_breaks_down_stages(client, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", MockTicker)
+    monkeypatch.setattr(config, "SERVER_TIMING_ENABLED", True)
+
+    response = client.get("/api/stock/MOCK/predict?windowSize=3")
+    assert response.status_code == 200
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert {"ticker.info", "ticker.history", "features", "model.fit", "total"} <= set(stages)
+
+    client.post("/auth/register", json={"email": "timing@x.com", "password": "pw"})
+    assert "db;dur=" in client.post("/auth/login", json={"email": "timing@x.com", "password": "pw"}).headers["Server-Timing"]
+
+    body = client.get("/metrics").text
+    assert 'api_request_stage_seconds_count{route="/api/stock/{symbol}/predict",stage="model.fit"}' in body
+    assert 'api_request_seconds_count{method="POST",route="/auth/login"}' in body
+
+
+def test_server_timing_is_opt_in(client):
+    assert "Server-Timing" not in client.get("/").headers
+
+
+def test_failed_query_does_not_leak_its_start_time(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'errors.db'}")
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        assert connection.info["query_started"] == []
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_started"] == []
+    engine.dispose()
@@ -1,3 +1,9 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from src.backend import market_data, portfolio
+
+
 def auth_header(client):
     client.post("/auth/register", json={"email": "p@x.com", "password": "pw"})
     token = client.post("/auth/login", json={"email": "p@x.com", "password": "pw"}).json()["access_token"]
@@ -10,3 +16,39 @@ def test_show_empty_portfolio(client):
     data = response.json()
     assert data["cash_balance"] == 100000.0
     assert data["holdings"] == []
+
+
+def test_trades_are_priced_from_the_live_chart(client, monkeypatch):
+    def chart(request):
+        if not request.url.path.endswith("/VOD.L"):
+            return httpx.Response(404, json={"chart": {"result": None, "error": {"code": "Not Found"}}})
+        meta = {"regularMarketPrice": 80.0, "currency": "GBP"}
+        return httpx.Response(200, json={"chart": {"result": [{"meta": meta}], "error": None}})
+    monkeypatch.setattr(market_data, "upstream_transport", httpx.MockTransport(chart))
+    monkeypatch.setattr(market_data, "convert_currency", lambda amount, base, target: round(amount * 1.25, 2))
+    headers = auth_header(client)
+
+    response = client.post("/portfolio/buy", json={"ticker": "VOD.L", "quantity": 10}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["balance"] == 99000.0
+    assert client.post("/portfolio/buy", json={"ticker": "NOPE", "quantity": 1}, headers=headers).status_code == 404
+
+
+def test_concurrent_buys_cannot_overspend(client, monkeypatch):
+    async def slow_price(symbol):
+        await asyncio.sleep(0.05)  # Every buy is priced before any of them debits
+        return 100.0
+    monkeypatch.setattr(portfolio, "fetch_quote_price", slow_price)
+    headers = auth_header(client)
+
+    def buy(_):
+        return client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 150}, headers=headers).status_code
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        statuses = list(pool.map(buy, range(10)))
+
+    # 15,000 per buy: only six fit in the 100,000 starting balance
+    assert statuses.count(200) == 6
+    assert statuses.count(400) == 4
+    data = client.get("/portfolio/?refresh=true", headers=headers).json()
+    assert data["cash_balance"] == 10000.0
+    assert data["holdings"][0]["quantity"] == 900
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.backend import config, profiling
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def unrelated_work(seconds):
+    busy_loop(seconds)
+
+
+def test_profile_store_keeps_last_n():
+    store = profiling.ProfileStore(2)
+    ids = [store.add({"path": f"/{i}", "stacks": {}, "top": []}) for i in range(3)]
+    assert [p["id"] for p in store.list()] == ids[1:]
+    assert store.get(ids[0]) is None
+
+
+def test_profiled_request_is_stored_and_fetchable(monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "profile_store", profiling.ProfileStore(5))
+
+    app = FastAPI()
+    app.middleware("http")(profiling.profiling_middleware)
+    app.include_router(profiling.router, prefix="/admin")
+
+    @app.get("/slow")
+    def slow():
+        busy_loop(0.2)
+        return {"ok": True}
+
+    @app.get("/slow-async")
+    async def slow_async():
+        busy_loop(0.1)
+        return {"ok": True}
+
+    @app.get("/fan-out")
+    async def fan_out():
+        async def spin():
+            busy_loop(0.1)
+        await asyncio.gather(asyncio.create_task(spin()))
+        return {"ok": True}
+
+    @app.get("/other")
+    def other_request():
+        unrelated_work(0.4)
+        return {"ok": True}
+
+    # One event loop and threadpool for every request, as in a worker
+    with TestClient(app) as client:
+        assert "X-Profile-Id" not in client.get("/slow").headers
+        assert "X-Profile-Id" not in client.get("/slow", headers={"X-Profile": "wrong"}).headers
+
+        # Work on another thread, or an unprofiled request in the same threadpool, at
+        # the same time is not part of the request
+        others = [threading.Thread(target=unrelated_work, args=(0.4,)), threading.Thread(target=client.get, args=("/other",))]
+        for other in others:
+            other.start()
+        time.sleep(0.05)
+        profile_id = client.get("/slow", headers={"X-Profile": "secret"}).headers["X-Profile-Id"]
+        for other in others:
+            other.join()
+        assert client.get("/admin/profiles").status_code == 403
+
+        auth = {"X-Profile": "secret"}
+        assert [p["path"] for p in client.get("/admin/profiles", headers=auth).json()["profiles"]] == ["/slow"]
+        profile = client.get(f"/admin/profiles/{profile_id}", headers=auth).json()
+        assert profile["samples"] > 0
+        assert any("busy_loop" in stack for stack in profile["stacks"])
+        assert not any("unrelated_work" in stack for stack in profile["stacks"])
+        collapsed = client.get(f"/admin/profiles/{profile_id}?format=collapsed", headers=auth).text
+        assert "busy_loop (test_profiling.py" in collapsed
+
+        # Async handlers are sampled on the event loop thread
+        async_id = client.get("/slow-async", headers={"X-Profile": "secret"}).headers["X-Profile-Id"]
+        assert any("busy_loop" in stack for stack in client.get(f"/admin/profiles/{async_id}", headers=auth).json()["stacks"])
+        # ...and so are tasks the handler spawns
+        fan_out_id = client.get("/fan-out", headers={"X-Profile": "secret"}).headers["X-Profile-Id"]
+        assert any("spin" in stack for stack in client.get(f"/admin/profiles/{fan_out_id}", headers=auth).json()["stacks"])
@@ -0,0 +1,99 @@
+import pandas as pd
+import yfinance as yf
+from src.backend import market_data, ratelimit
+from src.backend.ratelimit import AsyncUpstreamGate, RateLimiter, UpstreamGate
+
+
+def missing_ticker(symbol):
+    class MockTicker:
+        info = {}
+        def history(self, period=None):
+            return pd.DataFrame()
+    return MockTicker()
+
+
+def test_ip_bucket_returns_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", missing_ticker)
+    monkeypatch.setattr(ratelimit, "limiter", RateLimiter(12, 1, 100, 1))
+
+    # predict costs 10 tokens, so a second call must wait for 8 more to refill
+    assert client.get("/api/stock/FAKE").status_code == 404
+    assert client.get("/api/stock/FAKE/predict").status_code != 429
+    response = client.get("/api/stock/FAKE/predict")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "9"
+
+
+def test_user_bucket_is_shared_across_ips():
+    limiter = RateLimiter(100, 1, 2, 0)
+    assert limiter.acquire("1.1.1.1", 7, 1) == 0
+    assert limiter.acquire("2.2.2.2", 7, 1) == 0
+    assert limiter.acquire("3.3.3.3", 7, 1) > 0
+    assert limiter.acquire("3.3.3.3", None, 1) == 0
+
+
+def quoted_ticker(symbol):
+    class MockTicker:
+        info = {"currentPrice": 100.0, "previousClose": 99.0, "currency": "USD", "longName": "Apple"}
+    return MockTicker()
+
+
+def test_upstream_cap_rejects_instead_of_queueing(client, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", quoted_ticker)
+    gate = UpstreamGate(max_in_flight=1, acquire_timeout=0.01)
+    monkeypatch.setattr(market_data, "upstream_gate", gate)
+    assert gate.acquire()  # Another request is already waiting on Yahoo
+
+    response = client.get("/api/stock/AAPL")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert gate.rejected == 1
+
+
+def test_cache_hits_are_served_while_upstream_is_full(client, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", quoted_ticker)
+    gate = UpstreamGate(max_in_flight=1, acquire_timeout=0.01)
+    monkeypatch.setattr(market_data, "upstream_gate", gate)
+    assert client.get("/api/stock/AAPL").status_code == 200
+    assert gate.in_flight == 0  # The slot is not held past the upstream call
+
+    assert gate.acquire()
+    response = client.get("/api/stock/AAPL")
+    assert response.status_code == 200
+    assert response.json()["current_price"] == 100.0
+    assert gate.rejected == 0
+
+
+def test_trade_with_busy_upstream_is_503_not_invalid_ticker(client, monkeypatch):
+    gate = AsyncUpstreamGate(max_in_flight=0, acquire_timeout=0.01)  # Every slot is taken
+    monkeypatch.setattr(market_data, "async_upstream_gate", gate)
+
+    client.post("/auth/register", json={"email": "busy@x.com", "password": "pw"})
+    token = client.post("/auth/login", json={"email": "busy@x.com", "password": "pw"}).json()["access_token"]
+    response = client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 1},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert gate.rejected == 1
+
+
+def test_users_behind_the_dashboard_get_their_own_buckets(client, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", missing_ticker)
+    monkeypatch.setattr(ratelimit, "limiter", RateLimiter(12, 0.001, 100, 0.001))
+    # The test client's peer address stands in for the Streamlit server
+    monkeypatch.setattr(ratelimit.config, "TRUSTED_PROXIES", {"testclient"})
+
+    def visitor(email, ip):
+        client.post("/auth/register", json={"email": email, "password": "pw"})
+        token = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}", "X-Forwarded-For": ip}
+
+    alice, bob = visitor("alice@x.com", "203.0.113.1"), visitor("bob@x.com", "203.0.113.2")
+    assert client.get("/api/stock/FAKE/predict", headers=alice).status_code != 429
+    assert client.get("/api/stock/FAKE/predict", headers=alice).status_code == 429
+    assert client.get("/api/stock/FAKE/predict", headers=bob).status_code != 429
+
+    # A client that is not a trusted proxy cannot pick its own bucket
+    monkeypatch.setattr(ratelimit.config, "TRUSTED_PROXIES", set())
+    assert client.get("/api/stock/FAKE/predict", headers={"X-Forwarded-For": "198.51.100.8"}).status_code != 429
+    assert client.get("/api/stock/FAKE/predict", headers={"X-Forwarded-For": "198.51.100.9"}).status_code == 429
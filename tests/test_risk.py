@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+import numpy as np
+from src.backend import analytics, models, portfolio
+
+
+def add_bars(db_session, symbol, closes):
+    start = date.today() - timedelta(days=len(closes) - 1)
+    for offset, close in enumerate(closes):
+        db_session.add(models.PriceBar(
+            symbol=symbol, date=start + timedelta(days=offset),
+            open=close, high=close, low=close, close=close, volume=1000
+        ))
+
+
+def register(client, email):
+    user_id = client.post("/auth/register", json={"email": email, "password": "pw"}).json()["user_id"]
+    token = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def test_risk_metrics_share_cached_covariance(client, db_session, monkeypatch):
+    monkeypatch.setattr(portfolio, "ensure_daily_bars", lambda db, symbols, start=None: None)
+    analytics._covariance_cache.clear()
+
+    rng = np.random.default_rng(1)
+    spy = 400 * np.cumprod(1 + rng.normal(0, 0.01, 60))
+    add_bars(db_session, "SPY", spy)
+    add_bars(db_session, "AAPL", 150 * np.cumprod(1 + rng.normal(0, 0.02, 60)))
+
+    responses = []
+    for email in ["risk1@x.com", "risk2@x.com"]:
+        user_id, headers = register(client, email)
+        db_session.add(models.Holding(user_id=user_id, symbol="SPY", quantity=10, avg_price=400))
+        db_session.add(models.Holding(user_id=user_id, symbol="AAPL", quantity=5, avg_price=150))
+        db_session.commit()
+        responses.append(client.get("/portfolio/risk", headers=headers))
+
+    data = responses[0].json()
+    assert responses[0].status_code == 200
+    assert data["symbols"] == ["AAPL", "SPY"]
+    assert data["correlation"][0][0] == 1.0
+    assert data["historical_var"] > 0 and data["parametric_var"] > 0
+    assert responses[1].json() == data
+    # Both users hold the same symbols, so the covariance was computed once
+    assert len(analytics._covariance_cache) == 1
+
+
+def test_benchmark_only_portfolio_has_unit_beta():
+    rng = np.random.default_rng(2)
+    returns = rng.normal(0, 0.01, (100, 1))
+    cov = np.cov(returns, rowvar=False).reshape(1, 1)
+    metrics = analytics.portfolio_risk(returns, cov, np.array([1.0]), 0, 1000.0)
+    assert round(metrics["beta"], 6) == 1.0
@@ -0,0 +1,51 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from src.backend import models
+from src.backend.screener import screen_panel
+from src.backend.utils import add_technical_features
+
+
+def test_screen_panel_matches_per_symbol_features():
+    dates = pd.bdate_range(end="2024-06-28", periods=60)
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(100 + rng.normal(0, 1, (60, 3)).cumsum(axis=0), index=dates, columns=["A", "B", "C"])
+    volume = pd.DataFrame(rng.uniform(1e5, 2e5, (60, 3)), index=dates, columns=["A", "B", "C"])
+
+    matches, insufficient = screen_panel(close, volume, sort_by="symbol")
+    assert insufficient == []
+    for row in matches.itertuples():
+        single = add_technical_features(pd.DataFrame({"close": close[row.symbol], "volume": volume[row.symbol]}))
+        assert np.isclose(row.rsi, single["RSI"].iloc[-1])
+        assert np.isclose(row.sma_20, single["SMA_20"].iloc[-1])
+        assert np.isclose(row.volume_ratio, single["volume_ratio"].iloc[-1])
+
+
+def test_screener_filters_cached_bars(client, db_session):
+    client.post("/auth/register", json={"email": "screen@x.com", "password": "pw"})
+    token = client.post("/auth/login", json={"email": "screen@x.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize() - timedelta(days=1), periods=40)
+    # FALL slides every day (RSI 0); RISE turns up on the last day with a volume spike
+    series = {
+        "FALL": ([200.0 - i for i in range(40)], [1000.0] * 40),
+        "RISE": ([100.0 - i * 0.5 for i in range(39)] + [120.0], [1000.0] * 39 + [5000.0]),
+    }
+    for symbol, (closes, volumes) in series.items():
+        for day, close, volume in zip(days, closes, volumes):
+            db_session.add(models.PriceBar(symbol=symbol, date=day.date(), open=close, high=close,
+                                           low=close, close=close, volume=volume))
+    db_session.commit()
+
+    data = client.get("/screener/?rsi_below=30", headers=headers).json()
+    assert data["universe"] == 2
+    assert [r["symbol"] for r in data["results"]] == ["FALL"]
+
+    data = client.get("/screener/?sma_cross=above&volume_ratio_above=2", headers=headers).json()
+    assert [r["symbol"] for r in data["results"]] == ["RISE"]
+    assert data["results"][0]["crossed_above"] is True
+
+    data = client.get("/screener/?symbols=fall,NOPE&sort_by=rsi", headers=headers).json()
+    assert data["missing"] == ["NOPE"]
+    assert data["matched"] == 1
@@ -0,0 +1,72 @@
+import time
+import pandas as pd
+import pytest
+from src.backend import market_data, shared_cache
+from src.backend.shared_cache import MISSING, MemoryCache, SQLiteCache
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    # Two instances on one file stand in for two worker processes
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteCache(path, 100), SQLiteCache(path, 100)
+
+    frame = pd.DataFrame({"Close": [1.0, 2.0]})
+    first.set("history:AAPL", frame, ttl=60)
+    assert second.get("history:AAPL").equals(frame)
+
+    first.set("quote:AAPL", 1.0, ttl=0.01)
+    time.sleep(0.02)
+    assert second.get("quote:AAPL") is MISSING
+
+
+def test_sqlite_cache_evicts_past_max_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=5)
+    for i in range(10):
+        cache.set(f"k{i}", i, ttl=100 + i)
+    cache.purge()
+    assert cache.size() == 5
+    assert cache.get("k0") is MISSING and cache.get("k9") == 9
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")
+    cache.set("c", 3, 60)
+    assert cache.get("b") is MISSING and cache.get("a") == 1
+
+
+def test_cached_skips_upstream_on_hit_and_never_caches_errors(monkeypatch):
+    monkeypatch.setattr(shared_cache, "cache", MemoryCache(100))
+    calls = []
+
+    @shared_cache.cached("test", ttl=60)
+    def fetch(symbol, fail=False):
+        calls.append(symbol)
+        if fail:
+            raise RuntimeError("upstream down")
+        return {"symbol": symbol}
+
+    assert fetch("AAPL") == fetch("AAPL") == {"symbol": "AAPL"}
+    assert calls == ["AAPL"]
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            fetch("MSFT", fail=True)
+    assert calls == ["AAPL", "MSFT", "MSFT"]
+
+
+def test_empty_upstream_answers_are_not_cached_and_symbols_share_keys(monkeypatch):
+    monkeypatch.setattr(shared_cache, "cache", MemoryCache(100))
+    frames = {"AAPL": pd.DataFrame({"Close": [1.0]}), "NOPE": pd.DataFrame()}
+    calls = []
+
+    def fetch(symbol, period):
+        calls.append(symbol)
+        return frames[symbol]
+    monkeypatch.setattr(market_data, "ticker_history", lambda ticker, period: fetch(ticker.ticker, period))
+
+    for symbol in ["aapl", "AAPL", "NOPE", "NOPE"]:
+        market_data.cached_history(symbol, "1mo")
+    assert calls == ["AAPL", "NOPE", "NOPE"]
@@ -0,0 +1,81 @@
+from src.backend import models, portfolio, snapshots
+from src.backend.snapshots import apply_price_ticks
+
+
+def register(client, email):
+    client.post("/auth/register", json={"email": email, "password": "pw"})
+    token = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_trades_and_ticks_update_snapshot(client, db_session, monkeypatch):
+    holder = register(client, "snap1@x.com")
+    other = register(client, "snap2@x.com")
+    async def fake_price(symbol):
+        return 100.0
+    monkeypatch.setattr(portfolio, "fetch_quote_price", fake_price)
+    client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 10}, headers=holder)
+    client.get("/portfolio/", headers=other)
+
+    # Reads are served from the snapshot without repricing
+    async def no_live_pricing(symbol):
+        raise AssertionError("snapshot read should not fetch prices")
+    monkeypatch.setattr(portfolio, "fetch_quote_price", no_live_pricing)
+    data = client.get("/portfolio/", headers=holder).json()
+    assert data["cash_balance"] == 99000.0
+    assert data["holdings"][0]["current_price"] == 100.0
+    assert "snapshot_age_seconds" in data
+
+    other_before = db_session.query(models.PortfolioSnapshot).join(
+        models.User, models.User.id == models.PortfolioSnapshot.user_id
+    ).filter(models.User.email == "snap2@x.com").one().updated_at
+
+    # A tick only touches accounts holding the symbol
+    assert apply_price_ticks(db_session, {"AAPL": 120.0}) == 1
+    data = client.get("/portfolio/", headers=holder).json()
+    assert data["holdings_market_value"] == 1200.0
+    assert data["total_unrealised_pnl"] == 200.0
+
+    db_session.expire_all()
+    other_after = db_session.query(models.PortfolioSnapshot).join(
+        models.User, models.User.id == models.PortfolioSnapshot.user_id
+    ).filter(models.User.email == "snap2@x.com").one().updated_at
+    assert other_after == other_before
+
+
+def test_refresh_uses_stored_balance_not_cached_user(client, db_session, monkeypatch):
+    headers = register(client, "snap3@x.com")
+    async def fake_price(symbol):
+        return 100.0
+    monkeypatch.setattr(portfolio, "fetch_quote_price", fake_price)
+    client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 10}, headers=headers)
+    assert client.get("/portfolio/", headers=headers).json()["cash_balance"] == 99000.0
+
+    # Another worker changed the balance; this worker's cached user still has the old one
+    db_session.query(models.User).filter(models.User.email == "snap3@x.com").update({"balance": 5000.0})
+    db_session.commit()
+    assert client.get("/portfolio/?refresh=true", headers=headers).json()["cash_balance"] == 5000.0
+
+
+def test_tick_does_not_overwrite_a_concurrent_trade(client, db_session, monkeypatch):
+    headers = register(client, "snap4@x.com")
+    async def fake_price(symbol):
+        return 100.0
+    monkeypatch.setattr(portfolio, "fetch_quote_price", fake_price)
+    client.post("/portfolio/buy", json={"ticker": "SNAP", "quantity": 10}, headers=headers)
+
+    # The trade commits after the tick has read the snapshot but before it writes
+    original = snapshots.tick_payload
+    def trade_mid_tick(payload, prices):
+        if not trades:
+            trades.append(client.post("/portfolio/buy", json={"ticker": "SNAP", "quantity": 5}, headers=headers))
+        return original(payload, prices)
+    trades = []
+    monkeypatch.setattr(snapshots, "tick_payload", trade_mid_tick)
+
+    assert apply_price_ticks(db_session, {"SNAP": 120.0}) == 1
+    assert trades[0].status_code == 200
+    data = client.get("/portfolio/", headers=headers).json()
+    assert data["cash_balance"] == 98500.0
+    assert data["holdings"][0]["quantity"] == 15
+    assert data["holdings_market_value"] == 1800.0
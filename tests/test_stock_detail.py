@@ -0,0 +1,57 @@
+import time
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend import main
+
+
+def fake_history(days):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, days))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(days, 1000.0)}, index=dates)
+
+
+def test_detail_fetches_ticker_once_and_reports_each_section(client, monkeypatch):
+    calls = {"info": 0, "history": 0}
+
+    class MockTicker:
+        def __init__(self, symbol):
+            pass
+
+        @property
+        def info(self):
+            calls["info"] += 1
+            return {"currentPrice": 110.0, "previousClose": 100.0, "currency": "USD", "longName": "Mock Inc"}
+
+        def history(self, period=None):
+            calls["history"] += 1
+            return fake_history(130)
+
+    def slow_news(symbol):
+        time.sleep(1)
+        return []
+
+    monkeypatch.setattr(yf, "Ticker", MockTicker)
+    monkeypatch.setattr(main, "fetch_news_headlines", slow_news)
+
+    response = client.get("/api/stock/MOCK/detail?timeout=0.5")
+    assert response.status_code == 200
+    data = response.json()
+
+    assert calls == {"info": 1, "history": 1}
+    assert data["quote"]["status"] == "ok"
+    assert data["quote"]["data"]["current_price"] == 110.0
+    assert data["history"]["status"] == "ok"
+    assert len(data["history"]["data"]["data"]) == 130
+    assert data["prediction"]["status"] == "ok"
+    assert data["sentiment"]["status"] == "timeout"
+
+
+def test_detail_and_predict_default_to_the_same_window():
+    schema = main.app.openapi()["paths"]
+    defaults = [
+        next(p["schema"]["default"] for p in schema[path]["get"]["parameters"] if p["name"] == "windowSize")
+        for path in ("/api/stock/{symbol}/predict", "/api/stock/{symbol}/detail")
+    ]
+    assert defaults == [main.DEFAULT_WINDOW_SIZE] * 2
@@ -0,0 +1,31 @@
+from src.backend import portfolio
+
+
+def auth_header(client):
+    client.post("/auth/register", json={"email": "lots@x.com", "password": "pw"})
+    token = client.post("/auth/login", json={"email": "lots@x.com", "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_sell_realises_pnl_fifo(client, monkeypatch):
+    headers = auth_header(client)
+    prices = {"AAPL": 100.0}
+    async def fake_price(symbol):
+        return prices.get(symbol)
+    monkeypatch.setattr(portfolio, "fetch_quote_price", fake_price)
+
+    client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 10}, headers=headers)
+    prices["AAPL"] = 120.0
+    client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 10}, headers=headers)
+    prices["AAPL"] = 130.0
+    response = client.post("/portfolio/sell", json={"ticker": "AAPL", "quantity": 15}, headers=headers)
+    assert response.status_code == 200
+    # 10 shares from the first lot (+30 each) and 5 from the second (+10 each)
+    assert response.json()["realised_pnl"] == 350.0
+
+    lots = client.get("/portfolio/lots", headers=headers).json()["lots"]
+    assert [(lot["quantity"], lot["price"]) for lot in lots] == [(5.0, 120.0)]
+
+    pnl = client.get("/portfolio/pnl", headers=headers).json()
+    assert pnl["realised_pnl"] == 350.0
+    assert pnl["unrealised_pnl"] == 50.0
@@ -0,0 +1,107 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.security import HTTPAuthorizationCredentials
+from src.backend import models, portfolio
+from src.backend.auth import get_current_user
+from src.backend.user_cache import CachedUser, UserCache, user_cache
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def test_reads_hit_cache_and_trades_invalidate(client, monkeypatch):
+    client.post("/auth/register", json={"email": "cache@x.com", "password": "pw"})
+    token = client.post("/auth/login", json={"email": "cache@x.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    async def fake_price(symbol):
+        return 100.0
+    monkeypatch.setattr(portfolio, "fetch_quote_price", fake_price)
+
+    client.get("/portfolio/transactions", headers=headers)
+    client.get("/portfolio/transactions", headers=headers)
+    assert user_cache.stats()["hits"] == 1
+
+    client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 10}, headers=headers)
+    assert client.get("/portfolio/", headers=headers).json()["cash_balance"] == 99000.0
+    assert client.get("/portfolio/pnl", headers=headers).status_code == 200
+
+    assert client.get("/auth/cache/stats").status_code in (401, 403)
+    assert client.get("/auth/cache/stats", headers=headers).json()["hits"] >= 1
+
+
+def test_load_racing_with_invalidation_is_not_stored():
+    cache = UserCache(ttl=60, maxsize=10)
+    user, generation = cache.lookup(1)
+    assert user is None
+    cache.invalidate(1)  # A trade commits while the stale row is being loaded
+    cache.store(1, CachedUser(1, "a@x.com", 100.0, 0.0), generation)
+    assert cache.lookup(1)[0] is None
+
+
+def test_generations_do_not_outgrow_the_cache():
+    cache = UserCache(ttl=60, maxsize=10)
+    for user_id in range(1000):
+        cache.invalidate(user_id)
+    assert len(cache._generations) == 10
+
+
+def test_concurrent_trades_never_leave_stale_balance():
+    cache = UserCache(ttl=60, maxsize=10)
+    db = {"balance": 0.0}
+    db_lock = threading.Lock()
+
+    def load(user_id):
+        with db_lock:
+            balance = db["balance"]
+        time.sleep(random.random() / 1000)  # Widen the window between read and store
+        return CachedUser(user_id, "a@x.com", balance, 0.0)
+
+    def trader():
+        for _ in range(200):
+            with db_lock:
+                db["balance"] += 1
+            cache.invalidate(1)
+
+    def reader():
+        for _ in range(200):
+            cache.get_or_load(1, load)
+
+    threads = [threading.Thread(target=trader) for _ in range(4)] + [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.get_or_load(1, load).balance == db["balance"] == 800
+
+
+def test_cached_user_matches_committed_balance_after_concurrent_trades(client, db_session, monkeypatch):
+    client.post("/auth/register", json={"email": "race@x.com", "password": "pw"})
+    token = client.post("/auth/login", json={"email": "race@x.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    async def slow_price(symbol):
+        await asyncio.sleep(random.random() / 50)
+        return 100.0
+    monkeypatch.setattr(portfolio, "fetch_quote_price", slow_price)
+    assert client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 50}, headers=headers).status_code == 200
+
+    # Buys, sells and cache-filling reads all in flight at once
+    def call(i):
+        if i % 3 == 0:
+            return client.post("/portfolio/buy", json={"ticker": "AAPL", "quantity": 2}, headers=headers).status_code
+        if i % 3 == 1:
+            return client.post("/portfolio/sell", json={"ticker": "AAPL", "quantity": 1}, headers=headers).status_code
+        return client.get("/portfolio/pnl", headers=headers).status_code
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        assert set(pool.map(call, range(36))) == {200}
+
+    committed = db_session.query(models.User).filter(models.User.email == "race@x.com").one()
+    assert committed.balance == 100000.0 - 50 * 100 - 12 * 200 + 12 * 100
+
+    async def current_user():
+        async with TestingAsyncSessionLocal() as db:
+            return await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+    # Whatever the cache kept through the race must be the committed row
+    assert asyncio.run(current_user()).balance == committed.balance
+    assert user_cache.stats()["size"] == 1
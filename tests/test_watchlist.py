@@ -0,0 +1,110 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from src.backend import eod, main, models, scheduler, shared_cache, watchlist
+from src.backend.scheduler import DailyJob
+
+
+class MockTicker:
+    fetched = []
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.info = {} if symbol == "FAKE" else {"currentPrice": 100.0, "previousClose": 99.0, "currency": "USD"}
+
+    def history(self, period=None, **kwargs):
+        MockTicker.fetched.append((self.symbol, period))
+        dates = pd.bdate_range(end="2024-06-28", periods=63)
+        close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 63))
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                             "Volume": np.full(63, 1000.0)}, index=dates)
+
+
+def register(client, email):
+    user_id = client.post("/auth/register", json={"email": email, "password": "pw"}).json()["user_id"]
+    token = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def test_watchlist_add_list_remove(client, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", MockTicker)
+    _, headers = register(client, "watch@x.com")
+
+    assert client.post("/watchlist/", json={"symbol": "msft"}, headers=headers).json() == {"symbol": "MSFT", "added": True}
+    assert client.post("/watchlist/", json={"symbol": "AAPL"}, headers=headers).status_code == 200
+    assert client.post("/watchlist/", json={"symbol": "MSFT"}, headers=headers).json()["added"] is False
+    assert client.post("/watchlist/", json={"symbol": "FAKE"}, headers=headers).status_code == 404
+
+    symbols = client.get("/watchlist/", headers=headers).json()["symbols"]
+    assert [item["symbol"] for item in symbols] == ["MSFT", "AAPL"]
+
+    assert client.delete("/watchlist/msft", headers=headers).status_code == 200
+    assert client.delete("/watchlist/MSFT", headers=headers).status_code == 404
+    assert [item["symbol"] for item in client.get("/watchlist/", headers=headers).json()["symbols"]] == ["AAPL"]
+
+
+def test_prewarm_ranks_by_demand_and_warms_the_stock_page(client, db_session, monkeypatch):
+    monkeypatch.setattr(yf, "Ticker", MockTicker)
+    users = [register(client, f"warm{i}@x.com")[0] for i in range(3)]
+    # TSLA: watched by two users; AAPL: held by one and watched by the same one (counts once)
+    db_session.add_all([
+        models.WatchlistItem(user_id=users[0], symbol="TSLA"),
+        models.WatchlistItem(user_id=users[1], symbol="TSLA"),
+        models.WatchlistItem(user_id=users[2], symbol="AAPL"),
+        models.Holding(user_id=users[2], symbol="AAPL", quantity=1, avg_price=100),
+        models.Holding(user_id=users[0], symbol="GONE", quantity=0, avg_price=100),
+    ])
+    db_session.commit()
+
+    assert [tuple(row) for row in watchlist.symbols_by_demand(db_session, 10)] == [("TSLA", 2), ("AAPL", 1)]
+
+    monkeypatch.setattr(main, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(main.config, "PREWARM_CONCURRENCY", 1)
+    MockTicker.fetched = []
+    assert main.prewarm_market_data() == ["TSLA", "AAPL"]
+    assert MockTicker.fetched == [("TSLA", "6mo"), ("AAPL", "6mo")]
+
+    # The stock page's first view is served from the warmed cache
+    monkeypatch.setattr(main, "fetch_news_headlines", lambda symbol: [])
+    response = client.get("/api/stock/TSLA/detail")
+    assert response.status_code == 200
+    assert response.json()["prediction"]["status"] == "ok"
+    assert MockTicker.fetched[2:] == []
+    namespaces = shared_cache.stats()["namespaces"]
+    assert namespaces["info"]["hits"] == 1
+    assert namespaces["prediction"]["hits"] == 1
+
+    # Another window size on the same history reuses the warmed features
+    assert client.get("/api/stock/TSLA/detail?windowSize=3").json()["prediction"]["status"] == "ok"
+    assert shared_cache.stats()["namespaces"]["features"]["hits"] >= 1
+
+
+def test_daily_job_skips_weekends():
+    tz = ZoneInfo("America/New_York")
+    job = DailyJob("prewarm", lambda: None, datetime.strptime("09:00", "%H:%M").time(), "America/New_York", True)
+    # Friday after the run time -> Monday 09:00
+    assert job.delay(datetime(2024, 6, 28, 10, 0, tzinfo=tz)) == 71 * 3600
+    assert job.delay(datetime(2024, 7, 1, 8, 30, tzinfo=tz)) == 30 * 60
+
+
+def test_interval_prewarm_only_runs_in_market_hours():
+    tz = ZoneInfo("America/New_York")
+    assert eod.market_is_open(datetime(2024, 7, 1, 10, 0, tzinfo=tz))
+    assert not eod.market_is_open(datetime(2024, 7, 1, 16, 30, tzinfo=tz))
+    assert not eod.market_is_open(datetime(2024, 6, 29, 11, 0, tzinfo=tz))
+
+
+def test_host_lock_is_held_by_one_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler.config, "JOB_LOCK_DIR", str(tmp_path))
+    monkeypatch.setattr(scheduler, "_host_locks", {})
+    assert scheduler.host_lock("job")
+    assert scheduler.host_lock("job")
+    other = subprocess.run(
+        [sys.executable, "-c", "from src.backend import config, scheduler; import sys; "
+         f"config.JOB_LOCK_DIR = {str(tmp_path)!r}; sys.exit(0 if scheduler.host_lock('job') else 1)"]
+    )
+    assert other.returncode == 1